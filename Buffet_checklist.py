@@ -1,18 +1,73 @@
-from tinydb import TinyDB, Query
-from datetime import datetime, date
-import os
 import sys
-import textwrap
-
-# ------------------------- CORES ANSI E LOGO ------------------------- #
-RESET = "\033[0m"
-BOLD = "\033[1m"
-RED = "\033[91m"
-GREEN = "\033[92m"
-YELLOW = "\033[93m"
-BLUE = "\033[94m"
-CYAN = "\033[96m"
 
+from dogflow import instrumentacao
+from dogflow.analise import DIAS_SEMANA
+from dogflow.indices import dobrar
+# As operações de negócio ficam em dogflow.negocio; este arquivo é só a
+# interface de menus. Os nomes abaixo continuam importáveis daqui.
+from dogflow.negocio import (  # noqa: F401
+    DEFAULT_TEMPLATES,
+    EVENTOS,
+    LOJA,
+    ajustar_preco,
+    alternar_itens,
+    apagar_template,
+    banco,
+    checklist_progress,
+    checklists_do_dia,
+    chk_table,
+    conformidade,
+    conformidade_por_loja,
+    criar_template,
+    definir_prazo,
+    custo_da_ficha,
+    ensure_default_templates,
+    estoque_esperado,
+    estatisticas_itens,
+    fichas_table,
+    find_insumo,
+    get_or_create_checklist,
+    hist_custos_table,
+    historico_execucao,
+    inicializar,
+    ingredientes_da_ficha,
+    insumos_table,
+    itens_do_checklist,
+    list_templates_names,
+    matriz_custos,
+    money,
+    normalizar_fichas,
+    painel_do_dia,
+    recalcular_cardapio,
+    reprecificar_cardapio,
+    restaurar_modelos_recomendados,
+    resumos_no_periodo,
+    salvar_ficha,
+    salvar_insumo,
+    sugerir_insumos,
+    today_str,
+    total_de_vendas,
+    tpl_table,
+    vendas_por_produto,
+    vigia,
+)
+from dogflow.tela import (  # noqa: F401
+    BLUE,
+    BOLD,
+    CYAN,
+    GREEN,
+    RED,
+    RESET,
+    YELLOW,
+    Paginador,
+    boxed,
+    ler,
+    menu_box,
+    mostrar,
+    terminal,
+)
+
+# ------------------------- LOGO ------------------------- #
 DOGFLOW_LOGO = r"""
  ____             _____ _                 
 |  _ \  ___   ___|  ___| | _____      __ 
@@ -22,154 +77,59 @@ DOGFLOW_LOGO = r"""
 
 """
 
-DB_PATH = "buffet_db.json"
-db = TinyDB(DB_PATH)
-
-# Tabelas do banco
-tpl_table = db.table("templates")      # modelos de checklist (itens padrão)
-chk_table = db.table("checklists")     # checklists do dia/turno
-insumos_table = db.table("insumos")    # insumos (matérias-primas)
-fichas_table = db.table("fichas")      # fichas técnicas (produtos)
-
-
-def money(v: float) -> str:
-    """Formata valores monetários em R$."""
-    return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-
-def find_insumo(nome: str):
-    """Busca um insumo cadastrado pelo nome."""
-    Q = Query()
-    return insumos_table.get(Q.nome == nome.strip())
-
-
-def custo_da_ficha(ficha: dict) -> float:
-    """Calcula o custo total de uma ficha técnica."""
-    total = 0.0
-    for item in ficha["ingredientes"]:
-        total += item["qtd"] * item["custo_unit"]
-    return round(total, 2)
-
+# Cabeçalho pré-montado: fica no topo da tela e só é reescrito se sumir dela.
+CABECALHO = (
+    RED + DOGFLOW_LOGO + RESET + "\n"
+    + YELLOW + BOLD + "      DOGFLOW – Sistema de Gestão Operacional\n" + RESET + "\n"
+)
 
 # ------------------------- UI BONITA (CAIXAS) ------------------------- #
 def clear():
     """Limpa a tela e mostra o cabeçalho do sistema."""
-    os.system("cls" if os.name == "nt" else "clear")
-    # Logo colorido
-    print(RED + DOGFLOW_LOGO + RESET)
-    print(YELLOW + BOLD + "      DOGFLOW – Sistema de Gestão Operacional\n" + RESET)
-
-def boxed(title: str, body: str = "", width: int = 72) -> str:
-    """Desenha uma caixa com título e corpo opcional (agora com cores)."""
-    title = f" {title.strip()} "
-    top = BLUE + "╔" + "═" * (width - 2) + "╗" + RESET
-    mid = "║" + BOLD + CYAN + title.center(width - 2, "═") + RESET + "║"
-    empty = "║" + " " * (width - 2) + "║"
-    lines = [top, mid, empty]
-
-    if body:
-        for line in body.splitlines():
-            for wrapped in textwrap.wrap(line, width=width - 4, replace_whitespace=False):
-                lines.append("║ " + wrapped.ljust(width - 4) + " ║")
-    lines.append(empty)
-    bottom = BLUE + "╚" + "═" * (width - 2) + "╝" + RESET
-    lines.append(bottom)
-    return "\n".join(lines)
-
-
-def menu_box(options, title="MENU PRINCIPAL"):
-    """Mostra um menu com as opções coloridas."""
-    body = []
-    for key, label in options:
-        body.append(f"{YELLOW}[{key}]{RESET} {label}")
-    print(boxed(title, "\n".join(body)))
-
+    terminal().limpar(CABECALHO)
 
 def pause(msg="\nPressione Enter para continuar..."):
     input(msg)
 
 
-# ------------------------- DADOS & MODELOS ------------------------- #
-DEFAULT_TEMPLATES = [
-    {
-        "nome": "Abertura – Hot Dog",
-        "itens": [
-            "Higienização pessoal: lavar mãos, unhas curtas, avental/luvas (POP Higiene Pessoal)",
-            "Checagem de gás e exaustão; teste de vazamento com espuma (segurança)",
-            "Ligar chapa e banho-maria; pré-aquecer até temperatura operacional",
-            "Sanitizar bancadas, pinças, espátulas, facas e tábua (diluição correta do sanitizante)",
-            "Conferir validades: pães, salsichas, molhos, bebidas (FIFO/PEPS)",
-            "Mise en place: pães cortados, caixas GN com molhos tampadas",
-            "Descongelar pães/insumos conforme previsão de vendas (registro de tempo/temperatura)",
-            "Checar estoque mínimo do turno (pães, salsichas, guardanapos, embalagens, copos)",
-            "Abrir caixa: conferir troco inicial e registrar valor",
-            "Briefing rápido da equipe: metas do dia + POPs críticos",
-        ],
-    },
-    {
-        "nome": "Operação – Produção & Qualidade",
-        "itens": [
-            "Controle de temperatura: chapa ≥ 170°C; banho-maria 60–70°C (HACCP PCC)",
-            "Cozimento/regeneração de salsichas por batelada; descartar após 2h no aquecimento",
-            "Reposição de molhos com etiqueta (data/hora) e tampa; não misturar antigo com novo",
-            "Limpeza rápida a cada 30 min: bancadas, alça de geladeira, puxadores e POS",
-            "Medição de temperatura de alimentos prontos (≥ 65°C) com termômetro higienizado",
-            "Reposição de pães conforme demanda; evitar sobras ao final do turno",
-            "Separação de áreas/utensílios crus x prontos (evitar contaminação cruzada)",
-            "Registro de vendas fora do sistema (contingência) — lançar no fim do turno",
-            "Coleta de feedback dos clientes (anotar itens mais pedidos e reclamações)",
-            "Verificar validade/aparência dos perecíveis a cada 2h; descartar suspeitos",
-        ],
-    },
-    {
-        "nome": "Operação – Delivery/Embalagem",
-        "itens": [
-            "Checar integridade das embalagens, selos e sacolas (sem odor/umidade)",
-            "Padronizar montagem (peso do hot dog, sequência de ingredientes, foto-modelo)",
-            "Separar pedidos múltiplos por cliente; conferência dupla (itens/bebidas/molhos)",
-            "Etiquetar pedido com hora de saída, nome do cliente e observações",
-            "Despacho: motorista/entregador registrado; manter alimento protegido do calor externo",
-        ],
-    },
-    {
-        "nome": "Fechamento – Limpeza & Caixa",
-        "itens": [
-            "Desligar chapa/gás e fechar registro; aguardar resfriar para limpeza",
-            "Descartar restos conforme POP de resíduos (orgânico/reciclável/óleo)",
-            "Lavar e sanitizar utensílios, GN, bancadas, coifa e piso (checklist de pontos críticos)",
-            "Conferência de caixa: total do sistema x dinheiro/PIX/cartão; lançar sangria",
-            "Atualizar estoque mínimo para o dia seguinte; registrar faltas e perdas",
-            "Guardar insumos etiquetados (PEPS), tampados e refrigerados",
-            "Checklist final da loja (portas, luzes, gás, lixo externo, documentos)",
-        ],
-    },
-    {
-        "nome": "POP – Preparação de Molhos",
-        "itens": [
-            "Higienizar utensílios e recipientes; conferir validade dos ingredientes",
-            "Preparar receita padrão (gramas/ml) — fidelidade à ficha técnica",
-            "Envasar em bisnagas/recipientes sanitizados; etiquetar com data/hora e validade",
-            "Armazenar refrigerado; controlar primeira saída (PEPS)",
-            "Registrar lote do molho em planilha para rastreio",
-        ],
-    },
-    {
-        "nome": "POP – Higienização de Equipamentos",
-        "itens": [
-            "Chapa: raspar resíduos após resfriar; aplicar desengordurante; enxaguar e secar",
-            "Banho-maria: esvaziar, remover incrustações e sanitizar; enxaguar",
-            "Coifa/filtros: desengordurar, lavar, secar; agendar limpeza profunda semanal",
-            "Geladeira/freezer: limpeza de prateleiras; checar borrachas e drenagem",
-            "Registrar execução (data/hora/responsável) em planilha ou caderno",
-            "Descartar resíduos conforme POP de resíduos (orgânico/reciclável/óleo)",
-        ],
-    },
-]
-
+def mostrar_paginas(titulo: str, itens, formatar, chave=None, recarregar=None, mudou=None):
+    """Mostra uma listagem página a página (só a página visível é formatada).
 
-def restaurar_modelos_recomendados():
-    tpl_table.truncate()
-    tpl_table.insert_multiple(DEFAULT_TEMPLATES)
+    Enter = próxima, a = anterior, d = ir para uma data (se `chave`), 0 = voltar.
+    Com `recarregar()`, a tela se atualiza sozinha quando `mudou()` (padrão:
+    outro terminal mudou o banco) indicar mudança.
+    """
+    paginador = Paginador(itens, formatar, chave=chave)
+    if recarregar and mudou is None:
+        mudou = vigia().mudou
+    while True:
+        clear()
+        mostrar(paginador.desenhar(titulo))
+        if paginador.numero == 1 and paginador.fim:
+            op = ler("\nPressione Enter para continuar...", mudou)
+        else:
+            opcoes = "Enter = próxima | a = anterior" + (" | d = ir para data" if chave else "")
+            op = ler(opcoes + " | 0 = voltar: ", mudou)
+        if op is None:
+            numero = paginador.numero
+            paginador = Paginador(recarregar(), formatar, chave=chave)
+            for _ in range(numero - 1):  # volta à mesma página
+                paginador.pagina()
+                if not paginador.avancar():
+                    break
+            continue
+        if paginador.numero == 1 and paginador.fim:
+            return
+        op = op.strip().lower()
+        if op == "0":
+            return
+        if op == "a":
+            paginador.voltar()
+        elif op == "d" and chave:
+            if not paginador.saltar(input("Data (AAAA-MM-DD): ").strip()):
+                pause("Nenhum registro a partir dessa data. Enter para continuar...")
+        elif not paginador.avancar():
+            return
 
 
 def atalho_restaurar_modelos():
@@ -190,42 +150,6 @@ def atalho_restaurar_modelos():
     pause()
 
 
-def ensure_default_templates():
-    if len(tpl_table) == 0:
-        tpl_table.insert_multiple(DEFAULT_TEMPLATES)
-
-
-def today_str() -> str:
-    return date.today().isoformat()
-
-
-def get_or_create_checklist(dia: str, nome_template: str) -> dict:
-    QueryChk = Query()
-    found = chk_table.get((QueryChk.data == dia) & (QueryChk.template == nome_template))
-    if found:
-        return found
-
-    tpl = Query()
-    modelo = tpl_table.get(tpl.nome == nome_template)
-    if not modelo:
-        raise ValueError(f"Template '{nome_template}' não existe.")
-
-    itens = [{"nome": n, "done": False, "timestamp": None} for n in modelo["itens"]]
-    cid = chk_table.insert({"data": dia, "template": nome_template, "itens": itens})
-    return chk_table.get(doc_id=cid)
-
-
-def list_templates_names():
-    return [tpl["nome"] for tpl in tpl_table.all()]
-
-
-def checklist_progress(reg):
-    itens = reg["itens"]
-    done = sum(1 for i in itens if i["done"])
-    total = len(itens) if itens else 1
-    return done, total, int(done * 100 / total)
-
-
 # ------------------------- FUNÇÕES DE NEGÓCIO ------------------------- #
 def iniciar_checklist():
     clear()
@@ -276,53 +200,64 @@ def marcar_item():
         print(RED + "Opção inválida." + RESET)
         return pause()
 
-    reg = get_or_create_checklist(today_str(), nome_template)
-    itens = reg["itens"]
-
-    # listar itens
-    body_lines = []
-    for i, it in enumerate(itens, start=1):
-        mark = "✔" if it["done"] else "□"
-        body_lines.append(f"{i:02d}. {mark} {it['nome']}")
-    print(boxed(f"Checklist {reg['template']} – {reg['data']}", "\n".join(body_lines)))
+    mudou = vigia().mudou
+    while True:
+        # a lista é redesenhada se outro terminal marcar algo enquanto esta espera
+        reg = get_or_create_checklist(today_str(), nome_template)
+        body_lines = []
+        for i, it in enumerate(itens_do_checklist(reg), start=1):
+            mark = "✔" if it["done"] else "□"
+            body_lines.append(f"{i:02d}. {mark} {it['nome']}")
+        clear()
+        mostrar(boxed(f"Checklist {reg['template']} – {reg['data']}", "\n".join(body_lines)))
 
+        # vários itens de uma vez ("1 3 5" ou "1,3,5") viram uma única gravação
+        resp = ler("Qual item deseja alternar (0 para voltar; vários: 1,3,5)? ", mudou)
+        if resp is not None:
+            break
     try:
-        choice = int(input("Qual item deseja alternar (0 para voltar)? "))
+        escolhas = [int(x) for x in resp.replace(",", " ").split()]
     except Exception:
         return
-    if choice == 0:
+    if not escolhas or escolhas == [0]:
         return
 
-    pos = choice - 1
-    if 0 <= pos < len(itens):
-        itens[pos]["done"] = not itens[pos]["done"]
-        itens[pos]["timestamp"] = (
-            datetime.now().isoformat(timespec="seconds") if itens[pos]["done"] else None
-        )
-        chk_table.update({"itens": itens}, doc_ids=[reg.doc_id])
-        print("\nItem atualizado!")
+    try:
+        alternar_itens(nome_template, escolhas, visto=reg)
+    except ValueError as e:
+        print(f"\n{e}")
     else:
-        print("\nÍndice inválido.")
+        print("\nItem atualizado!" if len(escolhas) == 1 else f"\n{len(escolhas)} itens atualizados!")
     pause()
 
 
 def ver_checklist():
     clear()
-    registros = sorted(chk_table.search(Query().data == today_str()), key=lambda r: r["template"])
-    if not registros:
+    if not EVENTOS:
+        registros = checklists_do_dia()
+        if not registros:
+            print(boxed("Hoje", "Nenhum checklist iniciado."))
+            return pause()
+        return mostrar_paginas("Checklists de hoje", registros, linhas_checklist, recarregar=checklists_do_dia)
+
+    # Painel ao vivo: uma leitura do banco e depois só os eventos de todos os terminais.
+    painel = painel_do_dia()
+    if not painel.registros():
         print(boxed("Hoje", "Nenhum checklist iniciado."))
         return pause()
+    mostrar_paginas(
+        "Checklists de hoje", painel.registros(), linhas_checklist,
+        recarregar=painel.registros, mudou=painel.atualizar,
+    )
 
-    for reg in registros:
-        done, total, pct = checklist_progress(reg)
-        head = f"{reg['template']} – {reg['data']}  |  Progresso: {done}/{total} ({pct}%)"
-        linhas = []
-        for i, it in enumerate(reg["itens"], start=1):
-            mark = "✔" if it["done"] else "□"
-            ts = f" [{it['timestamp']}]" if it["timestamp"] else ""
-            linhas.append(f"{i:02d}. {mark} {it['nome']}{ts}")
-        print(boxed(head, "\n".join(linhas)))
-    pause()
+
+def linhas_checklist(reg):
+    done, total, pct = checklist_progress(reg)
+    yield Paginador.SECAO + f"{reg['template']} – {reg['data']}  |  Progresso: {done}/{total} ({pct}%)"
+    for i, it in enumerate(itens_do_checklist(reg), start=1):
+        mark = "✔" if it["done"] else "□"
+        ts = f" [{it['timestamp']}]" if it["timestamp"] else ""
+        yield f"{i:02d}. {mark} {it['nome']}{ts}"
 
 
 def finalizar_checklist():
@@ -365,10 +300,12 @@ def listar_modelos():
         print(boxed("Modelos", "Nenhum modelo cadastrado."))
         return pause()
 
-    for tpl in tpl_table.all():
-        body = "\n".join([f"- {i}" for i in tpl["itens"]])
-        print(boxed(f"Modelo: {tpl['nome']}", body))
-    pause()
+    def linhas(tpl):
+        yield Paginador.SECAO + f"Modelo: {tpl['nome']}"
+        for i in tpl["itens"]:
+            yield f"- {i}"
+
+    mostrar_paginas("Modelos", tpl_table.all(), linhas)
 
 
 def criar_modelo():
@@ -390,7 +327,7 @@ def criar_modelo():
         print("Modelo precisa ter ao menos um item.")
         return pause()
 
-    tpl_table.insert({"nome": nome, "itens": itens})
+    criar_template(nome, itens)
     print(GREEN + "Modelo criado com sucesso!" + RESET)
     pause()
 
@@ -412,11 +349,38 @@ def apagar_modelo():
         print(RED + "Opção inválida." + RESET)
         return pause()
 
-    tpl_table.remove(Query().nome == alvo)
+    apagar_template(alvo)
     print("\nModelo removido.")
     pause()
 
 
+def definir_prazo_modelo():
+    clear()
+    nomes = list_templates_names()
+    if not nomes:
+        print(boxed("Modelos", "Nenhum modelo cadastrado."))
+        return pause()
+
+    for i, n in enumerate(nomes, start=1):
+        print(f"{i}. {n}")
+
+    try:
+        idx = int(input("\nNúmero do modelo: ")) - 1
+        alvo = nomes[idx]
+    except Exception:
+        print(RED + "Opção inválida." + RESET)
+        return pause()
+
+    prazo = input("Prazo para concluir os itens (HH:MM, enter = sem prazo): ").strip()
+    try:
+        definir_prazo(alvo, prazo or None)
+    except ValueError as e:
+        print(e)
+    else:
+        print(GREEN + (f"Prazo definido: {prazo}" if prazo else "Prazo removido.") + RESET)
+    pause()
+
+
 def gerenciar_modelos():
     while True:
         clear()
@@ -426,6 +390,7 @@ def gerenciar_modelos():
                 ("2", "Criar modelo"),
                 ("3", "Apagar modelo"),
                 ("4", "Restaurar modelos recomendados"),
+                ("5", "Definir prazo do modelo"),
                 ("0", "Voltar"),
             ],
             title="GERENCIAR MODELOS",
@@ -439,6 +404,8 @@ def gerenciar_modelos():
             apagar_modelo()
         elif op == "4":
             atalho_restaurar_modelos()
+        elif op == "5":
+            definir_prazo_modelo()
         elif op == "0":
             break
         else:
@@ -467,15 +434,10 @@ def cadastrar_insumo():
         return pause()
 
     existente = find_insumo(nome)
-    if existente:
-        insumos_table.update(
-            {"unidade": unidade, "custo_unit": custo_unit},
-            doc_ids=[existente.doc_id],
-        )
-        msg = "Insumo atualizado."
-    else:
-        insumos_table.insert({"nome": nome, "unidade": unidade, "custo_unit": custo_unit})
-        msg = "Insumo cadastrado."
+    _, recalculadas = salvar_insumo(nome, unidade, custo_unit)
+    msg = "Insumo atualizado." if existente else "Insumo cadastrado."
+    if recalculadas:
+        msg += f" Custo recalculado em {recalculadas} ficha(s)."
     print("\n" + msg)
     pause()
 
@@ -487,11 +449,30 @@ def listar_insumos():
         print(boxed("Insumos", "Nenhum insumo cadastrado."))
         return pause()
 
-    linhas = [
-        f"- {i['nome']}  ({i['unidade']})  |  custo: {money(i['custo_unit'])}" for i in itens
-    ]
-    print(boxed("Insumos Cadastrados", "\n".join(linhas)))
-    pause()
+    mostrar_paginas(
+        "Insumos Cadastrados",
+        itens,
+        lambda i: [f"- {i['nome']}  ({i['unidade']})  |  custo: {money(i['custo_unit'])}"],
+    )
+
+
+def escolher_insumo(texto: str):
+    """Insumo de nome `texto`; senão lista os mais parecidos para escolher pelo número."""
+    ins = find_insumo(texto)
+    if ins:
+        return ins
+    sugestoes = sugerir_insumos(texto)
+    if not sugestoes:
+        print("   → Nenhum insumo parecido. Cadastre primeiro em 'Cadastrar Insumo'.")
+        return None
+    if dobrar(sugestoes[0]["nome"]) == dobrar(texto):
+        return sugestoes[0]  # só difere em acentos, caixa ou espaços
+    for n, s in enumerate(sugestoes, 1):
+        print(f"     {n}) {s['nome']}  ({s['unidade']})")
+    escolha = input("  Número do insumo (enter para digitar de novo): ").strip()
+    if escolha.isdigit() and 1 <= int(escolha) <= len(sugestoes):
+        return sugestoes[int(escolha) - 1]
+    return None
 
 
 # ------------------------- FICHA TÉCNICA ------------------------- #
@@ -510,27 +491,19 @@ def criar_ou_editar_ficha():
 
     ingredientes = []
     while True:
-        print("\nDigite o NOME do insumo (vazio para terminar).")
+        print("\nDigite o nome do insumo ou parte dele, ex.: 'pao' (vazio para terminar).")
         nome_ins = input("  Insumo: ").strip()
         if not nome_ins:
             break
-        ins = find_insumo(nome_ins)
+        ins = escolher_insumo(nome_ins)
         if not ins:
-            print("   → Insumo não encontrado. Cadastre primeiro em 'Cadastrar Insumo'.")
             continue
         try:
             qtd = float(input(f"  Quantidade usada ({ins['unidade']}): ").replace(",", "."))
         except Exception:
             print("   → Quantidade inválida.")
             continue
-        ingredientes.append(
-            {
-                "nome": ins["nome"],
-                "unidade": ins["unidade"],
-                "qtd": qtd,
-                "custo_unit": ins["custo_unit"],
-            }
-        )
+        ingredientes.append({"insumo_id": ins.doc_id, "qtd": qtd})
 
     if not ingredientes:
         print("\nNenhum ingrediente informado.")
@@ -542,19 +515,7 @@ def criar_ou_editar_ficha():
     ).strip()
     preco = float(preco_venda.replace(",", ".")) if preco_venda else None
 
-    # salva/atualiza
-    Q = Query()
-    found = fichas_table.get(Q.nome_prod == nome_prod)
-    payload = {
-        "nome_prod": nome_prod,
-        "ingredientes": ingredientes,
-        "custo": custo,
-        "preco": preco,
-    }
-    if found:
-        fichas_table.update(payload, doc_ids=[found.doc_id])
-    else:
-        fichas_table.insert(payload)
+    salvar_ficha(nome_prod, ingredientes, preco)
 
     print(
         boxed(
@@ -573,22 +534,18 @@ def listar_fichas():
         print(boxed("Fichas Técnicas", "Nenhuma ficha cadastrada."))
         return pause()
 
-    for f in fichas:
+    def linhas(f):
+        # Os insumos de cada ficha só são consultados quando ela aparece na página.
         custo = f.get("custo") or custo_da_ficha(f)
         preco = f.get("preco")
-        body = [
-            f"Custo total: {money(custo)}",
-            f"Preço de venda: {money(preco) if preco else '—'}",
-            "",
-            "INGREDIENTES:",
-        ]
-        for it in f["ingredientes"]:
-            body.append(
-                f"- {it['nome']}  {it['qtd']} {it['unidade']}  "
-                f"(custo unit: {money(it['custo_unit'])})"
-            )
-        print(boxed(f"Produto: {f['nome_prod']}", "\n".join(body)))
-    pause()
+        yield Paginador.SECAO + f"Produto: {f['nome_prod']}"
+        yield f"Custo total: {money(custo)}"
+        yield f"Preço de venda: {money(preco) if preco else '—'}"
+        yield "INGREDIENTES:"
+        for it in ingredientes_da_ficha(f):
+            yield f"- {it['nome']}  {it['qtd']} {it['unidade']}  (custo unit: {money(it['custo_unit'])})"
+
+    mostrar_paginas("Fichas Técnicas", fichas, linhas)
 
 
 def definir_preco():
@@ -611,21 +568,20 @@ def definir_preco():
     custo = f.get("custo") or custo_da_ficha(f)
     print(f"Custo atual calculado: {money(custo)}")
     modo = input("Definir por (1) preço direto ou (2) margem desejada % ? ").strip()
-    if modo == "2":
-        try:
-            margem = float(input("Margem desejada (%): ").replace(",", "."))
-        except Exception:
-            print("Inválido.")
-            return pause()
-        preco = round(custo / (1 - margem / 100), 2)
-    else:
-        try:
-            preco = float(input("Preço de venda: ").replace(",", "."))
-        except Exception:
-            print("Inválido.")
-            return pause()
-
-    fichas_table.update({"preco": preco, "custo": custo}, doc_ids=[f.doc_id])
+    rotulo = "Margem desejada (%): " if modo == "2" else "Preço de venda: "
+    try:
+        valor = float(input(rotulo).replace(",", "."))
+    except Exception:
+        print("Inválido.")
+        return pause()
+    try:
+        if modo == "2":
+            _, preco = ajustar_preco(f["nome_prod"], margem=valor)
+        else:
+            _, preco = ajustar_preco(f["nome_prod"], preco=valor)
+    except ValueError as e:
+        print(e)
+        return pause()
     print("\nPreço atualizado:", money(preco))
     pause()
 
@@ -650,6 +606,98 @@ def relatorio_custos_margens():
     pause()
 
 
+def historico_custos():
+    clear()
+    registros = sorted(hist_custos_table.all(), key=lambda r: r["data"], reverse=True)
+    if not registros:
+        print(boxed("Histórico de Custos", "Nenhuma mudança de custo registrada."))
+        return pause()
+
+    def linhas(r):
+        anterior = money(r["custo_anterior"]) if r["custo_anterior"] is not None else "—"
+        yield f"{r['data']} | {r['nome_prod']:<20} | {anterior:>10} → {money(r['custo']):>10} | {r['motivo']}"
+
+    mostrar_paginas("Histórico de Custos (mais recentes)", registros, linhas)
+
+
+def reprecificar_todos():
+    clear()
+    if not len(fichas_table):
+        print(boxed("Reprecificar Cardápio", "Cadastre uma ficha antes."))
+        return pause()
+    print(
+        boxed(
+            "Reprecificar Cardápio",
+            "Recalcula o custo de TODAS as fichas e define o preço de venda de todos os\n"
+            "produtos pela mesma margem: preço = custo / (1 - margem/100).",
+        )
+    )
+    try:
+        margem = float(input("Margem desejada (%): ").replace(",", "."))
+        if margem >= 100:
+            raise ValueError
+    except Exception:
+        print("Inválido.")
+        return pause()
+    conf = input("Digite 'SIM' para aplicar a todos os produtos: ").strip().upper()
+    if conf != "SIM":
+        print("\nOperação cancelada.")
+        return pause()
+    print(f"\n{reprecificar_cardapio(margem)} produto(s) reprecificado(s).")
+    pause()
+
+
+def simular_precos():
+    clear()
+    print(
+        boxed(
+            "Simulação de Preços",
+            "Informe novos custos de insumos para ver o efeito no cardápio.\n"
+            "Nada é gravado no banco.",
+        )
+    )
+    matriz = matriz_custos()
+    alteracoes = {}
+    while True:
+        nome = input("  Insumo (vazio para simular): ").strip()
+        if not nome:
+            break
+        ins = escolher_insumo(nome)
+        if not ins:
+            continue
+        try:
+            alteracoes[ins.doc_id] = float(
+                input(f"  Novo custo ({money(ins['custo_unit'])} hoje): ").replace(",", ".")
+            )
+        except Exception:
+            print("   → Valor inválido.")
+    if not alteracoes:
+        return
+    margem = input("Margem para sugerir preço (%) (enter para pular): ").strip()
+    try:
+        margem = float(margem.replace(",", ".")) if margem else None
+        resultado = matriz.simular(alteracoes, margem)
+    except ValueError:
+        print("Margem inválida.")
+        return pause()
+
+    linhas = []
+    for ficha, atual, simulado, sugerido in resultado:
+        if atual == simulado:
+            continue
+        preco = ficha.get("preco") or 0.0
+        margem_nova = round((preco - simulado) / preco * 100, 2) if preco else 0
+        linha = (
+            f"{ficha['nome_prod']:<20} | {money(atual):>10} → {money(simulado):>10} | "
+            f"margem atual: {margem_nova:>6.2f}%"
+        )
+        if sugerido is not None:
+            linha += f" | sugerido: {money(sugerido)}"
+        linhas.append(linha)
+    print(boxed("Efeito no cardápio", "\n".join(linhas) or "Nenhuma ficha afetada."))
+    pause()
+
+
 def gestao_custos():
     while True:
         clear()
@@ -661,6 +709,9 @@ def gestao_custos():
                 ("4", "Listar fichas técnicas"),
                 ("5", "Definir preço de venda"),
                 ("6", "Relatório custos & margens"),
+                ("7", "Histórico de custos"),
+                ("8", "Reprecificar cardápio por margem"),
+                ("9", "Simular alteração de custos"),
                 ("0", "Voltar"),
             ],
             title="GESTÃO DE CUSTOS",
@@ -678,6 +729,12 @@ def gestao_custos():
             definir_preco()
         elif op == "6":
             relatorio_custos_margens()
+        elif op == "7":
+            historico_custos()
+        elif op == "8":
+            reprecificar_todos()
+        elif op == "9":
+            simular_precos()
         elif op == "0":
             break
         else:
@@ -686,6 +743,34 @@ def gestao_custos():
 
 
 # ------------------------- RELATÓRIOS SIMPLES ------------------------- #
+def pedir_periodo():
+    """Pergunta o intervalo de datas (enter = sem limite)."""
+    de = input("De (AAAA-MM-DD, enter = início): ").strip() or None
+    ate = input("Até (AAAA-MM-DD, enter = hoje): ").strip() or None
+    return de, ate
+
+
+def relatorio_conformidade(agrupamento: str):
+    de, ate = pedir_periodo()
+    try:
+        if agrupamento == "loja":
+            grupos = conformidade_por_loja(de, ate)
+        else:
+            grupos = conformidade(agrupamento, de, ate)
+    except ValueError as e:
+        print(e)
+        return pause()
+    titulo = {"semana": "Conformidade semanal", "mes": "Conformidade mensal", "loja": "Conformidade por loja"}
+    mostrar_paginas(
+        titulo[agrupamento],
+        grupos,
+        lambda g: [
+            f"{g['loja' if agrupamento == 'loja' else 'periodo']:<8} | {g['template']:<30}"
+            f" | {g['completos']:>3}/{g['checklists']:<3} completos | {g['pct']:3d}%"
+        ],
+    )
+
+
 def relatorios():
     clear()
     print(
@@ -693,6 +778,12 @@ def relatorios():
             "Relatórios",
             "1) Progresso de hoje por checklist\n"
             "2) Histórico de percentuais por data (todos os modelos)\n"
+            "3) Conformidade por semana\n"
+            "4) Conformidade por mês\n"
+            "5) Conformidade por loja (todas as lojas)\n"
+            "6) Análise por item (horário, atraso, pendências)\n"
+            "7) Vendas por produto (receita, margem, food cost)\n"
+            "8) Estoque esperado dos insumos\n"
             "0) Voltar",
         )
     )
@@ -700,29 +791,100 @@ def relatorios():
     if op == "1":
         ver_checklist()
     elif op == "2":
-        clear()
-        linhas = []
-        for reg in sorted(
-            chk_table.all(), key=lambda r: (r["data"], r["template"])
-        ):
-            done, total, pct = checklist_progress(reg)
-            linhas.append(
-                f"{reg['data']} | {reg['template']:<30} | {done:02d}/{total:02d} => {pct:3d}%"
-            )
-        print(
-            boxed(
-                "Histórico (todos os dias)",
-                "\n".join(linhas) if linhas else "Sem dados.",
-            )
+        de, ate = pedir_periodo()
+        mostrar_paginas(
+            "Histórico",
+            resumos_no_periodo(de, ate),
+            lambda r: [f"{r['data']} | {r['template']:<30} | {r['done']:02d}/{r['total']:02d} => {r['pct']:3d}%"],
+            chave=lambda r: r["data"],
         )
-        pause()
+    elif op == "3":
+        relatorio_conformidade("semana")
+    elif op == "4":
+        relatorio_conformidade("mes")
+    elif op == "5":
+        relatorio_conformidade("loja")
+    elif op == "6":
+        relatorio_itens()
+    elif op == "7":
+        relatorio_vendas()
+    elif op == "8":
+        relatorio_estoque()
     else:
         return
 
 
+def relatorio_vendas():
+    de, ate = pedir_periodo()
+    linhas = vendas_por_produto(de, ate)
+    if not linhas:
+        print(boxed("Vendas", "Nenhuma venda importada no período (use: importar vendas <arquivo>)."))
+        return pause()
+    total = total_de_vendas(linhas)
+    linhas.append(dict(total, produto="TOTAL"))
+
+    def formatar(r):
+        fc = f"{r['food_cost_pct']:.1f}%" if r["food_cost_pct"] is not None else "--"
+        return [
+            f"{r['produto'][:28]:<28} | {r['qtd']:>7g} un | {money(r['receita']):>13} | "
+            f"margem {money(r['margem']):>12} | food cost {fc}"
+        ]
+
+    mostrar_paginas("Vendas por produto", linhas, formatar)
+
+
+def relatorio_estoque():
+    linhas = estoque_esperado()
+    if not linhas:
+        print(boxed("Estoque", "Sem contagens nem consumo (use: contagem <insumo> <qtd>)."))
+        return pause()
+
+    def formatar(r):
+        esperado = f"{r['esperado']:g} {r['unidade']}" if r["esperado"] is not None else "sem contagem"
+        return [f"{r['insumo'][:30]:<30} | esperado {esperado:<16} | consumo {r['consumo']:g} {r['unidade']}"]
+
+    mostrar_paginas("Estoque esperado", linhas, formatar)
+
+
+def relatorio_itens():
+    ordem = input("Ordenar por (enter = modelo, p = mais pendentes, a = mais atrasados): ").strip().lower()
+    linhas = estatisticas_itens(ordem={"p": "pendentes", "a": "atraso"}.get(ordem, "modelo"))
+    if not linhas:
+        print(boxed("Análise por item", "Sem dias encerrados no histórico."))
+        return pause()
+
+    def formatar(r):
+        yield f"{r['template']} – {r['n']:02d}. {r['item']}"
+        atraso = f" | atrasado {r['pct_atraso']}% (+{r['atraso_medio_min']:g} min)" if r["prazo"] else ""
+        yield (
+            f"    feito {r['pct']}% | pendente {r['pendentes']}x | mediana {r['mediana'] or '--:--'}"
+            f" | p90 {r['p90'] or '--:--'}{atraso}"
+        )
+        dias = " ".join(f"{d} {'--' if r['pct_' + d] is None else r['pct_' + d]}" for d in DIAS_SEMANA)
+        yield f"    {dias}"
+
+    mostrar_paginas("Análise por item", linhas, formatar)
+
+
 # ------------------------- APLICAÇÃO ------------------------- #
+# Ações medidas com DOGFLOW_PERFIL=1 (ver dogflow.instrumentacao).
+ACOES_DO_MENU = (
+    "iniciar_checklist", "marcar_item", "ver_checklist", "finalizar_checklist", "gerenciar_modelos",
+    "listar_modelos", "criar_modelo", "apagar_modelo", "atalho_restaurar_modelos", "gestao_custos",
+    "cadastrar_insumo", "listar_insumos", "criar_ou_editar_ficha", "listar_fichas", "definir_preco",
+    "relatorio_custos_margens", "historico_custos", "reprecificar_todos", "simular_precos", "relatorios",
+    "relatorio_conformidade", "relatorio_itens", "definir_prazo_modelo", "relatorio_vendas", "relatorio_estoque",
+)
+
+
 def main():
-    ensure_default_templates()
+    if instrumentacao.ativar_pelo_ambiente():
+        instrumentacao.instrumentar(globals(), ACOES_DO_MENU, "menu.")
+        instrumentacao.instrumentar(globals(), ("clear", "boxed", "menu_box", "mostrar"), "tela.")
+        instrumentacao.instrumentar(globals(), ("inicializar",), "inicio.")
+        instrumentacao.instrumentar_espera(globals(), ("input", "ler"))
+    terminal().instalar()
+    inicializar()
     while True:
         clear()
         menu_box(
@@ -736,7 +898,7 @@ def main():
                 ("7", "Relatórios de execução"),
                 ("0", "Sair"),
             ],
-            title="BUFFET CHECKLIST – SISTEMA DE TERMINAL",
+            title=f"BUFFET CHECKLIST – LOJA {LOJA.upper()}" if LOJA else "BUFFET CHECKLIST – SISTEMA DE TERMINAL",
         )
         op = input("Escolha uma opção: ").strip()
         if op == "1":
@@ -763,4 +925,8 @@ def main():
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from dogflow.cli import main as cli_main
+
+        sys.exit(cli_main(sys.argv[1:], prog="Buffet_checklist.py"))
     main()
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""Benchmark do custeio em lote (dogflow.custos) contra o custeio ficha a ficha.
+
+Uso:
+    python benchmarks/bench_custos.py --fichas 3000 --insumos 800
+
+Gera fichas sintéticas em memória (não toca em nenhum banco) e compara:
+- o laço ficha a ficha equivalente a `custo_da_ficha` com busca de insumo por id;
+- `MatrizCustos.custos()` em Python puro e com NumPy (se instalado);
+- reprecificação por margem e uma simulação "e se" com 40 insumos alterados.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dogflow.custos import MatrizCustos, carregar_numpy  # noqa: E402
+from dogflow.storage import Documento  # noqa: E402
+
+
+def gerar(n_fichas, n_insumos, seed=42):
+    rnd = random.Random(seed)
+    custos = {i: round(rnd.uniform(0.01, 40.0), 2) for i in range(1, n_insumos + 1)}
+    fichas = []
+    for fid in range(1, n_fichas + 1):
+        ids = rnd.sample(range(1, n_insumos + 1), rnd.randint(4, 12))
+        ingredientes = [{"insumo_id": i, "qtd": round(rnd.uniform(0.01, 3.0), 3)} for i in ids]
+        fichas.append(Documento({"nome_prod": f"Produto {fid}", "ingredientes": ingredientes}, fid))
+    return fichas, custos
+
+
+def cronometrar(fn, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = fn()
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fichas", type=int, default=3000)
+    parser.add_argument("--insumos", type=int, default=800)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    fichas, custos = gerar(args.fichas, args.insumos)
+    rep = args.repeticoes
+
+    def laco():
+        return [
+            round(sum(it["qtd"] * custos[it["insumo_id"]] for it in f["ingredientes"]), 2)
+            for f in fichas
+        ]
+
+    t_laco, ref = cronometrar(laco, rep)
+    t_montar_py, m_py = cronometrar(lambda: MatrizCustos(fichas, custos, usar_numpy=False), rep)
+    t_py, res_py = cronometrar(m_py.custos, rep)
+    assert res_py == ref
+
+    alteracoes = dict.fromkeys(random.Random(1).sample(list(custos), 40), 9.99)
+    linhas = [
+        ("laço ficha a ficha", t_laco),
+        ("montar matriz (python)", t_montar_py),
+        ("custos() python", t_py),
+        ("margem 65% (python)", cronometrar(lambda: m_py.precos_por_margem(65, res_py), rep)[0]),
+        ("simular 40 insumos (python)", cronometrar(lambda: m_py.simular(alteracoes, 65), rep)[0]),
+    ]
+    if carregar_numpy() is not None:
+        t_montar_np, m_np = cronometrar(lambda: MatrizCustos(fichas, custos), rep)
+        t_np, res_np = cronometrar(m_np.custos, rep)
+        divergentes = sum(1 for a, b in zip(res_np, ref) if abs(a - b) > 0.011)
+        assert divergentes == 0
+        linhas += [
+            ("montar matriz (numpy)", t_montar_np),
+            ("custos() numpy", t_np),
+            ("simular 40 insumos (numpy)", cronometrar(lambda: m_np.simular(alteracoes, 65), rep)[0]),
+        ]
+    else:
+        linhas.append(("numpy", None))
+
+    print(f"{args.fichas} fichas × {args.insumos} insumos (melhor de {rep})")
+    for nome, t in linhas:
+        print(f"  {nome:<30} {'não instalado' if t is None else f'{t * 1000:9.2f} ms'}")
+
+
+if __name__ == "__main__":
+    main()
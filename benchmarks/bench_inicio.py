@@ -0,0 +1,135 @@
+"""Benchmark do tempo até o primeiro menu em função do tamanho do banco.
+
+Uso:
+    python benchmarks/bench_inicio.py --dias 0 90 365 1825 --repeticoes 5
+
+Para cada tamanho gera um banco sintético (6 modelos por dia, todos com
+itens marcados) numa pasta temporária e mede, num processo Python novo:
+- "1º menu": importar `Buffet_checklist`, `inicializar()` e desenhar o menu;
+- "hoje": a primeira consulta aos checklists do dia (carrega a tabela).
+
+Formatos: JSON já no layout por tabela, o mesmo arquivo em modo journal,
+SQLite e um JSON no layout antigo do TinyDB (sem marcadores — o 1º início
+converte o arquivo, por isso ele é recopiado a cada repetição).
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from dogflow.negocio import DEFAULT_TEMPLATES  # noqa: E402
+from dogflow.storage import gravar_tabelas, migrar_json_para_sqlite  # noqa: E402
+
+FILHO = r"""
+import contextlib, io, sys, time
+t0 = time.perf_counter()
+import Buffet_checklist as app
+app.inicializar()
+with contextlib.redirect_stdout(io.StringIO()):
+    app.menu_box([("1", "Iniciar checklist do dia"), ("0", "Sair")], title="BUFFET CHECKLIST")
+t1 = time.perf_counter()
+app.checklists_do_dia()
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1)
+"""
+
+
+def gerar(dias, seed=42):
+    """Tabelas no formato do TinyDB ({nome: {doc_id: doc}})."""
+    rnd = random.Random(seed)
+    templates = {str(i): t for i, t in enumerate(DEFAULT_TEMPLATES, start=1)}
+    checklists = {}
+    inicio = date.today() - timedelta(days=dias)
+    for d in range(dias):
+        dia = (inicio + timedelta(days=d)).isoformat()
+        for t in DEFAULT_TEMPLATES:
+            itens = [
+                {"nome": n, "done": rnd.random() < 0.9, "timestamp": f"{dia}T{rnd.randint(6, 23):02d}:00:00"}
+                for n in t["itens"]
+            ]
+            checklists[str(len(checklists) + 1)] = {"data": dia, "template": t["nome"], "itens": itens}
+    insumos = {
+        str(i): {"nome": f"Insumo {i}", "unidade": "un", "custo_unit": round(rnd.uniform(0.1, 30), 2)}
+        for i in range(1, 201)
+    }
+    fichas = {
+        str(i): {
+            "nome_prod": f"Produto {i}",
+            "ingredientes": [{"insumo_id": j, "qtd": 1.0} for j in rnd.sample(range(1, 201), 6)],
+            "preco": 20.0,
+            "custo": None,
+        }
+        for i in range(1, 101)
+    }
+    return {"templates": templates, "checklists": checklists, "insumos": insumos, "fichas": fichas}
+
+
+def preparar(pasta, dias):
+    tabelas = gerar(dias)
+    legado = os.path.join(pasta, "legado.json")
+    with open(legado, "w", encoding="utf-8") as fh:
+        json.dump(tabelas, fh)
+
+    tabelas["meta"] = {
+        "1": {"chave": "modelos_padrao", "valor": True},
+        "2": {"chave": "fichas_normalizadas", "valor": True},
+    }
+    atual = os.path.join(pasta, "atual.json")
+    with open(atual, "wb") as fh:
+        gravar_tabelas(fh, tabelas.items())
+    journal = os.path.join(pasta, "journal.json")
+    shutil.copy(atual, journal)
+    sqlite = os.path.join(pasta, "banco.sqlite3")
+    migrar_json_para_sqlite(atual, sqlite)
+    return [
+        ("json", atual, {}, None),
+        ("journal", journal, {"DOGFLOW_JOURNAL": "1"}, None),
+        ("sqlite", sqlite, {}, None),
+        ("json antigo (1º início)", os.path.join(pasta, "copia.json"), {}, legado),
+    ]
+
+
+def medir(path, env_extra, original, repeticoes):
+    env = dict(os.environ, DOGFLOW_DB=path, PYTHONPATH=RAIZ, **env_extra)
+    menus, hojes = [], []
+    for _ in range(repeticoes):
+        if original:
+            shutil.copy(original, path)
+        saida = subprocess.run(
+            [sys.executable, "-c", FILHO], env=env, cwd=RAIZ, check=True,
+            capture_output=True, text=True,
+        ).stdout.split()
+        menus.append(float(saida[0]))
+        hojes.append(float(saida[1]))
+    return min(menus), min(hojes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dias", type=int, nargs="+", default=[0, 90, 365, 1825])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'dias':>6} {'MB':>7}  {'formato':<24} {'1º menu':>10} {'hoje':>10}   (melhor de {args.repeticoes})")
+    for dias in args.dias:
+        pasta = tempfile.mkdtemp(prefix="dogflow-bench-")
+        try:
+            for nome, path, env, original in preparar(pasta, dias):
+                mb = os.path.getsize(original or path) / 1e6
+                menu, hoje = medir(path, env, original, args.repeticoes)
+                print(f"{dias:>6} {mb:>7.2f}  {nome:<24} {menu * 1000:>7.1f} ms {hoje * 1000:>7.1f} ms")
+        finally:
+            shutil.rmtree(pasta)
+
+
+if __name__ == "__main__":
+    main()
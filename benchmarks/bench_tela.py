@@ -0,0 +1,78 @@
+"""Microbenchmark do desenho de caixas (`boxed`) e menus.
+
+Uso:
+    python benchmarks/bench_tela.py --repeticoes 2000
+
+Mede, em µs por chamada:
+- "sem cache": o desenho completo (`_desenhar_caixa`), como antes do cache;
+- "com cache": `boxed` repetido com o mesmo (título, corpo, largura), o caso
+  dos menus redesenhados a cada volta do loop;
+para um menu típico (8 opções coloridas), uma tela com texto corrido e
+corpos grandes (acima de CORPO_MAX_EM_CACHE, sempre desenhados sem cache).
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dogflow import tela  # noqa: E402
+
+AMARELO, RESET = "\033[93m", "\033[0m"  # fixos: o benchmark não depende do TTY
+
+OPCOES = [
+    ("1", "Iniciar checklist do dia"),
+    ("2", "Marcar/Desmarcar item"),
+    ("3", "Ver checklists de hoje"),
+    ("4", "Finalizar checklist (resumo do turno)"),
+    ("5", "Gerenciar modelos de checklist"),
+    ("6", "Gestão de custos e fichas técnicas"),
+    ("7", "Relatórios de execução"),
+    ("0", "Sair"),
+]
+
+
+def corpos():
+    menu = "\n".join(f"{AMARELO}[{k}]{RESET} {rotulo}" for k, rotulo in OPCOES)
+    texto = (
+        "Isso APAGA todos os modelos atuais e carrega os modelos recomendados.\n"
+        "Os checklists já criados (histórico) não serão apagados."
+    )
+    grande = "\n".join(f"{i:04d}. Insumo {i} | un | R$ {i * 0.37:.2f} por unidade" for i in range(2000))
+    grande_cor = "\n".join(f"{AMARELO}[{i}]{RESET} Checklist de abertura do dia {i}: 12/15 itens" for i in range(2000))
+    return [
+        ("menu típico (8 opções)", menu),
+        ("texto corrido", texto),
+        ("2000 linhas", grande),
+        ("2000 linhas com cor", grande_cor),
+    ]
+
+
+def medir(funcao, repeticoes):
+    return min(timeit.repeat(funcao, number=repeticoes, repeat=5)) / repeticoes * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=2000)
+    parser.add_argument("--largura", type=int, default=80)
+    args = parser.parse_args()
+    w = args.largura
+
+    print(f"{'corpo':<24} {'KB':>6} {'sem cache':>12} {'com cache':>12}")
+    for nome, corpo in corpos():
+        n = args.repeticoes if len(corpo) < 10000 else max(1, args.repeticoes // 200)
+        frio = medir(lambda: tela._desenhar_caixa("TÍTULO", corpo, w), n)
+        tela.boxed("TÍTULO", corpo, w)
+        quente = medir(lambda: tela.boxed("TÍTULO", corpo, w), n)
+        print(f"{nome:<24} {len(corpo) / 1024:>6.1f} {frio:>9.1f} µs {quente:>9.1f} µs")
+
+    tela.quadro_menu(tuple(OPCOES), "MENU", w)
+    quente = medir(lambda: tela.quadro_menu(tuple(OPCOES), "MENU", w), args.repeticoes)
+    print(f"{'quadro_menu (cache)':<24} {'':>6} {'':>12} {quente:>9.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
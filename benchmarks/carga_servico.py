@@ -0,0 +1,150 @@
+"""Teste de carga da API HTTP (`python -m dogflow serve`) em localhost.
+
+Uso:
+    python benchmarks/carga_servico.py --tablets 50 --segundos 10
+    python benchmarks/carga_servico.py --url http://127.0.0.1:8080 --tablets 30
+
+Sem `--url`, sobe um servidor num banco temporário (modelos padrão e os
+checklists do dia já iniciados). Cada tablet mantém uma conexão keep-alive e,
+a cada `--intervalo` segundos (0 = sem pausa), consulta os checklists do dia
+com If-None-Match; uma fração `--alternar` das requisições marca um item.
+Mostra requisições/s, respostas por status e latências p50/p95/p99.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Cliente:
+    """Cliente HTTP/1.1 mínimo com conexão persistente."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def pedir(self, metodo, caminho, corpo=None, cabecalhos=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        dados = json.dumps(corpo).encode("utf-8") if corpo is not None else b""
+        linhas = [f"{metodo} {caminho} HTTP/1.1", f"Host: {self.host}", f"Content-Length: {len(dados)}"]
+        linhas += [f"{k}: {v}" for k, v in (cabecalhos or {}).items()]
+        self.writer.write(("\r\n".join(linhas) + "\r\n\r\n").encode("latin-1") + dados)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        resposta = {}
+        while True:
+            linha = await self.reader.readline()
+            if linha in (b"\r\n", b""):
+                break
+            nome, _, valor = linha.decode("latin-1").partition(":")
+            resposta[nome.strip().lower()] = valor.strip()
+        corpo = await self.reader.readexactly(int(resposta.get("content-length", 0)))
+        return status, resposta, corpo
+
+    def fechar(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def tablet(host, port, fim, intervalo, fracao, templates, latencias, status, rnd):
+    cliente = Cliente(host, port)
+    etag = None
+    try:
+        while time.perf_counter() < fim:
+            t0 = time.perf_counter()
+            if rnd.random() < fracao:
+                st, _, _ = await cliente.pedir(
+                    "POST", "/api/checklists/alternar",
+                    {"template": rnd.choice(templates), "itens": [rnd.randint(1, 5)]},
+                )
+            else:
+                st, cab, _ = await cliente.pedir(
+                    "GET", "/api/checklists", cabecalhos={"If-None-Match": etag} if etag else None
+                )
+                etag = cab.get("etag", etag)
+            latencias.append(time.perf_counter() - t0)
+            status[st] = status.get(st, 0) + 1
+            if intervalo:
+                await asyncio.sleep(intervalo * rnd.uniform(0.5, 1.5))
+    finally:
+        cliente.fechar()
+
+
+def percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+
+async def carga(args, host, port):
+    cliente = Cliente(host, port)
+    _, _, corpo = await cliente.pedir("GET", "/api/templates")
+    templates = [t["nome"] for t in json.loads(corpo)][:6]
+    for nome in templates:
+        await cliente.pedir("POST", "/api/checklists", {"template": nome})
+    cliente.fechar()
+
+    latencias, status = [], {}
+    inicio = time.perf_counter()
+    fim = inicio + args.segundos
+    await asyncio.gather(*(
+        tablet(host, port, fim, args.intervalo, args.alternar, templates, latencias, status, random.Random(i))
+        for i in range(args.tablets)
+    ))
+    duracao = time.perf_counter() - inicio
+    latencias.sort()
+    print(f"{args.tablets} tablets, {duracao:.1f} s: {len(latencias)} requisições ({len(latencias) / duracao:.0f}/s)")
+    print("status: " + ", ".join(f"{k}={v}" for k, v in sorted(status.items())))
+    if latencias:
+        print("latência: " + " | ".join(
+            f"p{p} {percentil(latencias, p) * 1000:.1f} ms" for p in (50, 95, 99)
+        ) + f" | máx {latencias[-1] * 1000:.1f} ms")
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="servidor já em execução (padrão: sobe um temporário)")
+    parser.add_argument("--tablets", type=int, default=50)
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--intervalo", type=float, default=0.2, help="pausa entre consultas de cada tablet")
+    parser.add_argument("--alternar", type=float, default=0.05, help="fração das requisições que marcam itens")
+    args = parser.parse_args()
+
+    if args.url:
+        partes = urlsplit(args.url)
+        asyncio.run(carga(args, partes.hostname, partes.port or 80))
+        return
+
+    pasta = tempfile.mkdtemp(prefix="dogflow-carga-")
+    port = porta_livre()
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "dogflow", "--db", os.path.join(pasta, "carga.json"), "serve", "--port", str(port)],
+        cwd=RAIZ, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        servidor.stdout.readline()  # "DogFlow servindo em ..."
+        asyncio.run(carga(args, "127.0.0.1", port))
+    finally:
+        servidor.terminate()
+        servidor.wait()
+        shutil.rmtree(pasta)
+
+
+if __name__ == "__main__":
+    main()
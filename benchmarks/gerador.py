@@ -0,0 +1,163 @@
+"""Gerador de dados sintéticos do DogFlow no layout real do banco.
+
+Uso:
+    python benchmarks/gerador.py /tmp/dogflow-sintetico --lojas 3 --dias 365 --insumos 3000 --fichas 1500
+    python benchmarks/gerador.py /tmp/dogflow-sintetico --backend sqlite
+
+Cria `<pasta>/catalogo.json` (ou .sqlite3) com os modelos padrão, insumos e
+fichas, e para cada loja `catalogo.json.lojas/lojaNN.json` com `--dias` dias
+× os 6 `DEFAULT_TEMPLATES`: os últimos `DIAS_QUENTES` dias na tabela de
+checklists, os anteriores no arquivo mensal, mais os resumos e os
+marcadores — o primeiro `inicializar()` não tem conversão nem arquivamento
+pendente. Com `--lojas 0`, tudo fica num banco único, sem lojas.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dogflow import negocio  # noqa: E402
+from dogflow.arquivo import ArquivoChecklists, caminho_arquivo  # noqa: E402
+from dogflow.lojas import caminho_loja  # noqa: E402
+from dogflow.storage import gravar_tabelas, migrar_json_para_sqlite  # noqa: E402
+
+UNIDADES = ["kg", "g", "un", "l", "ml", "pct"]
+CATEGORIAS = ["Pão", "Salsicha", "Molho", "Queijo", "Bebida", "Embalagem", "Tempero", "Vegetal", "Descartável"]
+BACKENDS = ("json", "journal", "sqlite")
+
+
+def nome_loja(i: int) -> str:
+    return f"loja{i:02d}"
+
+
+def gerar_catalogo(n_insumos: int, n_fichas: int, rnd):
+    """Tabelas do catálogo no formato do TinyDB ({nome: {doc_id: doc}})."""
+    insumos = {
+        str(i): {
+            "nome": f"{rnd.choice(CATEGORIAS)} {i:05d}",
+            "unidade": rnd.choice(UNIDADES),
+            "custo_unit": round(rnd.uniform(0.01, 40.0), 2),
+        }
+        for i in range(1, n_insumos + 1)
+    }
+    fichas = {}
+    for i in range(1, n_fichas + 1):
+        ids = rnd.sample(range(1, n_insumos + 1), min(n_insumos, rnd.randint(4, 12)))
+        fichas[str(i)] = {
+            "nome_prod": f"Produto {i:05d}",
+            "ingredientes": [{"insumo_id": j, "qtd": round(rnd.uniform(0.01, 3.0), 3)} for j in ids],
+            "preco": round(rnd.uniform(8, 45), 2),
+            "custo": None,
+        }
+    return {
+        "templates": {str(i): dict(t, rev=1) for i, t in enumerate(negocio.DEFAULT_TEMPLATES, start=1)},
+        "versoes_modelos": {str(i): dict(t, rev=1) for i, t in enumerate(negocio.DEFAULT_TEMPLATES, start=1)},
+        "insumos": insumos,
+        "fichas": fichas,
+        "historico_custos": {},
+        "meta": {
+            "1": {"chave": "modelos_padrao", "valor": True},
+            "2": {"chave": "fichas_normalizadas", "valor": True},
+            "3": {"chave": "modelos_versionados", "valor": True},
+        },
+    }
+
+
+def gerar_checklists(dias: int, hoje: date, rnd):
+    """Checklists de `dias` dias até hoje (inclusive), cada loja com a sua taxa de conclusão.
+
+    No formato compacto, na revisão 1 dos modelos padrão.
+    """
+    capricho = rnd.uniform(0.7, 0.98)
+    for d in range(dias - 1, -1, -1):
+        dia = (hoje - timedelta(days=d)).isoformat()
+        for t in negocio.DEFAULT_TEMPLATES:
+            feitos, horas = 0, []
+            for pos in range(len(t["itens"])):
+                feito = rnd.random() < capricho
+                feitos |= feito << pos
+                horas.append(rnd.randint(6, 23) * 3600 + rnd.randint(0, 59) * 60 if feito else 0)
+            yield {
+                "data": dia, "template": t["nome"], "rev": 1, "feitos": feitos, "horas": horas,
+                "versao": bin(feitos).count("1"),
+            }
+
+
+def tabelas_da_loja(dias: int, hoje: date, pasta_arquivo: str, rnd):
+    """Tabelas de execução de uma loja; os dias frios vão direto para o arquivo mensal."""
+    limite = (hoje - timedelta(days=max(negocio.DIAS_QUENTES, 1) - 1)).isoformat()
+    quentes, frios, resumos = {}, [], {}
+    for reg in gerar_checklists(dias, hoje, rnd):
+        resumos[str(len(resumos) + 1)] = negocio.resumo_do_checklist(reg)
+        if reg["data"] < limite:
+            frios.append(reg)
+        else:
+            quentes[str(len(quentes) + 1)] = reg
+    ArquivoChecklists(pasta_arquivo).acrescentar(frios)
+    meta = {
+        "1": {"chave": "arquivado_em", "valor": hoje.isoformat()},
+        "2": {"chave": "resumos", "valor": True},
+        "3": {"chave": "checklists_compactos", "valor": True},
+    }
+    return {"checklists": quentes, "resumos": resumos, "meta": meta}
+
+
+def _gravar(path: str, tabelas: dict, backend: str):
+    if backend != "sqlite":
+        with open(path, "wb") as fh:
+            gravar_tabelas(fh, tabelas.items())
+        return
+    fd, tmp = tempfile.mkstemp(suffix=".json", dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        _gravar(tmp, tabelas, "json")
+        migrar_json_para_sqlite(tmp, path)
+    finally:
+        os.remove(tmp)
+
+
+def gerar(pasta: str, lojas: int = 3, dias: int = 90, insumos: int = 2000, fichas: int = 1000,
+          backend: str = "json", seed: int = 42) -> str:
+    """Gera o banco sintético em `pasta` (recriada); retorna o caminho do catálogo."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend deve ser um de {BACKENDS}.")
+    rnd = random.Random(seed)
+    hoje = date.today()
+    shutil.rmtree(pasta, ignore_errors=True)
+    os.makedirs(pasta)
+    catalogo = os.path.join(pasta, "catalogo" + (".sqlite3" if backend == "sqlite" else ".json"))
+    tabelas = gerar_catalogo(insumos, fichas, rnd)
+    if lojas == 0:
+        execucao = tabelas_da_loja(dias, hoje, caminho_arquivo(catalogo), rnd)
+        tabelas["meta"].update({str(int(k) + 3): v for k, v in execucao.pop("meta").items()})
+        tabelas.update(execucao)
+    _gravar(catalogo, tabelas, backend)
+    for i in range(1, lojas + 1):
+        path = caminho_loja(catalogo, nome_loja(i))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _gravar(path, tabelas_da_loja(dias, hoje, caminho_arquivo(path), rnd), backend)
+    return catalogo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pasta")
+    parser.add_argument("--lojas", type=int, default=3)
+    parser.add_argument("--dias", type=int, default=90)
+    parser.add_argument("--insumos", type=int, default=2000)
+    parser.add_argument("--fichas", type=int, default=1000)
+    parser.add_argument("--backend", choices=BACKENDS, default="json")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    catalogo = gerar(args.pasta, args.lojas, args.dias, args.insumos, args.fichas, args.backend, args.seed)
+    print(f"Catálogo em {catalogo}" + (f" (lojas loja01..{nome_loja(args.lojas)})" if args.lojas else ""))
+
+
+if __name__ == "__main__":
+    main()
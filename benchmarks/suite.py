@@ -0,0 +1,248 @@
+"""Suíte de benchmarks dos caminhos de dados do DogFlow, sem interface.
+
+Uso:
+    python benchmarks/suite.py rodar --lojas 3 --dias 365 --saida base.json
+    python benchmarks/suite.py rodar --backend sqlite --repeticoes 30 --saida sqlite.json
+    python benchmarks/suite.py comparar base.json novo.json --limite 10
+
+`rodar` gera um banco sintético (`benchmarks/gerador.py`) numa pasta
+temporária e mede, na loja 1, as operações que as telas usam:
+
+- início num processo novo (importar `Buffet_checklist`, `inicializar()`,
+  checklists do dia) e abertura do banco + `inicializar()` no processo;
+- `get_or_create_checklist` de um checklist existente e de um novo;
+- marcar/desmarcar um item (`alternar_itens`, como em "Marcar/Desmarcar item");
+- 100 buscas de insumo (`find_insumo`) e `custo_da_ficha` do cardápio inteiro;
+- histórico de percentuais, conformidade semanal, checklists de 30 dias (do
+  arquivo) e o relatório consolidado das lojas.
+
+Cada operação roda `--repeticoes` vezes (depois de uma de aquecimento) e o
+JSON guarda mínimo, mediana, p95 e média em ms, com os parâmetros, a versão
+do Python e o commit. `comparar` mostra a variação da mediana de cada
+operação e sai com código 1 se alguma ficou mais de `--limite` % mais lenta
+(diferenças abaixo de `--piso` ms são ignoradas: ruído).
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import gerador  # noqa: E402
+from dogflow import negocio  # noqa: E402
+from dogflow.indices import dobrar  # noqa: E402
+
+FORMATO = 1
+
+FILHO = r"""
+import time
+t0 = time.perf_counter()
+import Buffet_checklist as app
+app.inicializar()
+app.checklists_do_dia()
+print(time.perf_counter() - t0)
+"""
+
+
+# ------------------------- MEDIÇÃO ------------------------- #
+def estatisticas(tempos):
+    ordenados = sorted(tempos)
+    n = len(ordenados)
+    return {
+        "n": n,
+        "min_ms": round(ordenados[0] * 1000, 4),
+        "mediana_ms": round(ordenados[n // 2] * 1000, 4),
+        "p95_ms": round(ordenados[min(n - 1, int(n * 0.95))] * 1000, 4),
+        "media_ms": round(sum(ordenados) / n * 1000, 4),
+    }
+
+
+def medir(fn, repeticoes: int, aquecimento: int = 1):
+    """Tempos de `fn(i)` para i = 0..repeticoes-1, depois do aquecimento."""
+    for i in range(aquecimento):
+        fn(-1 - i)
+    tempos = []
+    for i in range(repeticoes):
+        t0 = time.perf_counter()
+        fn(i)
+        tempos.append(time.perf_counter() - t0)
+    return tempos
+
+
+def inicio_em_processo_novo(catalogo, loja, journal, repeticoes):
+    env = dict(os.environ, DOGFLOW_DB=catalogo, PYTHONPATH=RAIZ, DOGFLOW_JOURNAL="1" if journal else "0")
+    if loja:
+        env["DOGFLOW_LOJA"] = loja
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", FILHO], env=env, cwd=RAIZ, check=True, capture_output=True, text=True
+        )
+        tempos.append(float(saida.stdout.split()[-1]))
+    return tempos
+
+
+def cenarios(catalogo, loja, journal, rnd):
+    """(nome, fn(i)) na ordem de execução: leituras primeiro, gravações no fim."""
+    hoje = date.today()
+    modelos = [t["nome"] for t in negocio.DEFAULT_TEMPLATES]
+    nomes_insumos = [i["nome"] for i in negocio.insumos_table.all()]
+    de_30 = (hoje - timedelta(days=30)).isoformat()
+
+    def abrir(i):
+        negocio.configurar(path=catalogo, journal=journal, loja=loja or "")
+        negocio.inicializar()
+        negocio.checklists_do_dia()
+
+    def buscar_insumos(i):
+        for nome in rnd.sample(nomes_insumos, min(100, len(nomes_insumos))):
+            negocio.find_insumo(nome)
+
+    def sugerir_insumos(i):
+        # Trechos sem acento e em minúsculas, como digitados no editor de ficha.
+        for nome in rnd.sample(nomes_insumos, min(100, len(nomes_insumos))):
+            negocio.sugerir_insumos(dobrar(nome)[: 3 + i % 5])
+
+    def custo_cardapio(i):
+        for f in negocio.fichas_table.all():
+            negocio.custo_da_ficha(f)
+
+    def checklist_novo(i):
+        # Dias futuros (um por repetição): cria sem disparar o arquivamento do dia.
+        negocio.get_or_create_checklist((hoje + timedelta(days=i + 10)).isoformat(), modelos[0])
+
+    lista = [
+        ("abrir_banco_e_inicializar", abrir),
+        ("find_insumo_x100", buscar_insumos),
+        ("sugerir_insumos_x100", sugerir_insumos),
+        ("custo_da_ficha_cardapio", custo_cardapio),
+        ("historico_execucao", lambda i: list(negocio.historico_execucao())),
+        ("conformidade_semanal", lambda i: negocio.conformidade("semana")),
+        ("checklists_30_dias", lambda i: list(negocio.checklists_no_periodo(de_30))),
+    ]
+    if loja:
+        lista.append(("relatorio_lojas", lambda i: negocio.conformidade_por_loja()))
+    lista += [
+        ("get_or_create_checklist_existente", lambda i: negocio.get_or_create_checklist(hoje.isoformat(), modelos[1])),
+        ("get_or_create_checklist_novo", checklist_novo),
+        ("marcar_item", lambda i: negocio.alternar_itens(modelos[1], [i % 10 + 1])),
+    ]
+    return lista
+
+
+def rodar(args):
+    pasta = tempfile.mkdtemp(prefix="dogflow-suite-")
+    rnd = random.Random(args.seed)
+    try:
+        t0 = time.perf_counter()
+        catalogo = gerador.gerar(
+            pasta, args.lojas, args.dias, args.insumos, args.fichas, args.backend, args.seed
+        )
+        print(f"banco sintético gerado em {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+        loja = gerador.nome_loja(1) if args.lojas else None
+        journal = args.backend == "journal"
+
+        resultados = {}
+        tempos = inicio_em_processo_novo(catalogo, loja, journal, max(3, args.repeticoes // 5))
+        resultados["inicio_processo_novo"] = estatisticas(tempos)
+        negocio.configurar(path=catalogo, journal=journal, loja=loja or "")
+        negocio.inicializar()
+        for nome, fn in cenarios(catalogo, loja, journal, rnd):
+            resultados[nome] = estatisticas(medir(fn, args.repeticoes))
+            print(f"{nome:<36} {resultados[nome]['mediana_ms']:>10.3f} ms", file=sys.stderr)
+        negocio.fechar()
+    finally:
+        shutil.rmtree(pasta)
+
+    relatorio = {
+        "formato": FORMATO,
+        "quando": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "commit": _commit(),
+        "parametros": {
+            k: getattr(args, k) for k in ("lojas", "dias", "insumos", "fichas", "backend", "repeticoes", "seed")
+        },
+        "cenarios": resultados,
+    }
+    with open(args.saida, "w", encoding="utf-8") as fh:
+        json.dump(relatorio, fh, ensure_ascii=False, indent=2)
+    print(f"Resultados em {args.saida}")
+    return 0
+
+
+def _commit():
+    try:
+        saida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return saida.stdout.strip() or None
+
+
+# ------------------------- COMPARAÇÃO ------------------------- #
+def comparar(base: dict, novo: dict, limite: float = 10.0, piso_ms: float = 0.05):
+    """Linhas (cenário, base_ms, novo_ms, variação %, regressão?) pela mediana."""
+    linhas = []
+    for nome in base["cenarios"]:
+        if nome not in novo["cenarios"]:
+            continue
+        a = base["cenarios"][nome]["mediana_ms"]
+        b = novo["cenarios"][nome]["mediana_ms"]
+        variacao = (b / a - 1) * 100 if a else 0.0
+        linhas.append((nome, a, b, variacao, variacao > limite and b - a > piso_ms))
+    return linhas
+
+
+def cmd_comparar(args):
+    with open(args.base, encoding="utf-8") as fh:
+        base = json.load(fh)
+    with open(args.novo, encoding="utf-8") as fh:
+        novo = json.load(fh)
+    if base["parametros"] != novo["parametros"]:
+        print("Aviso: as execuções usaram parâmetros diferentes.", file=sys.stderr)
+    print(f"{'cenário':<36} {'base':>12} {'novo':>12} {'variação':>10}")
+    regressoes = 0
+    for nome, a, b, variacao, regressao in comparar(base, novo, args.limite, args.piso):
+        regressoes += regressao
+        marca = "  <-- REGRESSÃO" if regressao else ""
+        print(f"{nome:<36} {a:>9.3f} ms {b:>9.3f} ms {variacao:>+9.1f}%{marca}")
+    print(f"{regressoes} regressão(ões) acima de {args.limite:g}% ({base.get('commit')} → {novo.get('commit')})")
+    return 1 if regressoes else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="comando", required=True)
+    rd = sub.add_parser("rodar", help="gera os dados, mede e grava o JSON")
+    rd.add_argument("--lojas", type=int, default=3)
+    rd.add_argument("--dias", type=int, default=90)
+    rd.add_argument("--insumos", type=int, default=2000)
+    rd.add_argument("--fichas", type=int, default=1000)
+    rd.add_argument("--backend", choices=gerador.BACKENDS, default="json")
+    rd.add_argument("--repeticoes", type=int, default=20)
+    rd.add_argument("--seed", type=int, default=42)
+    rd.add_argument("--saida", default="bench_dogflow.json")
+    cp = sub.add_parser("comparar", help="compara dois JSON de resultados")
+    cp.add_argument("base")
+    cp.add_argument("novo")
+    cp.add_argument("--limite", type=float, default=10.0, help="variação (%%) acima da qual é regressão")
+    cp.add_argument("--piso", type=float, default=0.05, help="diferença mínima (ms) para contar")
+    args = parser.parse_args()
+    sys.exit(rodar(args) if args.comando == "rodar" else cmd_comparar(args))
+
+
+if __name__ == "__main__":
+    main()
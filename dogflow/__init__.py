@@ -0,0 +1 @@
+"""Módulos de apoio do DogFlow (armazenamento e subsistemas do Buffet Checklist)."""
@@ -0,0 +1,7 @@
+"""Permite `python -m dogflow <comando>`."""
+
+import sys
+
+from dogflow.cli import main
+
+sys.exit(main())
@@ -0,0 +1,179 @@
+"""Análise da execução por item: horário típico, atraso, pendências e dia da semana.
+
+`AnaliseItens` percorre os checklists uma única vez, em ordem de data, e
+acumula por (modelo, item): quantas vezes apareceu e foi feito, um
+histograma dos horários de marcação (baldes de `BALDE_MINUTOS` minutos
+desde a meia-noite do dia) e os totais por dia da semana. O acumulado fica
+em `<banco>.analise.json` com a última data processada; a próxima execução
+só lê os dias novos. Só entram dias encerrados (anteriores a hoje): um item
+não feito num dia encerrado conta como pendente no fechamento.
+
+O atraso é calculado na hora do relatório, a partir do histograma e do
+prazo ("HH:MM") de cada modelo — mudar o prazo não exige reprocessar nada.
+
+Os horários gravados são segundos desde a meia-noite do dia do checklist:
+marcar hoje o checklist de um dia passado dá um "horário" de dias depois.
+Marcações a partir de `HORAS_NO_DIA` horas ficam fora do histograma e contam
+como `tardios` (atrasados, se o modelo tem prazo).
+"""
+
+import json
+import os
+import tempfile
+from datetime import date
+
+FORMATO = 2
+BALDE_MINUTOS = 5
+# Horários válidos de um dia: até 47:59, como os prazos (turnos que viram a noite).
+HORAS_NO_DIA = 48
+DIAS_SEMANA = ("seg", "ter", "qua", "qui", "sex", "sab", "dom")
+
+CAMPOS = [
+    "template", "n", "item", "checklists", "feitos", "pendentes", "pct", "mediana", "p90",
+    "prazo", "atrasados", "pct_atraso", "atraso_medio_min", "tardios",
+] + [f"pct_{d}" for d in DIAS_SEMANA]
+
+
+def caminho_analise(path_banco: str) -> str:
+    return path_banco + ".analise.json"
+
+
+def minutos_do_prazo(prazo: str) -> int:
+    """'HH:MM' → minutos desde a meia-noite (ValueError se inválido)."""
+    try:
+        hh, mm = prazo.split(":")
+        hh, mm = int(hh), int(mm)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Prazo inválido: '{prazo}' (use HH:MM).") from None
+    if not (0 <= hh < HORAS_NO_DIA and 0 <= mm < 60):
+        raise ValueError(f"Prazo inválido: '{prazo}' (use HH:MM).")
+    return hh * 60 + mm
+
+
+def _hhmm(minutos) -> str:
+    return f"{minutos // 60:02d}:{minutos % 60:02d}" if minutos is not None else ""
+
+
+def _quantil(baldes: dict, q: float):
+    """Minuto (início do balde) do quantil `q` do histograma {balde: contagem}."""
+    total = sum(baldes.values())
+    if not total:
+        return None
+    alvo = q * (total - 1)
+    acumulado = 0
+    for b in sorted(baldes):
+        acumulado += baldes[b]
+        if acumulado > alvo:
+            return b * BALDE_MINUTOS
+    return max(baldes) * BALDE_MINUTOS
+
+
+class AnaliseItens:
+    """Acumulado por item do histórico de checklists até a data `ate`."""
+
+    def __init__(self):
+        self.ate = None
+        self._itens = {}
+
+    # -- cache -- #
+    @classmethod
+    def carregar(cls, caminho: str) -> "AnaliseItens":
+        """Acumulado gravado em `caminho`; vazio se não existe ou é de outro formato."""
+        analise = cls()
+        try:
+            with open(caminho, encoding="utf-8") as fh:
+                dados = json.load(fh)
+        except (OSError, ValueError):
+            return analise
+        if dados.get("formato") != FORMATO or dados.get("balde") != BALDE_MINUTOS:
+            return analise
+        analise.ate = dados["ate"]
+        for acc in dados["itens"]:
+            acc["baldes"] = {int(b): n for b, n in acc["baldes"].items()}
+            analise._itens[(acc["template"], acc["item"])] = acc
+        return analise
+
+    def gravar(self, caminho: str):
+        """Grava o acumulado (temporário + rename: um leitor nunca vê o arquivo pela metade)."""
+        dados = {"formato": FORMATO, "balde": BALDE_MINUTOS, "ate": self.ate, "itens": list(self._itens.values())}
+        fd, tmp = tempfile.mkstemp(prefix=".dogflow-", suffix=".tmp", dir=os.path.dirname(caminho) or ".")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(dados, fh, ensure_ascii=False)
+            os.replace(tmp, caminho)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    # -- acumulação -- #
+    def acumular(self, reg, nomes):
+        """Soma um checklist compacto; `nomes` são os itens da revisão do modelo."""
+        dia = date.fromisoformat(reg["data"]).weekday()
+        feitos, horas = reg["feitos"], reg["horas"]
+        for pos, nome in enumerate(nomes):
+            acc = self._itens.get((reg["template"], nome))
+            if acc is None:
+                acc = self._itens[(reg["template"], nome)] = {
+                    "template": reg["template"], "item": nome, "n": pos + 1, "checklists": 0, "feitos": 0,
+                    "baldes": {}, "tardios": 0, "checklists_dia": [0] * 7, "feitos_dia": [0] * 7,
+                }
+            acc["n"] = pos + 1  # posição na revisão mais recente
+            acc["checklists"] += 1
+            acc["checklists_dia"][dia] += 1
+            if feitos >> pos & 1:
+                acc["feitos"] += 1
+                acc["feitos_dia"][dia] += 1
+                hora = horas[pos]
+                if hora is None or hora < 0:
+                    continue  # sem horário, ou marcado antes do dia (checklist adiantado)
+                if hora >= HORAS_NO_DIA * 3600:
+                    acc["tardios"] += 1
+                    continue
+                b = hora // (60 * BALDE_MINUTOS)
+                acc["baldes"][b] = acc["baldes"].get(b, 0) + 1
+        if self.ate is None or reg["data"] > self.ate:
+            self.ate = reg["data"]
+
+    # -- relatório -- #
+    def linhas(self, prazos: dict = None, template: str = None):
+        """Uma linha (ver `CAMPOS`) por item, em ordem de modelo e posição.
+
+        `prazos` é {modelo: 'HH:MM'}; itens marcados a partir do prazo
+        contam como atrasados (com a precisão de um balde), assim como os
+        `tardios`, que não entram no atraso médio.
+        """
+        prazos = prazos or {}
+        linhas = []
+        for acc in sorted(self._itens.values(), key=lambda a: (a["template"], a["n"], a["item"])):
+            if template and acc["template"] != template:
+                continue
+            baldes = acc["baldes"]
+            prazo = prazos.get(acc["template"])
+            atrasados, com_atraso, atraso_total = 0, 0, 0.0
+            if prazo:
+                limite = minutos_do_prazo(prazo)
+                for b, n in baldes.items():
+                    inicio = b * BALDE_MINUTOS
+                    if inicio >= limite:
+                        com_atraso += n
+                        atraso_total += (inicio + BALDE_MINUTOS / 2 - limite) * n
+                atrasados = com_atraso + acc["tardios"]
+            com_hora = sum(baldes.values()) + acc["tardios"]
+            linha = {
+                "template": acc["template"], "n": acc["n"], "item": acc["item"],
+                "checklists": acc["checklists"], "feitos": acc["feitos"],
+                "pendentes": acc["checklists"] - acc["feitos"],
+                "pct": int(acc["feitos"] * 100 / acc["checklists"]) if acc["checklists"] else 0,
+                "mediana": _hhmm(_quantil(baldes, 0.5)), "p90": _hhmm(_quantil(baldes, 0.9)),
+                "prazo": prazo or "",
+                "atrasados": atrasados,
+                "pct_atraso": int(atrasados * 100 / com_hora) if prazo and com_hora else 0,
+                "atraso_medio_min": round(atraso_total / com_atraso, 1) if com_atraso else 0,
+                "tardios": acc["tardios"],
+            }
+            for d, sigla in enumerate(DIAS_SEMANA):
+                n = acc["checklists_dia"][d]
+                linha[f"pct_{sigla}"] = int(acc["feitos_dia"][d] * 100 / n) if n else None
+            linhas.append(linha)
+        return linhas
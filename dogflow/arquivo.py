@@ -0,0 +1,147 @@
+"""Arquivo mensal de checklists: partições comprimidas e somente leitura.
+
+A tabela `checklists` do banco guarda só os dias recentes (a partição
+quente); os dias antigos são movidos para um arquivo por mês,
+`<banco>.arquivo/checklists-AAAA-MM.jsonl.gz`, com um checklist por linha
+(no mesmo formato compacto da tabela, sem a `versao`) em ordem de
+(data, template). Cada mês é regravado inteiro (temporário +
+fsync + rename) quando recebe novos dias, então nunca fica pela metade.
+
+Relatórios por período abrem apenas os meses do intervalo; o dia a dia
+(iniciar, marcar, ver hoje) não toca no arquivo.
+"""
+
+import gzip
+import json
+import os
+import re
+import tempfile
+
+PADRAO_MES = re.compile(r"^checklists-(\d{4}-\d{2})\.jsonl\.gz$")
+
+# Meses decodificados mantidos em memória (consultas repetidas ao mesmo mês).
+MESES_EM_CACHE = 12
+
+
+def caminho_arquivo(path_banco: str) -> str:
+    return path_banco + ".arquivo"
+
+
+def _chave(reg):
+    return reg["data"], reg["template"]
+
+
+def _assinatura(caminho: str):
+    """(mtime, tamanho, inode) do mês, ou None se não existe; o rename troca o inode."""
+    try:
+        st = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class ArquivoChecklists:
+    """Partições mensais de checklists já encerrados.
+
+    Cada mês em cache guarda a assinatura do arquivo lido: se outro processo
+    arquivou dias nele (ou o regravou), a próxima leitura volta ao disco.
+    """
+
+    def __init__(self, pasta: str):
+        self.pasta = pasta
+        self._cache = {}  # mês → (assinatura, checklists)
+
+    def _caminho(self, mes: str) -> str:
+        return os.path.join(self.pasta, f"checklists-{mes}.jsonl.gz")
+
+    def meses(self):
+        """Meses arquivados ('AAAA-MM'), em ordem; só lista a pasta."""
+        if not os.path.isdir(self.pasta):
+            return []
+        return sorted(m.group(1) for m in map(PADRAO_MES.match, os.listdir(self.pasta)) if m)
+
+    def ler_mes(self, mes: str):
+        """Checklists de um mês, em ordem de (data, template)."""
+        caminho = self._caminho(mes)
+        assinatura = _assinatura(caminho)
+        em_cache = self._cache.get(mes)
+        if em_cache is None or em_cache[0] != assinatura:
+            if assinatura is None:
+                self._cache.pop(mes, None)
+                return []
+            with gzip.open(caminho, "rt", encoding="utf-8") as fh:
+                self._guardar(mes, [json.loads(linha) for linha in fh if linha.strip()], assinatura)
+        return self._cache[mes][1]
+
+    def _guardar(self, mes, regs, assinatura):
+        self._cache.pop(mes, None)
+        if len(self._cache) >= MESES_EM_CACHE:
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[mes] = (assinatura, regs)
+
+    def ler(self, de: str = None, ate: str = None):
+        """Gera os checklists entre `de` e `ate` (datas inclusivas), em ordem."""
+        for mes in self.meses():
+            if (de and mes < de[:7]) or (ate and mes > ate[:7]):
+                continue
+            for reg in self.ler_mes(mes):
+                if (de and reg["data"] < de) or (ate and reg["data"] > ate):
+                    continue
+                yield reg
+
+    def obter(self, data: str, template: str):
+        for reg in self.ler_mes(data[:7]):
+            if _chave(reg) == (data, template):
+                return reg
+        return None
+
+    def acrescentar(self, regs) -> int:
+        """Arquiva checklists, regravando só os meses afetados.
+
+        Um checklist já arquivado com a mesma (data, template) é substituído,
+        então repetir o arquivamento após uma queda não duplica nada.
+        """
+        por_mes = {}
+        for reg in regs:
+            doc = {k: v for k, v in reg.items() if k != "versao"}
+            por_mes.setdefault(reg["data"][:7], {})[_chave(doc)] = doc
+        if not por_mes:
+            return 0
+        os.makedirs(self.pasta, exist_ok=True)
+        for mes, novos in sorted(por_mes.items()):
+            mesclados = {_chave(r): r for r in self.ler_mes(mes)}
+            mesclados.update(novos)
+            self._gravar_mes(mes, [mesclados[k] for k in sorted(mesclados)])
+        return sum(len(n) for n in por_mes.values())
+
+    def converter(self, fn) -> int:
+        """Regrava os meses em que `fn(reg)` troca algum checklist; retorna quantos trocou.
+
+        `fn` devolve o próprio registro quando não há o que mudar.
+        """
+        trocados = 0
+        for mes in self.meses():
+            regs = self.ler_mes(mes)
+            novos = [fn(r) for r in regs]
+            n = sum(1 for velho, novo in zip(regs, novos) if velho is not novo)
+            if n:
+                self._gravar_mes(mes, novos)
+                trocados += n
+        return trocados
+
+    def _gravar_mes(self, mes: str, regs):
+        fd, tmp = tempfile.mkstemp(prefix=".dogflow-", suffix=".tmp", dir=self.pasta)
+        try:
+            with os.fdopen(fd, "wb") as bruto:
+                # mtime=0: o mesmo conteúdo gera sempre os mesmos bytes.
+                with gzip.GzipFile(fileobj=bruto, mode="wb", mtime=0) as fh:
+                    for reg in regs:
+                        fh.write((json.dumps(reg, ensure_ascii=False) + "\n").encode("utf-8"))
+                bruto.flush()
+                os.fsync(bruto.fileno())
+            os.replace(tmp, self._caminho(mes))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._guardar(mes, regs, _assinatura(self._caminho(mes)))
@@ -0,0 +1,505 @@
+"""Comandos não interativos do DogFlow (`python -m dogflow ...`).
+
+Saída em texto simples (sem caixas nem limpeza de tela) ou JSON com
+`--json`, pensada para cron, scripts de quiosque e testes. `batch` executa
+vários comandos, um por linha, no mesmo processo e com o banco aberto uma
+única vez. `serve` sobe a API HTTP/JSON para tablets (`dogflow.servico`) e
+`eventos --seguir` acompanha as mudanças de todos os terminais (`dogflow.eventos`).
+Com `--loja`, os checklists são os da loja (`dogflow.lojas`); `report stores`
+consolida todas as lojas e `report items` analisa a execução por item
+(`dogflow.analise`). `importar vendas` lê a exportação do PDV
+(`dogflow.vendas`); `report sales`, `daily-sales` e `stock` mostram food
+cost, margem e estoque esperado. `copias` grava, confere, poda e restaura as
+cópias de segurança incrementais (`dogflow.copias`). `--perfil` mede o comando
+(`dogflow.instrumentacao`) e `perfil` mostra os percentis acumulados.
+"""
+
+import argparse
+import json
+import shlex
+import sys
+import time
+
+from dogflow import copias, instrumentacao, negocio, transferencia
+
+
+def _parser(prog: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog=prog, description="DogFlow – comandos não interativos")
+    parser.add_argument("--db", metavar="ARQ", help="arquivo do banco (padrão: $DOGFLOW_DB)")
+    parser.add_argument("--loja", metavar="NOME", help="loja cujos checklists são usados (padrão: $DOGFLOW_LOJA)")
+    parser.add_argument("--json", action="store_true", help="saída em JSON")
+    parser.add_argument(
+        "--perfil", action="store_const", const="1",
+        help="mede banco e comando; resumo em <banco>.perfil.jsonl (ou no arquivo de $DOGFLOW_PERFIL)",
+    )
+    parser.add_argument(
+        "--cprofile", action="store_const", const="1", help="grava também um perfil cProfile (<banco>.*.prof)"
+    )
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    st = sub.add_parser("start", help="inicia (ou carrega) o checklist do dia")
+    st.add_argument("template", help="nome do modelo ou seu número na listagem")
+    st.add_argument("--data", help="data AAAA-MM-DD (padrão: hoje)")
+
+    tg = sub.add_parser("toggle", help="marca/desmarca itens do checklist do dia")
+    tg.add_argument("template", help="nome do modelo ou seu número na listagem")
+    tg.add_argument("itens", nargs="+", type=int, metavar="n", help="número(s) do item")
+    tg.add_argument("--data", help="data AAAA-MM-DD (padrão: hoje)")
+
+    ss = sub.add_parser("status", help="progresso dos checklists do dia")
+    ss.add_argument("--data", help="data AAAA-MM-DD (padrão: hoje)")
+    ss.add_argument("--itens", action="store_true", help="lista também os itens")
+
+    sp = sub.add_parser("set-price", help="define o preço de venda de um produto")
+    sp.add_argument("produto")
+    grupo = sp.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--preco", type=transferencia.numero)
+    grupo.add_argument("--margem", type=transferencia.numero, help="margem desejada (%%)")
+
+    rp = sub.add_parser("report", help="relatórios")
+    rsub = rp.add_subparsers(dest="relatorio", required=True)
+    for nome, ajuda in (
+        ("history", "percentual de execução por data e modelo"),
+        ("weekly", "conformidade por semana e modelo"),
+        ("monthly", "conformidade por mês e modelo"),
+        ("stores", "conformidade por loja e modelo (todas as lojas)"),
+        ("sales", "vendas por produto: receita, custo, margem e food cost"),
+        ("daily-sales", "vendas por dia: receita, custo, margem e food cost"),
+    ):
+        r = rsub.add_parser(nome, help=ajuda)
+        r.add_argument("--de", metavar="AAAA-MM-DD")
+        r.add_argument("--ate", metavar="AAAA-MM-DD")
+        r.add_argument("--pagina", type=int, help="mostra só esta página (1, 2, ...)")
+        r.add_argument("--por-pagina", type=int, default=20)
+    it = rsub.add_parser("items", help="análise por item: horário típico, atraso, pendências, dia da semana")
+    it.add_argument("--template", help="nome do modelo ou seu número na listagem")
+    it.add_argument("--ordem", choices=list(negocio.ORDENS_ANALISE), default="modelo")
+    it.add_argument("--refazer", action="store_true", help="ignora o cache e relê todo o histórico")
+    it.add_argument("--pagina", type=int, help="mostra só esta página (1, 2, ...)")
+    it.add_argument("--por-pagina", type=int, default=20)
+
+    sk = rsub.add_parser("stock", help="estoque esperado: última contagem menos o consumo teórico")
+    sk.add_argument("--ate", metavar="AAAA-MM-DD", help="padrão: hoje")
+    sk.add_argument("--pagina", type=int, help="mostra só esta página (1, 2, ...)")
+    sk.add_argument("--por-pagina", type=int, default=20)
+
+    ct = sub.add_parser("contagem", help="registra a contagem física de estoque de um insumo")
+    ct.add_argument("insumo")
+    ct.add_argument("qtd", type=transferencia.numero)
+    ct.add_argument("--data", help="dia da contagem, ao fim do dia (padrão: hoje)")
+
+    pz = sub.add_parser("prazo", help="define o horário-limite dos itens de um modelo (análise por item)")
+    pz.add_argument("template", help="nome do modelo ou seu número na listagem")
+    pz.add_argument("hora", nargs="?", metavar="HH:MM", help="omita para remover o prazo")
+
+    bt = sub.add_parser("batch", help="executa vários comandos (um por linha) no mesmo processo")
+    bt.add_argument("arquivo", nargs="?", default="-", help="arquivo de comandos ou - para stdin")
+
+    sv = sub.add_parser("serve", help="API HTTP/JSON para tablets (até Ctrl+C)")
+    sv.add_argument("--host", default="127.0.0.1", help="use 0.0.0.0 para aceitar a rede local")
+    sv.add_argument("--port", type=int, default=8080)
+
+    ev = sub.add_parser("eventos", help="eventos gravados (itens marcados, checklists, preços)")
+    ev.add_argument("--seguir", action="store_true", help="continua mostrando os novos (até Ctrl+C)")
+    ev.add_argument("--novos", action="store_true", help="só os gravados a partir de agora")
+
+    lj = sub.add_parser("lojas", help="lojas com checklists próprios")
+    ljsub = lj.add_subparsers(dest="acao", required=True)
+    ljsub.add_parser("listar", help="lojas cadastradas")
+    sep = ljsub.add_parser("separar", help="passa os checklists do banco único para uma loja")
+    sep.add_argument("nome")
+
+    cp = sub.add_parser("copias", help="cópias de segurança incrementais do banco, das lojas e do arquivo")
+    cpsub = cp.add_subparsers(dest="acao", required=True)
+    cr = cpsub.add_parser("criar", help="grava um instantâneo (só o que mudou desde as cópias anteriores)")
+    cr.add_argument("--podar", action="store_true", help="aplica a retenção depois de copiar")
+    cpsub.add_parser("listar", help="instantâneos gravados")
+    vf = cpsub.add_parser("verificar", help="relê as cópias conferindo o hash de cada pedaço")
+    vf.add_argument("copia", nargs="?", help="id ou momento (padrão: todas)")
+    rs = cpsub.add_parser("restaurar", help="recria o banco de um instantâneo numa pasta vazia")
+    rs.add_argument("copia", help="id ou momento AAAA-MM-DD[THH:MM] (o último instantâneo até ele)")
+    rs.add_argument("destino", help="pasta onde recriar os arquivos")
+    for p in (cr, cpsub.add_parser("podar", help="apaga instantâneos fora da retenção e pedaços sem uso")):
+        p.add_argument("--horas", type=int, default=copias.HORAS, help="últimas N horas com cópia (uma por hora)")
+        p.add_argument("--dias", type=int, default=copias.DIAS, help="últimos N dias com cópia (uma por dia)")
+        p.add_argument("--meses", type=int, default=copias.MESES, help="últimos N meses com cópia (uma por mês)")
+
+    pf = sub.add_parser("perfil", help="percentis das operações medidas com --perfil/DOGFLOW_PERFIL")
+    pf.add_argument("arquivo", nargs="?", help="padrão: <banco>.perfil.jsonl")
+
+    imp = sub.add_parser("importar", help="importa insumos, fichas, templates ou vendas do PDV")
+    imp.add_argument("entidade", choices=["insumos", "fichas", "templates", "vendas"])
+    imp.add_argument("arquivo", help="arquivo .csv/.json/.jsonl ou - para stdin")
+    imp.add_argument("--formato", choices=transferencia.FORMATOS)
+    imp.add_argument("--rejeitados", metavar="ARQ", help="grava as linhas recusadas em CSV")
+
+    exp = sub.add_parser("exportar", help="exporta dados (checklists = histórico por item; itens = análise)")
+    exp.add_argument("entidade", choices=["insumos", "fichas", "templates", "checklists", "itens"])
+    exp.add_argument("arquivo", help="arquivo .csv/.json/.jsonl ou - para stdout")
+    exp.add_argument("--formato", choices=transferencia.FORMATOS)
+    return parser
+
+
+def _emitir(args, dados, texto):
+    if args.json:
+        print(json.dumps(dados, ensure_ascii=False))
+    else:
+        print(texto)
+
+
+def _resumo(reg) -> dict:
+    done, total, pct = negocio.checklist_progress(reg)
+    return {"data": reg["data"], "template": reg["template"], "done": done, "total": total, "pct": pct}
+
+
+def _linhas_itens(reg):
+    for i, it in enumerate(negocio.itens_do_checklist(reg), start=1):
+        ts = f" [{it['timestamp']}]" if it["timestamp"] else ""
+        yield f"  {i:02d}. {'x' if it['done'] else ' '} {it['nome']}{ts}"
+
+
+# ------------------------- COMANDOS ------------------------- #
+def cmd_start(args) -> int:
+    nome = negocio.resolver_template(args.template)
+    reg = negocio.get_or_create_checklist(args.data or negocio.today_str(), nome)
+    r = _resumo(reg)
+    _emitir(args, r, f"{r['data']} | {r['template']} | {r['done']}/{r['total']} ({r['pct']}%)")
+    return 0
+
+
+def cmd_toggle(args) -> int:
+    nome = negocio.resolver_template(args.template)
+    reg = negocio.alternar_itens(nome, args.itens, args.data)
+    r = _resumo(reg)
+    r["itens"] = {n: negocio.item_feito(reg, n) for n in args.itens}
+    marcados = ", ".join(f"{n}={'x' if feito else ' '}" for n, feito in r["itens"].items())
+    _emitir(args, r, f"{r['template']} | {marcados} | {r['done']}/{r['total']} ({r['pct']}%)")
+    return 0
+
+
+def cmd_status(args) -> int:
+    registros = negocio.checklists_do_dia(args.data)
+    dados = []
+    linhas = []
+    for reg in registros:
+        r = _resumo(reg)
+        if args.itens:
+            r["itens"] = negocio.itens_do_checklist(reg)
+        dados.append(r)
+        linhas.append(f"{r['template']:<36} {r['done']:3d}/{r['total']:<3d} {r['pct']:3d}%")
+        if args.itens:
+            linhas.extend(_linhas_itens(reg))
+    _emitir(args, dados, "\n".join(linhas) or "Nenhum checklist iniciado.")
+    return 0
+
+
+def cmd_set_price(args) -> int:
+    custo, preco = negocio.ajustar_preco(args.produto, preco=args.preco, margem=args.margem)
+    margem = round((preco - custo) / preco * 100, 2) if preco else 0
+    _emitir(
+        args,
+        {"produto": args.produto, "custo": custo, "preco": preco, "margem": margem},
+        f"{args.produto}: custo {negocio.money(custo)} | preço {negocio.money(preco)} | margem {margem:.2f}%",
+    )
+    return 0
+
+
+def _linha_relatorio(relatorio, r) -> str:
+    if relatorio == "history":
+        return f"{r['data']} | {r['template']:<30} | {r['done']:02d}/{r['total']:02d} => {r['pct']:3d}%"
+    if relatorio == "items":
+        return linha_analise(r)
+    if relatorio in ("sales", "daily-sales"):
+        return linha_vendas(r.get("produto") or r.get("data") or "TOTAL", r)
+    if relatorio == "stock":
+        esperado = f"{r['esperado']:>10g}" if r["esperado"] is not None else f"{'--':>10}"
+        contagem = f"{r['contagem']:g} em {r['contado_em']}" if r["contado_em"] else "sem contagem"
+        return (
+            f"{r['insumo'][:30]:<30} {r['unidade']:<4} | esperado {esperado}"
+            f" | consumo {r['consumo']:>10g} | {contagem}"
+        )
+    return (
+        f"{r['loja' if relatorio == 'stores' else 'periodo']:<8} | {r['template']:<30}"
+        f" | {r['completos']:>3}/{r['checklists']:<3} completos"
+        f" | itens {r['done']:>4}/{r['total']:<4} => {r['pct']:3d}%"
+    )
+
+
+def linha_analise(r) -> str:
+    atraso = f" | atraso {r['pct_atraso']:3d}% (+{r['atraso_medio_min']:g} min)" if r["prazo"] else ""
+    return (
+        f"{r['template'][:24]:<24} {r['n']:02d}. {r['item'][:40]:<40} | feito {r['pct']:3d}%"
+        f" | pendente {r['pendentes']:>4}x | mediana {r['mediana'] or '--:--'} p90 {r['p90'] or '--:--'}{atraso}"
+    )
+
+
+def _pct(v) -> str:
+    return f"{v:6.2f}%" if v is not None else "     --"
+
+
+def linha_vendas(rotulo, r) -> str:
+    return (
+        f"{rotulo[:30]:<30} | qtd {r['qtd']:>8g} | receita {negocio.money(r['receita']):>14}"
+        f" | custo {negocio.money(r['custo']):>14} | margem {_pct(r['margem_pct'])}"
+        f" | food cost {_pct(r['food_cost_pct'])}"
+    )
+
+
+def cmd_report(args) -> int:
+    if args.relatorio == "items":
+        template = negocio.resolver_template(args.template) if args.template else None
+        linhas = negocio.estatisticas_itens(template, args.ordem, args.refazer)
+    elif args.relatorio == "history":
+        campos = ("data", "template", "done", "total", "pct")
+        linhas = (dict(zip(campos, h)) for h in negocio.historico_execucao(args.de, args.ate))
+    elif args.relatorio == "stores":
+        linhas = negocio.conformidade_por_loja(args.de, args.ate)
+    elif args.relatorio in ("sales", "daily-sales"):
+        por = negocio.vendas_por_produto if args.relatorio == "sales" else negocio.vendas_por_dia
+        linhas = por(args.de, args.ate)
+        if linhas and not args.pagina:
+            linhas.append(negocio.total_de_vendas(linhas))
+    elif args.relatorio == "stock":
+        linhas = negocio.estoque_esperado(args.ate)
+    else:
+        agrupamento = "semana" if args.relatorio == "weekly" else "mes"
+        linhas = negocio.conformidade(agrupamento, args.de, args.ate)
+    rodape = None
+    if args.pagina:
+        linhas, paginas = negocio.paginar(linhas, args.pagina, args.por_pagina)
+        rodape = f"página {min(args.pagina, paginas)}/{paginas}"
+    vazio = True
+    for r in linhas:
+        vazio = False
+        print(json.dumps(r, ensure_ascii=False) if args.json else _linha_relatorio(args.relatorio, r))
+    if args.json:
+        return 0
+    if vazio:
+        print("Sem dados.")
+    elif rodape:
+        print(f"-- {rodape}")
+    return 0
+
+
+def cmd_contagem(args) -> int:
+    negocio.registrar_contagem(args.insumo, args.qtd, args.data)
+    dia = args.data or negocio.today_str()
+    _emitir(args, {"insumo": args.insumo, "qtd": args.qtd, "data": dia}, f"{args.insumo}: {args.qtd:g} em {dia}")
+    return 0
+
+
+def cmd_prazo(args) -> int:
+    nome = negocio.resolver_template(args.template)
+    negocio.definir_prazo(nome, args.hora)
+    _emitir(args, {"template": nome, "prazo": args.hora}, f"{nome}: prazo {args.hora or 'removido'}")
+    return 0
+
+
+def cmd_lojas(args) -> int:
+    if args.acao == "separar":
+        n = negocio.separar_loja(args.nome)
+        _emitir(args, {"loja": args.nome, "checklists": n}, f"{n} checklist(s) passados para a loja {args.nome}.")
+        return 0
+    nomes = negocio.lojas_cadastradas()
+    _emitir(args, nomes, "\n".join(nomes) or "Nenhuma loja cadastrada.")
+    return 0
+
+
+def _tamanho(n: int) -> str:
+    for unidade in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unidade}" if unidade == "B" else f"{n:.1f} {unidade}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def cmd_copias(args) -> int:
+    repo = copias.RepositorioCopias(negocio.DB_PATH)
+    if args.acao == "criar":
+        m = repo.criar()
+        dados = {"id": m["id"], "objetos_novos": m["objetos_novos"], "bytes_novos": m["bytes_novos"]}
+        texto = f"Cópia {m['id']}: {m['objetos_novos']} pedaço(s) novo(s), {_tamanho(m['bytes_novos'])}."
+        if args.podar:
+            n, objetos, liberados = repo.podar(args.horas, args.dias, args.meses)
+            dados["podados"] = {"copias": n, "objetos": objetos, "bytes": liberados}
+            texto += f" Retenção: {n} cópia(s) e {objetos} pedaço(s) apagados ({_tamanho(liberados)})."
+        _emitir(args, dados, texto)
+    elif args.acao == "listar":
+        linhas = repo.listar()
+        _emitir(args, linhas, "\n".join(
+            f"{r['id']}  {r['bancos']} banco(s), {r['arquivos']} mês(es) arquivado(s)"
+            f"  | novos: {r['objetos_novos']} pedaço(s), {_tamanho(r['bytes_novos'])}"
+            for r in linhas
+        ) or "Nenhuma cópia.")
+    elif args.acao == "verificar":
+        n, objetos, problemas = repo.verificar(args.copia)
+        _emitir(
+            args, {"copias": n, "objetos": objetos, "problemas": problemas},
+            "\n".join([f"{n} cópia(s), {objetos} objeto(s) conferido(s), {len(problemas)} problema(s)."] + problemas),
+        )
+        return 1 if problemas else 0
+    elif args.acao == "restaurar":
+        m = repo.restaurar(args.copia, args.destino)
+        arquivos = len(m["bancos"]) + len(m["arquivos"])
+        texto = f"Cópia {m['id']} restaurada em {args.destino} ({arquivos} arquivo(s))."
+        _emitir(args, {"id": m["id"], "arquivos": arquivos}, texto)
+    else:
+        n, objetos, liberados = repo.podar(args.horas, args.dias, args.meses)
+        _emitir(
+            args, {"copias": n, "objetos": objetos, "bytes": liberados},
+            f"{n} cópia(s) e {objetos} pedaço(s) apagados ({_tamanho(liberados)}).",
+        )
+    return 0
+
+
+def cmd_perfil(args) -> int:
+    caminho = args.arquivo or instrumentacao.caminho_perfil(negocio.DB_PATH)
+    sessoes, linhas = instrumentacao.resumir(caminho)
+    if args.json:
+        print(json.dumps({"sessoes": sessoes, "operacoes": linhas}, ensure_ascii=False))
+        return 0
+    print(f"{sessoes} sessão(ões) em {caminho}")
+    colunas = ("n", "p50 ms", "p95 ms", "p99 ms", "máx ms", "docs", "bytes")
+    print(f"{'operação':<36} " + " ".join(f"{c:>{11 if c == 'bytes' else 9}}" for c in colunas))
+    for nome, r in linhas.items():
+        print(
+            f"{nome:<36} {r['n']:>9} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f}"
+            f" {r['max_ms']:>9.3f} {r['docs']:>9} {r['bytes']:>11}"
+        )
+    return 0
+
+
+def cmd_importar(args) -> int:
+    inseridos, atualizados, rejeitados = negocio.importar_arquivo(args.entidade, args.arquivo, args.formato)
+    if args.entidade == "vendas":
+        dados = {"vendas": inseridos, "agregados": atualizados, "rejeitados": len(rejeitados)}
+        texto = f"{inseridos} venda(s) em {atualizados} total(is) por dia e produto, {len(rejeitados)} rejeitada(s)."
+    else:
+        dados = {"inseridos": inseridos, "atualizados": atualizados, "rejeitados": len(rejeitados)}
+        texto = f"{inseridos} inserido(s), {atualizados} atualizado(s), {len(rejeitados)} rejeitado(s)."
+    _emitir(args, dados, texto)
+    for linha, motivo, _ in rejeitados[:20]:
+        print(f"  linha {linha if linha is not None else '—'}: {motivo}", file=sys.stderr)
+    if args.rejeitados and rejeitados:
+        rejeitados.gravar(args.rejeitados)
+    return 1 if rejeitados else 0
+
+
+def cmd_exportar(args) -> int:
+    total = negocio.exportar_arquivo(args.entidade, args.arquivo, args.formato)
+    if args.arquivo != "-":
+        _emitir(args, {"linhas": total}, f"{total} linha(s) exportada(s) para {args.arquivo}.")
+    return 0
+
+
+def cmd_batch(args) -> int:
+    """Cada linha é um comando (ex.: `toggle 1 3 5`); # inicia comentário."""
+    fh = sys.stdin if args.arquivo == "-" else open(args.arquivo, encoding="utf-8")
+    pior = 0
+    try:
+        for n, linha in enumerate(fh, start=1):
+            argv = shlex.split(linha, comments=True)
+            if not argv:
+                continue
+            if args.json:
+                argv = ["--json"] + argv
+            pior = max(pior, executar(argv, prog=f"batch:{n}", em_lote=True))
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+    return pior
+
+
+def _linha_evento(ev) -> str:
+    if ev["tipo"] == "item_alternado":
+        marca = "✔" if ev["done"] else "□"
+        detalhe = f"{ev['template']} | {ev['n']:02d}. {marca} {ev['item']} | {ev['feitos']}/{ev['total']}"
+    elif ev["tipo"] == "checklist_criado":
+        detalhe = f"{ev['template']} | {ev['data']} | {ev['total']} itens"
+    elif ev["tipo"] == "preco_alterado":
+        detalhe = f"{ev['produto']} | {negocio.money(ev['preco'])} (custo {negocio.money(ev['custo'])})"
+    else:
+        detalhe = ""
+    return f"{ev['em']} {ev['tipo']:<16} {detalhe}"
+
+
+def cmd_eventos(args) -> int:
+    leitor = negocio.leitor_eventos(do_inicio=not args.novos)
+    try:
+        while True:
+            for ev in leitor.novos():
+                print(json.dumps(ev, ensure_ascii=False) if args.json else _linha_evento(ev), flush=True)
+            if not args.seguir:
+                return 0
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        return 0
+
+
+def cmd_serve(args) -> int:
+    from dogflow import servico  # asyncio só é carregado neste modo
+
+    servico.servir(args.host, args.port)
+    return 0
+
+
+COMANDOS = {
+    "start": cmd_start,
+    "toggle": cmd_toggle,
+    "status": cmd_status,
+    "set-price": cmd_set_price,
+    "report": cmd_report,
+    "batch": cmd_batch,
+    "serve": cmd_serve,
+    "eventos": cmd_eventos,
+    "lojas": cmd_lojas,
+    "prazo": cmd_prazo,
+    "contagem": cmd_contagem,
+    "perfil": cmd_perfil,
+    "copias": cmd_copias,
+    "importar": cmd_importar,
+    "exportar": cmd_exportar,
+}
+
+
+def executar(argv, prog: str = "dogflow", em_lote: bool = False) -> int:
+    """Executa um comando; retorna o código de saída (0 ok, 1 rejeições, 2 erro).
+
+    `em_lote` indica uma linha de `batch`: a inicialização já foi feita,
+    a menos que a linha troque de banco ou de loja.
+    """
+    try:
+        args = _parser(prog).parse_args(argv)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 2
+    if em_lote and (args.comando in ("batch", "serve") or getattr(args, "seguir", False)):
+        print(f"{prog}: {args.comando} não pode ser usado dentro de batch", file=sys.stderr)
+        return 2
+    trocou = False
+    if args.db and args.db != negocio.DB_PATH:
+        negocio.configurar(path=args.db)
+        trocou = True
+    if args.loja and args.loja != negocio.LOJA:
+        negocio.configurar(loja=args.loja)
+        trocou = True
+    if not em_lote and instrumentacao.ativar_pelo_ambiente(args.perfil, args.cprofile):
+        instrumentacao.instrumentar(COMANDOS, list(COMANDOS), "cli.")
+        instrumentacao.instrumentar(vars(negocio), ["inicializar"], "inicio.")
+    try:
+        if (trocou or not em_lote) and args.comando not in ("perfil", "copias"):
+            negocio.inicializar()
+        return COMANDOS[args.comando](args)
+    except (OSError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+
+
+def main(argv=None, prog: str = "dogflow") -> int:
+    try:
+        return executar(sys.argv[1:] if argv is None else argv, prog)
+    finally:
+        negocio.fechar()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,447 @@
+"""Cópias de segurança incrementais: pedaços comprimidos endereçados pelo conteúdo.
+
+`RepositorioCopias` guarda instantâneos do catálogo, dos bancos das lojas e
+dos arquivos mensais de checklists em `<banco>.copias/`:
+
+    buffet_db.json.copias/
+        objetos/3f/a9c1...          pedaços comprimidos (zlib); o nome é o hash do conteúdo
+        20261018T150000.json        um manifesto por instantâneo
+
+Cada tabela é dividida em partições — para os documentos com `data`, uma
+por dia do mês atual e do anterior e uma por mês antes disso; para os
+demais, uma por faixa de `TAMANHO_FAIXA` doc_ids — e cada partição vira um
+pedaço, gravado só se ainda não existe (um mês fechado vira um pedaço só
+uma vez, quando sai da janela de dias). As partições são
+listadas em árvores por mês (ou "ids"), e cada tabela aponta para as
+árvores dos seus meses; as árvores também são objetos. Numa cópia de hora
+em hora, então, o que se grava é a partição de hoje, as árvores no caminho
+até ela e o manifesto. Bancos e meses arquivados cujo arquivo não mudou
+(mesma assinatura de `stat` da cópia anterior) nem são lidos.
+
+Cada banco é lido dentro de uma transação (com a trava dos terminais), mas
+bancos diferentes (catálogo e lojas) são lidos um após o outro. O log de
+eventos e o cache da análise por item não entram na cópia.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import zlib
+from datetime import date, datetime, timedelta
+
+from dogflow import lojas
+from dogflow.arquivo import PADRAO_MES, caminho_arquivo
+from dogflow.journal import caminho_journal
+from dogflow.storage import (
+    EXTENSOES_SQLITE,
+    BancoSQLite,
+    Documento,
+    TravaArquivo,
+    abrir_banco,
+    assinatura_arquivo,
+    gravar_tabelas,
+)
+
+FORMATO = 1
+TAMANHO_FAIXA = 256
+NIVEL_ZLIB = 6
+PADRAO_ID = re.compile(r"^\d{8}T\d{6}(-\d+)?$")
+
+# Retenção padrão: o último instantâneo de cada hora, dia e mês.
+HORAS = 48
+DIAS = 30
+MESES = 12
+
+
+def caminho_copias(path_banco: str) -> str:
+    return path_banco + ".copias"
+
+
+def _canonico(valor) -> bytes:
+    return json.dumps(valor, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _hash(dados: bytes) -> str:
+    return hashlib.blake2b(dados, digest_size=20).hexdigest()
+
+
+def _corte(hoje: date) -> str:
+    """Primeiro dia do mês anterior: daí em diante, uma partição por dia."""
+    return (hoje.replace(day=1) - timedelta(days=1)).replace(day=1).isoformat()
+
+
+def _particao(doc_id: int, doc, corte: str) -> str:
+    data = doc.get("data")
+    if isinstance(data, str) and len(data) >= 10 and data[4:5] == "-":
+        return data[:10] if data[:10] >= corte else data[:7]
+    return f"ids-{doc_id // TAMANHO_FAIXA:06d}"
+
+
+def _grupo(particao: str) -> str:
+    return "ids" if particao.startswith("ids-") else particao[:7]
+
+
+def _assinaturas(caminho: str):
+    """Assinaturas do banco e dos arquivos que completam o seu conteúdo (WAL, journal)."""
+    return [
+        list(a) if a else None
+        for a in map(assinatura_arquivo, (caminho, caminho + "-wal", caminho_journal(caminho)))
+    ]
+
+
+def _gravar_atomico(caminho: str, dados: bytes):
+    fd, tmp = tempfile.mkstemp(prefix=".dogflow-", suffix=".tmp", dir=os.path.dirname(caminho))
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(dados)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, caminho)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _gravar_banco(caminho: str, tabelas):
+    """Cria o banco `caminho` (backend pela extensão) com {tabela: [(doc_id, doc)]}."""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    if caminho.lower().endswith(EXTENSOES_SQLITE):
+        banco = BancoSQLite(caminho)
+        try:
+            with banco.transacao():
+                for nome, docs in tabelas.items():
+                    tabela = banco.table(nome)
+                    for doc_id, doc in docs:
+                        tabela.insert(Documento(doc, doc_id))
+        finally:
+            banco.close()
+        return
+    pares = ((nome, {str(doc_id): doc for doc_id, doc in docs}) for nome, docs in tabelas.items())
+    fd, tmp = tempfile.mkstemp(prefix=".dogflow-", suffix=".tmp", dir=os.path.dirname(caminho))
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            gravar_tabelas(fh, pares)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, caminho)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class RepositorioCopias:
+    """Instantâneos do banco `path_banco` (e das suas lojas) em `<banco>.copias/`."""
+
+    def __init__(self, path_banco: str):
+        self.path_banco = path_banco
+        self.base = os.path.dirname(os.path.abspath(path_banco))
+        self.pasta = caminho_copias(path_banco)
+        self.objetos = os.path.join(self.pasta, "objetos")
+        self.trava = TravaArquivo(os.path.join(self.pasta, ".lock"))
+        self._novos = self._bytes_novos = 0
+
+    # -- objetos -- #
+    def _caminho_objeto(self, h: str) -> str:
+        return os.path.join(self.objetos, h[:2], h[2:])
+
+    def _guardar(self, dados: bytes) -> str:
+        """Grava o objeto, se ainda não existe; retorna o hash."""
+        h = _hash(dados)
+        caminho = self._caminho_objeto(h)
+        if not os.path.exists(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            comprimido = zlib.compress(dados, NIVEL_ZLIB)
+            _gravar_atomico(caminho, comprimido)
+            self._novos += 1
+            self._bytes_novos += len(comprimido)
+        return h
+
+    def ler_objeto(self, h: str) -> bytes:
+        """Conteúdo do objeto `h`; ValueError se falta ou não confere com o hash."""
+        try:
+            with open(self._caminho_objeto(h), "rb") as fh:
+                d = zlib.decompressobj()
+                dados = d.decompress(fh.read())
+        except FileNotFoundError:
+            raise ValueError(f"Objeto {h} não encontrado.") from None
+        except zlib.error:
+            raise ValueError(f"Objeto {h} corrompido.") from None
+        # Bytes depois do fim do fluxo zlib também são corrupção.
+        if not d.eof or d.unused_data or _hash(dados) != h:
+            raise ValueError(f"Objeto {h} corrompido.")
+        return dados
+
+    # -- manifestos -- #
+    def _caminho_manifesto(self, id_copia: str) -> str:
+        return os.path.join(self.pasta, id_copia + ".json")
+
+    def ids(self):
+        """Instantâneos existentes, do mais antigo ao mais recente; só lista a pasta."""
+        if not os.path.isdir(self.pasta):
+            return []
+        nomes = (n[:-5] for n in os.listdir(self.pasta) if n.endswith(".json"))
+        return sorted(n for n in nomes if PADRAO_ID.match(n))
+
+    def manifesto(self, id_copia: str) -> dict:
+        try:
+            with open(self._caminho_manifesto(id_copia), encoding="utf-8") as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            raise ValueError(f"Cópia '{id_copia}' não existe.") from None
+        except ValueError:
+            raise ValueError(f"Manifesto da cópia '{id_copia}' corrompido.") from None
+
+    def listar(self):
+        """Resumo de cada instantâneo: id, em, bancos, objetos e bytes novos."""
+        linhas = []
+        for i in self.ids():
+            m = self.manifesto(i)
+            linhas.append({
+                "id": i, "em": m["em"], "bancos": len(m["bancos"]), "arquivos": len(m["arquivos"]),
+                "objetos_novos": m["objetos_novos"], "bytes_novos": m["bytes_novos"],
+            })
+        return linhas
+
+    def escolher(self, alvo: str) -> str:
+        """Id do instantâneo `alvo` ou, para um momento ('AAAA-MM-DD[THH:MM]'), o último até ele."""
+        if PADRAO_ID.match(alvo):
+            self.manifesto(alvo)  # valida
+            return alvo
+        try:
+            momento = datetime.fromisoformat(alvo)
+        except ValueError:
+            raise ValueError(f"Use o id da cópia ou AAAA-MM-DD[THH:MM] (recebido: '{alvo}').") from None
+        # Sem segundos (ou sem hora), vale o minuto (ou o dia) inteiro.
+        if len(alvo) == 10:
+            momento = momento.replace(hour=23, minute=59, second=59)
+        elif len(alvo) == 16:
+            momento = momento.replace(second=59)
+        limite = momento.strftime("%Y%m%dT%H%M%S")
+        anteriores = [i for i in self.ids() if i[:15] <= limite]
+        if not anteriores:
+            raise ValueError(f"Nenhuma cópia até {alvo}.")
+        return anteriores[-1]
+
+    # -- criação -- #
+    def _bancos(self):
+        """(caminho relativo, caminho) do catálogo e do banco de cada loja."""
+        yield os.path.basename(self.path_banco), self.path_banco
+        for loja in lojas.listar_lojas(self.path_banco):
+            caminho = lojas.caminho_loja(self.path_banco, loja)
+            yield os.path.relpath(caminho, self.base), caminho
+
+    def _copiar_banco(self, caminho: str) -> dict:
+        """{tabela: hash da árvore da tabela}, lendo o banco numa transação."""
+        corte = _corte(date.today())
+        banco = abrir_banco(caminho, somente_leitura=True)
+        try:
+            arvore = {}
+            with banco.transacao():
+                for nome in banco.tabelas():
+                    particoes = {}
+                    for doc in banco.table(nome):
+                        particoes.setdefault(_particao(doc.doc_id, doc, corte), []).append([doc.doc_id, doc])
+                    grupos = {}
+                    for p, docs in particoes.items():
+                        docs.sort(key=lambda par: par[0])
+                        grupos.setdefault(_grupo(p), {})[p] = self._guardar(_canonico(docs))
+                    arvore[nome] = self._guardar(
+                        _canonico({g: self._guardar(_canonico(ps)) for g, ps in grupos.items()})
+                    )
+            return arvore
+        finally:
+            banco.close()
+
+    def _copiar_arquivo_mensal(self, caminho: str, anterior: dict) -> dict:
+        """{caminho relativo: {hash, assinatura}} dos meses arquivados do banco."""
+        pasta = caminho_arquivo(caminho)
+        if not os.path.isdir(pasta):
+            return {}
+        copiados = {}
+        for nome in sorted(os.listdir(pasta)):
+            if not PADRAO_MES.match(nome):
+                continue
+            arq = os.path.join(pasta, nome)
+            rel = os.path.relpath(arq, self.base)
+            assinatura = list(assinatura_arquivo(arq) or ())
+            antes = anterior.get(rel)
+            if antes and antes["assinatura"] == assinatura:
+                copiados[rel] = antes
+                continue
+            with open(arq, "rb") as fh:
+                copiados[rel] = {"hash": self._guardar(fh.read()), "assinatura": assinatura}
+        return copiados
+
+    def _novo_id(self) -> str:
+        base = datetime.now().strftime("%Y%m%dT%H%M%S")
+        id_copia, n = base, 1
+        while os.path.exists(self._caminho_manifesto(id_copia)):
+            n += 1
+            id_copia = f"{base}-{n}"
+        return id_copia
+
+    def criar(self) -> dict:
+        """Grava um instantâneo e retorna o seu manifesto.
+
+        Só os pedaços que ainda não existem no repositório são gravados
+        (`objetos_novos`, `bytes_novos` no manifesto).
+        """
+        if not os.path.exists(self.path_banco) and not os.path.exists(caminho_journal(self.path_banco)):
+            raise ValueError(f"Banco não encontrado: {self.path_banco}")
+        os.makedirs(self.objetos, exist_ok=True)
+        with self.trava():
+            ids = self.ids()
+            anterior = self.manifesto(ids[-1]) if ids else {"bancos": {}, "arquivos": {}}
+            self._novos = self._bytes_novos = 0
+            bancos, arquivos = {}, {}
+            for rel, caminho in self._bancos():
+                # A assinatura é tirada antes da leitura: uma gravação no meio só
+                # faz a próxima cópia ler o banco de novo.
+                assinatura = _assinaturas(caminho)
+                antes = anterior["bancos"].get(rel)
+                if antes and antes["assinatura"] == assinatura:
+                    bancos[rel] = antes
+                else:
+                    bancos[rel] = {"assinatura": assinatura, "tabelas": self._copiar_banco(caminho)}
+                arquivos.update(self._copiar_arquivo_mensal(caminho, anterior["arquivos"]))
+            id_copia = self._novo_id()
+            manifesto = {
+                "formato": FORMATO,
+                "id": id_copia,
+                "em": datetime.now().isoformat(timespec="seconds"),
+                "bancos": bancos,
+                "arquivos": arquivos,
+                "objetos_novos": self._novos,
+                "bytes_novos": self._bytes_novos,
+            }
+            corpo = json.dumps(manifesto, ensure_ascii=False).encode("utf-8")
+            _gravar_atomico(self._caminho_manifesto(id_copia), corpo)
+        return manifesto
+
+    # -- leitura -- #
+    def _arvore(self, h: str) -> dict:
+        return json.loads(self.ler_objeto(h))
+
+    def _docs_da_tabela(self, h: str):
+        grupos = self._arvore(h)
+        for g in sorted(grupos):
+            particoes = self._arvore(grupos[g])
+            for p in sorted(particoes):
+                for doc_id, doc in json.loads(self.ler_objeto(particoes[p])):
+                    yield doc_id, doc
+
+    def restaurar(self, alvo: str, destino: str) -> dict:
+        """Recria em `destino` o catálogo, as lojas e os meses arquivados do instantâneo.
+
+        `alvo` é um id ou um momento (ver `escolher`). Os caminhos dentro de
+        `destino` são os mesmos ao lado do banco original, e nenhum arquivo
+        existente é sobrescrito. Cada objeto lido tem o hash conferido; se
+        algum falha, os arquivos já recriados são apagados. Retorna o
+        manifesto restaurado.
+        """
+        manifesto = self.manifesto(self.escolher(alvo))
+        alvos = [os.path.join(destino, rel) for rel in list(manifesto["bancos"]) + list(manifesto["arquivos"])]
+        existentes = [a for a in alvos if os.path.exists(a)]
+        if existentes:
+            raise ValueError(f"Já existe: {existentes[0]} (restaure numa pasta vazia).")
+        try:
+            for rel, info in manifesto["bancos"].items():
+                tabelas = {nome: self._docs_da_tabela(h) for nome, h in info["tabelas"].items()}
+                _gravar_banco(os.path.join(destino, rel), tabelas)
+            for rel, info in manifesto["arquivos"].items():
+                caminho = os.path.join(destino, rel)
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                _gravar_atomico(caminho, self.ler_objeto(info["hash"]))
+        except BaseException:
+            # Um objeto faltando ou corrompido não deixa uma restauração pela metade.
+            for a in alvos:
+                if os.path.exists(a):
+                    os.remove(a)
+            raise
+        return manifesto
+
+    # -- verificação e retenção -- #
+    def _visitar(self, h, vistos, problemas, ler=True, arvore=False):
+        """Marca `h`; lido (e conferido) se `ler`. Devolve a árvore, se `arvore`."""
+        if h in vistos:
+            return None  # os filhos já foram visitados
+        vistos.add(h)
+        if not ler:
+            return None
+        try:
+            dados = self.ler_objeto(h)
+        except ValueError as e:
+            problemas.append(str(e))
+            return None
+        return json.loads(dados) if arvore else None
+
+    def _percorrer(self, manifesto, vistos, problemas, conferir: bool):
+        """Marca os objetos alcançáveis pelo manifesto; `conferir` relê também os pedaços."""
+        for info in manifesto["bancos"].values():
+            for h_tabela in info["tabelas"].values():
+                grupos = self._visitar(h_tabela, vistos, problemas, arvore=True) or {}
+                for h_grupo in grupos.values():
+                    particoes = self._visitar(h_grupo, vistos, problemas, arvore=True) or {}
+                    for h in particoes.values():
+                        self._visitar(h, vistos, problemas, ler=conferir)
+        for info in manifesto["arquivos"].values():
+            self._visitar(info["hash"], vistos, problemas, ler=conferir)
+
+    def verificar(self, alvo: str = None):
+        """Relê os objetos de um instantâneo (ou de todos) conferindo o hash.
+
+        Retorna (instantâneos, objetos conferidos, problemas).
+        """
+        ids = [self.escolher(alvo)] if alvo else self.ids()
+        vistos, problemas = set(), []
+        for i in ids:
+            try:
+                manifesto = self.manifesto(i)
+            except ValueError as e:
+                problemas.append(str(e))
+                continue
+            antes = len(problemas)
+            self._percorrer(manifesto, vistos, problemas, conferir=True)
+            problemas[antes:] = [f"{i}: {p}" for p in problemas[antes:]]
+        return len(ids), len(vistos), problemas
+
+    def podar(self, horas: int = HORAS, dias: int = DIAS, meses: int = MESES):
+        """Apaga os instantâneos fora da retenção e os objetos que só eles usavam.
+
+        Ficam o mais recente de todos e o último de cada uma das `horas`
+        horas, `dias` dias e `meses` meses mais recentes que têm cópia.
+        Retorna (instantâneos apagados, objetos apagados, bytes liberados).
+        """
+        if not os.path.isdir(self.objetos):
+            return 0, 0, 0
+        with self.trava():
+            ids = self.ids()
+            manter = set(ids[-1:])
+            # Prefixo do id que define cada período: AAAAMMDDTHH, AAAAMMDD e AAAAMM.
+            for tamanho, n in ((11, horas), (8, dias), (6, meses)):
+                ultimos = {}
+                for i in ids:
+                    ultimos[i[:tamanho]] = i
+                if n > 0:
+                    manter.update(ultimos[p] for p in sorted(ultimos)[-n:])
+            apagados = [i for i in ids if i not in manter]
+            for i in apagados:
+                os.remove(self._caminho_manifesto(i))
+            vistos = set()
+            for i in manter:
+                self._percorrer(self.manifesto(i), vistos, [], conferir=False)
+            objetos = liberados = 0
+            for prefixo in os.listdir(self.objetos):
+                sub = os.path.join(self.objetos, prefixo)
+                for nome in os.listdir(sub):
+                    if nome.startswith(".") or prefixo + nome in vistos:
+                        continue
+                    caminho = os.path.join(sub, nome)
+                    liberados += os.path.getsize(caminho)
+                    os.remove(caminho)
+                    objetos += 1
+        return len(apagados), objetos, liberados
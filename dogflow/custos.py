@@ -0,0 +1,120 @@
+"""Motor de custeio em lote: matriz insumo × ficha de quantidades.
+
+O custo de todas as fichas sai de um único produto matriz-vetor
+(quantidades × custo unitário dos insumos). Com NumPy a matriz fica em
+formato esparso (linha, coluna, quantidade) e o produto é um `bincount`;
+sem NumPy, o mesmo cálculo roda em Python puro.
+
+O motor não grava nada: `custos()` e `precos_por_margem()` aceitam um
+vetor de preços alternativo, o que permite simulações ("e se o pão subir
+10%?") sem tocar no banco.
+"""
+
+_np = None
+
+
+def carregar_numpy():
+    """NumPy, importado só no primeiro custeio em lote; None se não instalado.
+
+    O import custa dezenas de ms e não é necessário para abrir os menus.
+    """
+    global _np
+    if _np is None:
+        try:
+            import numpy
+        except ImportError:  # NumPy é opcional
+            numpy = False
+        _np = numpy
+    return _np or None
+
+
+def preco_por_margem(custo: float, margem: float) -> float:
+    """Preço de venda que dá a margem desejada (%) sobre o preço."""
+    if margem >= 100:
+        raise ValueError("A margem deve ser menor que 100%.")
+    return round(custo / (1 - margem / 100), 2)
+
+
+class MatrizCustos:
+    """Quantidades de cada insumo em cada ficha, prontas para custeio em lote.
+
+    `fichas` são documentos com `doc_id` e `ingredientes` ({insumo_id, qtd});
+    `custos_insumos` mapeia insumo_id → custo unitário atual.
+    """
+
+    def __init__(self, fichas, custos_insumos: dict, usar_numpy: bool = True):
+        np = carregar_numpy() if usar_numpy else None
+        self._np = np
+        self.usar_numpy = np is not None
+        self.fichas = list(fichas)
+        self.ficha_ids = [f.doc_id for f in self.fichas]
+        self.insumo_ids = list(custos_insumos)
+        self._coluna = {iid: j for j, iid in enumerate(self.insumo_ids)}
+        self._precos = [custos_insumos[i] for i in self.insumo_ids]
+
+        linhas, colunas, qtds = [], [], []
+        # Ingredientes sem insumo cadastrado (fichas antigas) entram como custo fixo.
+        self._fixo = [0.0] * len(self.fichas)
+        for i, ficha in enumerate(self.fichas):
+            for it in ficha["ingredientes"]:
+                j = self._coluna.get(it.get("insumo_id"))
+                if j is None:
+                    self._fixo[i] += it["qtd"] * it.get("custo_unit", 0.0)
+                else:
+                    linhas.append(i)
+                    colunas.append(j)
+                    qtds.append(it["qtd"])
+
+        if self.usar_numpy:
+            self._linhas = np.asarray(linhas, dtype=np.intp)
+            self._colunas = np.asarray(colunas, dtype=np.intp)
+            self._qtds = np.asarray(qtds, dtype=float)
+            self._fixo_np = np.asarray(self._fixo, dtype=float)
+        else:
+            # Por ficha: lista de (coluna, quantidade).
+            self._por_ficha = [[] for _ in self.fichas]
+            for i, j, q in zip(linhas, colunas, qtds):
+                self._por_ficha[i].append((j, q))
+
+    def vetor_precos(self, alteracoes: dict = None):
+        """Custos unitários atuais, com `alteracoes` {insumo_id: custo} aplicadas."""
+        precos = list(self._precos)
+        for iid, custo in (alteracoes or {}).items():
+            j = self._coluna.get(iid)
+            if j is not None:
+                precos[j] = custo
+        return precos
+
+    def custos(self, precos=None):
+        """Custo de todas as fichas (na ordem de `ficha_ids`), arredondado como
+        em `custo_da_ficha`."""
+        precos = self._precos if precos is None else precos
+        if self.usar_numpy:
+            np = self._np
+            p = np.asarray(precos, dtype=float)
+            brutos = np.bincount(
+                self._linhas, weights=self._qtds * p[self._colunas], minlength=len(self.fichas)
+            ) + self._fixo_np
+            return [round(float(c), 2) for c in brutos]
+        return [
+            round(fixo + sum(q * precos[j] for j, q in itens), 2)
+            for fixo, itens in zip(self._fixo, self._por_ficha)
+        ]
+
+    def precos_por_margem(self, margem: float, custos=None):
+        """Preço de venda de todas as fichas para a margem desejada (%)."""
+        custos = self.custos() if custos is None else custos
+        return [preco_por_margem(c, margem) for c in custos]
+
+    def simular(self, alteracoes: dict, margem: float = None):
+        """Compara custos atuais e simulados sem tocar no banco.
+
+        Retorna [(ficha, custo_atual, custo_simulado, preco_sugerido|None)].
+        """
+        atuais = self.custos()
+        simulados = self.custos(self.vetor_precos(alteracoes))
+        sugeridos = (
+            self.precos_por_margem(margem, simulados) if margem is not None
+            else [None] * len(simulados)
+        )
+        return list(zip(self.fichas, atuais, simulados, sugeridos))
@@ -0,0 +1,185 @@
+"""Eventos do DogFlow: barramento em processo, log em arquivo e painel ao vivo.
+
+As operações de `dogflow.negocio` publicam um evento depois de gravar:
+
+- `checklist_criado`: data, template, itens (nomes), total;
+- `item_alternado`: data, template, n, item, done, timestamp, feitos,
+  total, versao — um evento por item que mudou;
+- `preco_alterado`: produto, custo, preco, anterior.
+
+Todo evento leva também `seq` (no processo), `em` (data/hora) e `pid`.
+Assinantes em processo recebem os eventos pelo `barramento`; o
+`RegistroEventos` os acrescenta a `<banco>.eventos.jsonl` (uma linha JSON por
+evento), que outros processos acompanham com o `LeitorEventos` — ler o que
+há de novo custa um `stat` quando nada mudou. O `PainelDoDia` aplica os
+eventos ao progresso de um dia sem consultar o banco.
+"""
+
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+from dogflow.storage import TravaArquivo, caminho_trava
+
+
+def caminho_eventos(path_banco: str) -> str:
+    return path_banco + ".eventos.jsonl"
+
+
+# ------------------------- BARRAMENTO ------------------------- #
+class Barramento:
+    """Publica eventos para os assinantes do processo, na ordem de publicação."""
+
+    def __init__(self):
+        self._assinantes = []
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def assinar(self, fn):
+        """`fn(evento)` passa a receber os eventos; devolve `fn`."""
+        with self._lock:
+            self._assinantes.append(fn)
+        return fn
+
+    def cancelar(self, fn):
+        with self._lock:
+            if fn in self._assinantes:
+                self._assinantes.remove(fn)
+
+    def publicar(self, tipo: str, **dados) -> dict:
+        with self._lock:
+            self._seq += 1
+            evento = {
+                "seq": self._seq, "tipo": tipo,
+                "em": datetime.now().isoformat(timespec="seconds"), "pid": os.getpid(), **dados,
+            }
+            assinantes = list(self._assinantes)
+        for fn in assinantes:
+            try:
+                fn(evento)
+            except Exception as e:  # noqa: BLE001 — um assinante não derruba a gravação
+                print(f"dogflow: assinante de eventos falhou: {e!r}", file=sys.stderr)
+        return evento
+
+
+barramento = Barramento()
+
+
+# ------------------------- LOG EM ARQUIVO ------------------------- #
+class RegistroEventos:
+    """Assinante que acrescenta cada evento ao log (só acréscimo).
+
+    Cada linha é gravada de uma vez com a trava do log, então terminais
+    diferentes no mesmo compartilhamento não intercalam linhas.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._trava = TravaArquivo(caminho_trava(path))
+        self._fh = None
+
+    def __call__(self, evento: dict):
+        linha = (json.dumps(evento, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._trava():
+            if self._fh is None:
+                self._fh = open(self.path, "ab")
+            self._fh.write(linha)
+            self._fh.flush()
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        self._trava.close()
+
+
+class LeitorEventos:
+    """Acompanha o log de eventos a partir de uma posição (padrão: o fim atual)."""
+
+    def __init__(self, path: str, do_inicio: bool = False):
+        self.path = path
+        self._pos = 0 if do_inicio else self._tamanho()
+
+    def _tamanho(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def novos(self):
+        """Eventos gravados desde a última leitura; uma linha ainda incompleta fica para depois."""
+        tamanho = self._tamanho()
+        if tamanho == self._pos:
+            return []
+        if tamanho < self._pos:
+            self._pos = 0  # o log foi apagado ou recriado
+        with open(self.path, "rb") as fh:
+            fh.seek(self._pos)
+            bloco = fh.read(tamanho - self._pos)
+        fim = bloco.rfind(b"\n") + 1
+        self._pos += fim
+        eventos = []
+        for linha in bloco[:fim].splitlines():
+            try:
+                eventos.append(json.loads(linha))
+            except ValueError:
+                continue
+        return eventos
+
+
+# ------------------------- PAINEL ------------------------- #
+class PainelDoDia:
+    """Progresso dos checklists de um dia, atualizado por eventos.
+
+    Parte dos registros do dia (uma consulta) e depois só aplica eventos:
+    enquanto nada acontece, `atualizar()` custa um `stat` do log. Cada
+    evento de item traz a `versao` do checklist, então eventos repetidos ou
+    atrasados não desfazem um estado mais novo.
+    """
+
+    def __init__(self, dia: str, registros, leitor: LeitorEventos = None):
+        self.dia = dia
+        self.leitor = leitor
+        self._checklists = {}
+        for reg in registros:
+            self._checklists[reg["template"]] = {
+                "data": reg["data"], "template": reg["template"], "versao": reg.get("versao", 0),
+                "itens": [dict(it) for it in reg["itens"]],
+            }
+
+    def registros(self):
+        """Checklists do dia ordenados pelo modelo (mesmo formato do banco)."""
+        return [self._checklists[t] for t in sorted(self._checklists)]
+
+    def aplicar(self, evento: dict) -> bool:
+        """Aplica um evento; devolve True se o painel mudou."""
+        if evento.get("data") != self.dia:
+            return False
+        tipo, template = evento.get("tipo"), evento.get("template")
+        if tipo == "checklist_criado" and template not in self._checklists:
+            self._checklists[template] = {
+                "data": self.dia, "template": template, "versao": 0,
+                "itens": [{"nome": n, "done": False, "timestamp": None} for n in evento["itens"]],
+            }
+            return True
+        reg = self._checklists.get(template)
+        if tipo != "item_alternado" or reg is None or evento["versao"] < reg["versao"]:
+            return False
+        pos = evento["n"] - 1
+        if not 0 <= pos < len(reg["itens"]):
+            return False
+        reg["versao"] = evento["versao"]
+        item = reg["itens"][pos]
+        if (item["done"], item["timestamp"]) == (evento["done"], evento["timestamp"]):
+            return False
+        item["done"], item["timestamp"] = evento["done"], evento["timestamp"]
+        return True
+
+    def atualizar(self) -> bool:
+        """Lê os eventos novos do log; True se algum mudou o painel."""
+        mudou = False
+        for evento in self.leitor.novos() if self.leitor else ():
+            mudou = self.aplicar(evento) or mudou
+        return mudou
@@ -0,0 +1,250 @@
+"""Índices hash em memória para as buscas por chave das tabelas JSON.
+
+Cada índice mapeia a tupla de valores dos seus campos para os `doc_id` que a
+contêm, em ordem crescente — a mesma ordem em que o TinyDB devolveria o
+primeiro resultado de uma busca linear.
+
+`IndiceBusca` é diferente: atende buscas por trecho de nome (prefixo ou
+aproximadas, sem acento e sem caixa), como a escolha de insumos na ficha.
+"""
+
+import bisect
+import heapq
+import math
+import unicodedata
+
+# Índices mantidos por tabela: (data, template) → checklist, nome → insumo/template,
+# nome_prod → ficha, (nome, rev) → revisão de modelo. ("data",) atende a listagem
+# dos checklists de um dia.
+INDICES = {
+    "templates": [("nome",)],
+    "versoes_modelos": [("nome", "rev"), ("nome",)],
+    "checklists": [("data", "template"), ("data",)],
+    "insumos": [("nome",)],
+    "fichas": [("nome_prod",)],
+    "resumos": [("data", "template")],
+    "vendas_dia": [("data",)],
+    "lotes_vendas": [("lote",)],
+    "contagens": [("insumo_id", "data")],
+}
+
+
+class IndiceHash:
+    """Mapa `valores dos campos` → lista ordenada de doc_ids."""
+
+    def __init__(self, campos):
+        self.campos = tuple(campos)
+        self._mapa = {}
+
+    def chave(self, doc):
+        return tuple(doc.get(c) for c in self.campos)
+
+    def construir(self, docs):
+        """Reconstrói o índice a partir de pares (doc_id, documento)."""
+        self._mapa = {}
+        for doc_id, doc in sorted(docs, key=lambda par: par[0]):
+            self._mapa.setdefault(self.chave(doc), []).append(doc_id)
+
+    def adicionar(self, doc_id, doc):
+        ids = self._mapa.setdefault(self.chave(doc), [])
+        if not ids or ids[-1] < doc_id:
+            ids.append(doc_id)
+        elif doc_id not in ids:
+            ids.append(doc_id)
+            ids.sort()
+
+    def remover(self, doc_id, doc):
+        k = self.chave(doc)
+        ids = self._mapa.get(k)
+        if ids and doc_id in ids:
+            ids.remove(doc_id)
+            if not ids:
+                del self._mapa[k]
+
+    def buscar(self, campos: dict):
+        """doc_ids cujos campos são iguais a `campos` (na ordem do índice)."""
+        return self._mapa.get(tuple(campos[c] for c in self.campos), [])
+
+    def limpar(self):
+        self._mapa = {}
+
+    def __len__(self):
+        return len(self._mapa)
+
+
+def escolher_indice(indices, campos):
+    """Devolve o índice cujos campos são exatamente os da busca, se houver."""
+    alvo = set(campos)
+    for idx in indices:
+        if set(idx.campos) == alvo:
+            return idx
+    return None
+
+
+class IndiceReverso:
+    """Mapa `valor referenciado` → doc_ids que o referenciam (ex.: insumo → fichas).
+
+    `extrair(doc)` devolve os valores referenciados por um documento.
+    """
+
+    def __init__(self, extrair):
+        self._extrair = extrair
+        self._mapa = {}
+        self._por_doc = {}
+
+    def construir(self, docs):
+        self._mapa, self._por_doc = {}, {}
+        for doc_id, doc in docs:
+            self.atualizar(doc_id, doc)
+
+    def atualizar(self, doc_id, doc):
+        self.remover(doc_id)
+        refs = set(self._extrair(doc))
+        self._por_doc[doc_id] = refs
+        for ref in refs:
+            self._mapa.setdefault(ref, set()).add(doc_id)
+
+    def remover(self, doc_id):
+        for ref in self._por_doc.pop(doc_id, ()):
+            ids = self._mapa.get(ref)
+            if ids:
+                ids.discard(doc_id)
+                if not ids:
+                    del self._mapa[ref]
+
+    def buscar(self, ref):
+        return sorted(self._mapa.get(ref, ()))
+
+
+def dobrar(texto: str) -> str:
+    """Minúsculas, sem acentos e com espaços simples ('Pão  50G' → 'pao 50g')."""
+    sem_acento = "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+    return " ".join(sem_acento.casefold().split())
+
+
+def _trigramas(texto: str) -> set:
+    t = f" {texto} "
+    return {t[i:i + 3] for i in range(len(t) - 2)}
+
+
+class IndiceBusca:
+    """Busca por trecho de nome: prefixo do nome, prefixo de palavras e aproximada.
+
+    Os nomes ficam dobrados (`dobrar`) em duas listas ordenadas — nomes
+    inteiros e palavras — consultadas por bisseção, e num índice de
+    trigramas que só é usado quando os prefixos não completam o `limite`
+    (erros de digitação, ex.: 'slasicha').
+    """
+
+    SIMILARIDADE_MINIMA = 0.3
+
+    def __init__(self):
+        self._nomes = {}  # doc_id → nome dobrado
+        self._completos = []  # (nome, doc_id), em ordem
+        self._palavras = []  # (palavra, doc_id), em ordem
+        self._trigramas = {}  # trigrama → doc_ids
+
+    def construir(self, docs):
+        """`docs` são pares (doc_id, nome)."""
+        self._nomes = {doc_id: dobrar(nome) for doc_id, nome in docs}
+        self._completos = sorted((n, d) for d, n in self._nomes.items())
+        self._palavras = sorted((p, d) for d, n in self._nomes.items() for p in set(n.split()))
+        self._trigramas = {}
+        for doc_id, nome in self._nomes.items():
+            for t in _trigramas(nome):
+                self._trigramas.setdefault(t, set()).add(doc_id)
+
+    def atualizar(self, doc_id, nome: str):
+        self.remover(doc_id)
+        nome = self._nomes[doc_id] = dobrar(nome)
+        bisect.insort(self._completos, (nome, doc_id))
+        for p in set(nome.split()):
+            bisect.insort(self._palavras, (p, doc_id))
+        for t in _trigramas(nome):
+            self._trigramas.setdefault(t, set()).add(doc_id)
+
+    def remover(self, doc_id):
+        nome = self._nomes.pop(doc_id, None)
+        if nome is None:
+            return
+        del self._completos[bisect.bisect_left(self._completos, (nome, doc_id))]
+        for p in set(nome.split()):
+            del self._palavras[bisect.bisect_left(self._palavras, (p, doc_id))]
+        for t in _trigramas(nome):
+            ids = self._trigramas[t]
+            ids.discard(doc_id)
+            if not ids:
+                del self._trigramas[t]
+
+    def __len__(self):
+        return len(self._nomes)
+
+    def buscar(self, consulta: str, limite: int = 10):
+        """doc_ids dos nomes mais parecidos com `consulta`, do melhor para o pior.
+
+        Primeiro os nomes que começam pela consulta (o nome igual vem antes),
+        depois os que têm palavras começando por cada termo da consulta. Só
+        quando nenhum nome casa por prefixo entram os aproximados por
+        trigramas, do mais ao menos parecido.
+        """
+        consulta = dobrar(consulta)
+        if not consulta or limite <= 0:
+            return []
+        achados = []
+        for nome, doc_id in self._faixa(self._completos, consulta):
+            if len(achados) == limite:
+                return achados
+            achados.append(doc_id)
+        achados.extend(self._por_palavras(consulta.split(), set(achados), limite - len(achados)))
+        return achados or self._aproximados(consulta, limite)
+
+    @staticmethod
+    def _faixa(lista, prefixo):
+        """Pares (texto, doc_id) de `lista` cujo texto começa por `prefixo`, em ordem."""
+        i = bisect.bisect_left(lista, (prefixo,))
+        while i < len(lista) and lista[i][0].startswith(prefixo):
+            yield lista[i]
+            i += 1
+
+    def _tamanho_da_faixa(self, prefixo):
+        inicio = bisect.bisect_left(self._palavras, (prefixo,))
+        return bisect.bisect_left(self._palavras, (prefixo + "\U0010ffff",), inicio) - inicio
+
+    def _por_palavras(self, termos, vistos, limite):
+        # Percorre só as palavras que começam pelo termo mais seletivo (a menor faixa).
+        guia = min(termos, key=self._tamanho_da_faixa)
+        achados = []
+        for _, doc_id in self._faixa(self._palavras, guia):
+            if len(achados) == limite:
+                break
+            if doc_id in vistos:
+                continue
+            palavras = self._nomes[doc_id].split()
+            if all(any(p.startswith(t) for p in palavras) for t in termos):
+                vistos.add(doc_id)
+                achados.append(doc_id)
+        return achados
+
+    def _aproximados(self, consulta, limite):
+        alvo = sorted((self._trigramas.get(t, ()) for t in _trigramas(consulta)), key=len)
+        # Um nome com nota mínima tem ao menos `minimo` trigramas da consulta, e portanto
+        # algum dos len(alvo) - minimo + 1 mais raros: só estes geram candidatos; os
+        # trigramas comuns só somam pontos aos candidatos já encontrados.
+        s = self.SIMILARIDADE_MINIMA
+        minimo = max(1, math.ceil(s * len(alvo) / (2 - s)))
+        raros = len(alvo) - minimo + 1
+        comuns = {}
+        for ids in alvo[:raros]:
+            for doc_id in ids:
+                comuns[doc_id] = comuns.get(doc_id, 0) + 1
+        for ids in alvo[raros:]:
+            for doc_id in comuns:
+                if doc_id in ids:
+                    comuns[doc_id] += 1
+        notas = []
+        for doc_id, n in comuns.items():
+            # Coeficiente de Dice; um nome de n letras tem (até) n trigramas.
+            nota = 2 * n / (len(alvo) + len(self._nomes[doc_id]))
+            if nota >= s:
+                notas.append((-nota, self._nomes[doc_id], doc_id))
+        return [doc_id for _, _, doc_id in heapq.nsmallest(limite, notas)]
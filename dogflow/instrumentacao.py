@@ -0,0 +1,364 @@
+"""Instrumentação opcional: tempos, documentos lidos e bytes gravados.
+
+Desligada, não custa nada: nenhuma função é envolvida. Ligada
+(`DOGFLOW_PERFIL=1` ou `--perfil` no CLI), `ativar()` envolve:
+
+- as operações das tabelas de todos os backends (`db.<tabela>.<método>`),
+  contando os documentos devolvidos ou percorridos;
+- as gravações em disco do JSON e do journal (`disco.*`), contando bytes;
+- as ações de menu, comandos do CLI e o desenho de telas, conforme a
+  interface chamar `instrumentar()`.
+
+Documentos e bytes também somam em todas as operações abertas, então
+`menu.marcar_item` mostra quanto aquela ação leu e gravou. O tempo parado
+em `input()` (as funções passadas a `instrumentar_espera()`) não conta nas
+ações. Cada operação tem um histograma em baldes de ~5%; ao sair, o resumo
+da sessão é acrescentado como uma linha JSON a `<banco>.perfil.jsonl` (ou ao
+arquivo dado) e `resumir()` junta as sessões em p50/p95/p99.
+`DOGFLOW_CPROFILE=1` (ou `--cprofile`) grava também um `.prof` por sessão.
+No SQLite os bytes não são medidos: quem grava é o próprio SQLite.
+"""
+
+import atexit
+import builtins
+import functools
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+# Razão entre baldes consecutivos do histograma (erro de ~2,5% nos percentis).
+RAZAO = 1.05
+_LOG_RAZAO = math.log(RAZAO)
+
+METODOS_DE_LEITURA = ("all", "get", "search")
+METODOS_DE_ESCRITA = ("insert", "insert_multiple", "update", "remove", "truncate")
+
+ATIVO = False
+
+
+def caminho_perfil(path_banco: str) -> str:
+    return path_banco + ".perfil.jsonl"
+
+
+# ------------------------- HISTOGRAMA ------------------------- #
+class Histograma:
+    """Contagem por balde logarítmico de durações em ns; soma com outros sem perder precisão."""
+
+    def __init__(self, baldes=None):
+        self.baldes = dict(baldes or {})
+
+    def registrar(self, ns: int):
+        b = int(math.log(ns) / _LOG_RAZAO) if ns > 1 else 0
+        self.baldes[b] = self.baldes.get(b, 0) + 1
+
+    def somar(self, outro: "Histograma"):
+        for b, n in outro.baldes.items():
+            self.baldes[b] = self.baldes.get(b, 0) + n
+
+    def quantil(self, q: float) -> float:
+        """Duração (ns) no quantil `q` (0..1), pelo meio do balde."""
+        total = sum(self.baldes.values())
+        if not total:
+            return 0.0
+        alvo, acumulado = q * total, 0
+        for b in sorted(self.baldes):
+            acumulado += self.baldes[b]
+            if acumulado >= alvo:
+                return RAZAO ** (b + 0.5)
+        return RAZAO ** (max(self.baldes) + 0.5)
+
+
+class Operacao:
+    def __init__(self):
+        self.n = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.docs = 0
+        self.bytes = 0
+        self.histograma = Histograma()
+
+    def registrar(self, ns: int, docs: int, bytes_: int):
+        self.n += 1
+        self.total_ns += ns
+        self.max_ns = max(self.max_ns, ns)
+        self.docs += docs
+        self.bytes += bytes_
+        self.histograma.registrar(ns)
+
+    def como_dict(self) -> dict:
+        return {
+            "n": self.n, "total_ns": self.total_ns, "max_ns": self.max_ns, "docs": self.docs,
+            "bytes": self.bytes, "baldes": {str(b): c for b, c in sorted(self.histograma.baldes.items())},
+        }
+
+    @classmethod
+    def de_dict(cls, d: dict) -> "Operacao":
+        op = cls()
+        op.n, op.total_ns, op.max_ns = d["n"], d["total_ns"], d["max_ns"]
+        op.docs, op.bytes = d["docs"], d["bytes"]
+        op.histograma = Histograma({int(b): c for b, c in d["baldes"].items()})
+        return op
+
+    def somar(self, outra: "Operacao"):
+        self.n += outra.n
+        self.total_ns += outra.total_ns
+        self.max_ns = max(self.max_ns, outra.max_ns)
+        self.docs += outra.docs
+        self.bytes += outra.bytes
+        self.histograma.somar(outra.histograma)
+
+
+# ------------------------- MEDIDOR ------------------------- #
+class Medidor:
+    """Operações medidas na sessão; cada thread tem a sua pilha de operações abertas."""
+
+    def __init__(self):
+        self.operacoes = {}
+        self.inicio = datetime.now().isoformat(timespec="seconds")
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def pilha(self):
+        pilha = getattr(self._local, "pilha", None)
+        if pilha is None:
+            pilha = self._local.pilha = []
+        return pilha
+
+    def contar(self, docs: int = 0, bytes_: int = 0):
+        """Soma documentos/bytes em todas as operações abertas nesta thread."""
+        for quadro in self.pilha():
+            quadro[0] += docs
+            quadro[1] += bytes_
+
+    def esperou(self, ns: int):
+        for quadro in self.pilha():
+            quadro[2] += ns
+
+    def registrar(self, nome: str, ns: int, quadro):
+        with self._lock:
+            op = self.operacoes.get(nome)
+            if op is None:
+                op = self.operacoes[nome] = Operacao()
+            op.registrar(max(ns - quadro[2], 0), quadro[0], quadro[1])
+
+    def sessao(self) -> dict:
+        with self._lock:
+            operacoes = {nome: op.como_dict() for nome, op in sorted(self.operacoes.items())}
+        return {"inicio": self.inicio, "fim": datetime.now().isoformat(timespec="seconds"),
+                "pid": os.getpid(), "operacoes": operacoes}
+
+
+medidor = Medidor()
+
+
+def medido(nome, fn, docs=None):
+    """`fn` envolvida: registra o tempo em `nome` (str, ou função dos argumentos).
+
+    `docs(resultado)` conta os documentos devolvidos pela chamada.
+    """
+    @functools.wraps(fn)
+    def envolvida(*args, **kwargs):
+        pilha = medidor.pilha()
+        quadro = [0, 0, 0]  # docs, bytes, ns esperando o usuário
+        pilha.append(quadro)
+        t0 = time.perf_counter_ns()
+        try:
+            resultado = fn(*args, **kwargs)
+            if docs is not None:
+                medidor.contar(docs=docs(resultado))
+            return resultado
+        finally:
+            ns = time.perf_counter_ns() - t0
+            pilha.pop()
+            medidor.registrar(nome(args) if callable(nome) else nome, ns, quadro)
+
+    envolvida.__instrumentada__ = fn
+    return envolvida
+
+
+def _espera(fn):
+    @functools.wraps(fn)
+    def envolvida(*args, **kwargs):
+        t0 = time.perf_counter_ns()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            medidor.esperou(time.perf_counter_ns() - t0)
+
+    envolvida.__instrumentada__ = fn
+    return envolvida
+
+
+def instrumentar(namespace: dict, nomes, prefixo: str):
+    """Troca as funções `nomes` de `namespace` (ex.: `globals()`) por versões medidas."""
+    if not ATIVO:
+        return
+    for nome in nomes:
+        fn = namespace.get(nome)
+        if fn is not None and not hasattr(fn, "__instrumentada__"):
+            namespace[nome] = medido(prefixo + nome, fn)
+
+
+def instrumentar_espera(namespace: dict, nomes):
+    """Funções que esperam o usuário: o tempo delas sai das ações abertas."""
+    if not ATIVO:
+        return
+    for nome in nomes:
+        fn = namespace.get(nome) or getattr(builtins, nome)
+        if not hasattr(fn, "__instrumentada__"):
+            namespace[nome] = _espera(fn)
+
+
+# ------------------------- BANCO ------------------------- #
+def _contagem(resultado) -> int:
+    if resultado is None:
+        return 0
+    if isinstance(resultado, (dict, int)):  # um documento ou o doc_id inserido
+        return 1
+    return len(resultado)
+
+
+def _iter_medido(fn):
+    """`__iter__` que conta os documentos percorridos e só mede o tempo de produzi-los."""
+    @functools.wraps(fn)
+    def envolvida(self):
+        quadro = [0, 0, 0]
+        ns = 0
+        it = fn(self)
+        try:
+            while True:
+                t0 = time.perf_counter_ns()
+                try:
+                    doc = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    ns += time.perf_counter_ns() - t0
+                quadro[0] += 1
+                medidor.contar(docs=1)
+                yield doc
+        finally:
+            medidor.registrar(f"db.{self.nome}.iter", ns, quadro)
+
+    envolvida.__instrumentada__ = fn
+    return envolvida
+
+
+def _subclasses(cls):
+    for sub in cls.__subclasses__():
+        yield sub
+        yield from _subclasses(sub)
+
+
+def _instrumentar_banco():
+    from dogflow import journal, storage
+
+    for cls in _subclasses(storage.Tabela):
+        for metodo in METODOS_DE_LEITURA + METODOS_DE_ESCRITA:
+            fn = cls.__dict__.get(metodo)
+            if fn is not None:
+                nome = functools.partial(lambda m, args: f"db.{args[0].nome}.{m}", metodo)
+                setattr(cls, metodo, medido(nome, fn, docs=_contagem))
+        if "__iter__" in cls.__dict__:
+            cls.__iter__ = _iter_medido(cls.__dict__["__iter__"])
+
+    def gravar_json(fn):
+        def envolvida(self, data):
+            fn(self, data)
+            medidor.contar(bytes_=os.path.getsize(self.path))
+        return medido("disco.json", functools.wraps(fn)(envolvida))
+
+    def gravar_journal(fn):
+        def envolvida(self):
+            antes = self._fh.tell()
+            fn(self)
+            medidor.contar(bytes_=self._fh.tell() - antes)
+        return medido("disco.journal", functools.wraps(fn)(envolvida))
+
+    def compactar(fn):
+        def envolvida(self):
+            fn(self)
+            medidor.contar(bytes_=os.path.getsize(self.path))
+        return medido("disco.compactar", functools.wraps(fn)(envolvida))
+
+    storage.ArmazenamentoJSON._gravar_arquivo = gravar_json(storage.ArmazenamentoJSON._gravar_arquivo)
+    journal.BancoJournal._gravar_pendentes = gravar_journal(journal.BancoJournal._gravar_pendentes)
+    journal.BancoJournal.compactar = compactar(journal.BancoJournal.compactar)
+
+
+# ------------------------- SESSÃO ------------------------- #
+def ativar(caminho: str = None, cprofile: str = None):
+    """Liga a instrumentação nesta sessão; o resumo é gravado na saída do processo.
+
+    `caminho` é o arquivo do perfil (padrão: ao lado do banco); `cprofile`,
+    se dado, é o `.prof` da sessão ("1" = ao lado do banco).
+    """
+    global ATIVO
+    if ATIVO:
+        return
+    ATIVO = True
+    _instrumentar_banco()
+    perfilador = None
+    if cprofile:
+        import cProfile
+
+        perfilador = cProfile.Profile()
+        perfilador.enable()
+
+    def ao_sair():
+        from dogflow import negocio
+
+        destino = caminho or caminho_perfil(negocio.DB_PATH)
+        with open(destino, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(medidor.sessao()) + "\n")
+        if perfilador is not None:
+            perfilador.disable()
+            prof = cprofile
+            if prof == "1":
+                prof = f"{negocio.DB_PATH}.{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}.prof"
+            perfilador.dump_stats(prof)
+
+    atexit.register(ao_sair)
+
+
+def ativar_pelo_ambiente(perfil: str = None, cprofile: str = None) -> bool:
+    """Ativa se `perfil`/`cprofile` (flags do CLI) ou DOGFLOW_PERFIL/DOGFLOW_CPROFILE pedirem."""
+    perfil = perfil or os.environ.get("DOGFLOW_PERFIL", "")
+    cprofile = cprofile or os.environ.get("DOGFLOW_CPROFILE", "")
+    if perfil in ("", "0") and cprofile in ("", "0"):
+        return ATIVO
+    ativar(None if perfil in ("", "0", "1") else perfil, None if cprofile in ("", "0") else cprofile)
+    return True
+
+
+def resumir(caminho: str):
+    """Junta as sessões do arquivo: {operação: {n, p50_ms, p95_ms, p99_ms, max_ms, total_ms, docs, bytes}}."""
+    juntas = {}
+    sessoes = 0
+    with open(caminho, encoding="utf-8") as fh:
+        for linha in fh:
+            if not linha.strip():
+                continue
+            sessoes += 1
+            for nome, d in json.loads(linha)["operacoes"].items():
+                op = Operacao.de_dict(d)
+                if nome in juntas:
+                    juntas[nome].somar(op)
+                else:
+                    juntas[nome] = op
+    linhas = {}
+    for nome in sorted(juntas):
+        op = juntas[nome]
+        h = op.histograma
+        linhas[nome] = {
+            "n": op.n,
+            **{f"p{q}_ms": round(min(h.quantil(q / 100), op.max_ns) / 1e6, 3) for q in (50, 95, 99)},
+            "max_ms": round(op.max_ns / 1e6, 3),
+            "total_ms": round(op.total_ns / 1e6, 1),
+            "docs": op.docs,
+            "bytes": op.bytes,
+        }
+    return sessoes, linhas
@@ -0,0 +1,453 @@
+"""Modo JSON com journal: snapshot + log de mutações só de acréscimo.
+
+`buffet_db.json` continua sendo o snapshot (mesmo formato do TinyDB) e cada
+mutação é acrescentada a `buffet_db.json.journal` como uma linha JSON,
+seguida de fsync — marcar um item grava só a mudança, não o banco inteiro.
+Quando o journal passa de `LIMITE_JOURNAL` bytes (e ao fechar), ele é
+compactado num novo snapshot gravado em arquivo temporário e renomeado.
+
+Ao abrir, o journal é lido e suas mutações ficam separadas por tabela; cada
+tabela do snapshot só é decodificada (e recebe as mutações do journal) no
+primeiro acesso. Uma linha final incompleta (queda de energia no meio da
+gravação) é descartada.
+
+Com vários processos no mesmo arquivo, cada gravação trava `<banco>.lock`,
+lê do journal só as linhas novas (de outros terminais) a partir da última
+posição lida e então acrescenta a sua. Se outro processo compactou (o
+snapshot mudou ou o journal encolheu), o banco é recarregado.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from itertools import chain
+
+from dogflow.indices import INDICES, IndiceHash, escolher_indice
+from dogflow.storage import (
+    Banco,
+    Documento,
+    EscritaAdiada,
+    Tabela,
+    TabelasJSON,
+    TravaArquivo,
+    assinatura_arquivo,
+    caminho_trava,
+    gravar_tabelas,
+    ler_tabelas,
+)
+
+LIMITE_JOURNAL = 4 * 1024 * 1024
+
+# Tabela interna do snapshot com o último `seq` do journal já incorporado.
+TABELA_META = "_journal"
+
+
+def caminho_journal(path: str) -> str:
+    return path + ".journal"
+
+
+class TabelaJournal(Tabela):
+    def __init__(self, banco, nome: str):
+        self._banco = banco
+        self.nome = nome
+        self._docs = banco._carregar_tabela(nome)
+        self._indices = [IndiceHash(c) for c in INDICES.get(nome, [])]
+        self.reindexar()
+
+    def reindexar(self):
+        self._ultimo_id = max(self._docs, default=0)
+        for idx in self._indices:
+            idx.construir(self._docs.items())
+
+    def _doc(self, doc_id):
+        doc = self._docs.get(doc_id)
+        return None if doc is None else Documento(doc, doc_id)
+
+    def _ids(self, campos):
+        idx = escolher_indice(self._indices, campos)
+        if idx is not None:
+            return list(idx.buscar(campos))
+        return [
+            i for i, d in self._docs.items()
+            if all(d.get(k) == v for k, v in campos.items())
+        ]
+
+    # -- leitura -- #
+    def all(self):
+        with self._banco.lock:
+            self._banco.sincronizar()
+            return [Documento(d, i) for i, d in self._docs.items()]
+
+    def get(self, doc_id=None, **campos):
+        with self._banco.lock:
+            self._banco.sincronizar()
+            if doc_id is not None:
+                return self._doc(doc_id)
+            ids = self._ids(campos)
+            return self._doc(ids[0]) if ids else None
+
+    def search(self, **campos):
+        with self._banco.lock:
+            self._banco.sincronizar()
+            return [self._doc(i) for i in self._ids(campos)]
+
+    # -- escrita -- #
+    def _mudar(self, doc_id, novo, registro):
+        """Aplica uma mudança em memória, nos índices e no journal."""
+        anterior = self._docs.get(doc_id)
+        if anterior is not None:
+            for idx in self._indices:
+                idx.remover(doc_id, anterior)
+        if novo is None:
+            self._docs.pop(doc_id, None)
+        else:
+            self._docs[doc_id] = novo
+            for idx in self._indices:
+                idx.adicionar(doc_id, novo)
+        self._banco._registrar(registro, (self.nome, doc_id, anterior))
+
+    def insert(self, doc) -> int:
+        with self._banco.gravando():
+            doc_id = getattr(doc, "doc_id", None) or self._ultimo_id + 1
+            self._ultimo_id = max(self._ultimo_id, doc_id)
+            novo = dict(doc)
+            self._mudar(doc_id, novo, ["i", self.nome, doc_id, novo])
+            return doc_id
+
+    def insert_multiple(self, docs):
+        with self._banco.gravando():
+            return [self.insert(d) for d in docs]
+
+    def _alvos(self, doc_ids, filtro):
+        if doc_ids is None:
+            return self._ids(filtro)
+        return [i for i in doc_ids if i in self._docs]
+
+    def update(self, campos, doc_ids=None, **filtro):
+        with self._banco.gravando():
+            ids = self._alvos(doc_ids, filtro)
+            for doc_id in ids:
+                novo = {**self._docs[doc_id], **campos}
+                self._mudar(doc_id, novo, ["u", self.nome, doc_id, campos])
+            return ids
+
+    def remove(self, doc_ids=None, **filtro):
+        with self._banco.gravando():
+            ids = self._alvos(doc_ids, filtro)
+            for doc_id in ids:
+                self._mudar(doc_id, None, ["r", self.nome, doc_id, None])
+            return ids
+
+    def truncate(self):
+        with self._banco.gravando():
+            anterior = dict(self._docs)
+            self._docs.clear()
+            for idx in self._indices:
+                idx.limpar()
+            self._banco._registrar(["t", self.nome, None, None], (self.nome, None, anterior))
+
+    def __len__(self):
+        with self._banco.lock:
+            self._banco.sincronizar()
+            return len(self._docs)
+
+    def __iter__(self):
+        with self._banco.lock:
+            self._banco.sincronizar()
+        for doc_id in list(self._docs):
+            doc = self._docs.get(doc_id)
+            if doc is not None:
+                yield Documento(doc, doc_id)
+
+
+def _aplicar(docs, op, doc_id, payload):
+    if op == "i":
+        docs[doc_id] = payload
+    elif op == "u":
+        docs[doc_id] = {**docs.get(doc_id, {}), **payload}
+    elif op == "r":
+        docs.pop(doc_id, None)
+    elif op == "t":
+        docs.clear()
+
+
+class BancoJournal(Banco):
+    """Snapshot JSON em memória + journal fsync'ado de mutações.
+
+    Com `somente_leitura` (relatórios e cópias de segurança que abrem o banco
+    de outro terminal) o journal é reaplicado só em memória: uma linha final
+    incompleta não é cortada, fechar não compacta e gravar dá PermissionError.
+    """
+
+    def __init__(self, path: str, limite_journal: int = LIMITE_JOURNAL, somente_leitura: bool = False):
+        self.path = path
+        self.somente_leitura = somente_leitura
+        self.path_journal = caminho_journal(path)
+        self.limite_journal = limite_journal
+        self.lock = threading.RLock()
+        self.trava = TravaArquivo(caminho_trava(path))
+        self._snapshot = TabelasJSON()  # tabelas do snapshot ainda não acessadas
+        self._replay = {}  # tabela → mutações do journal ainda não aplicadas
+        self._dados = {}  # tabelas carregadas: doc_id → documento
+        self._seq = 0
+        self._geracao = 0  # ver `Banco.geracao`
+        self._lido = 0  # posição do journal até onde já foi lido
+        self._assinatura = None  # do snapshot lido
+        self._pendentes = []  # registros ainda não gravados no journal
+        self._desfazer = []  # estado anterior das mudanças da transação
+        self._nivel = 0
+        self._adiada = None
+        self._tabelas = {}
+        with self.trava():
+            self._carregar(reparar=not somente_leitura)
+        self._fh = None if somente_leitura else open(self.path_journal, "a", encoding="utf-8")
+
+    # -- abertura -- #
+    def _carregar(self, reparar: bool = False):
+        self._snapshot, self._replay, self._dados = TabelasJSON(), {}, {}
+        self._seq = self._lido = 0
+        self._geracao += 1
+        self._assinatura = assinatura_arquivo(self.path)
+        if self._assinatura and self._assinatura[1]:
+            self._snapshot = ler_tabelas(self.path)
+            meta = self._snapshot.pop(TABELA_META, {})
+            self._seq = max((m.get("seq", 0) for m in meta.values()), default=0)
+        if os.path.exists(self.path_journal):
+            self._ler_journal(reparar)
+
+    def _ler_journal(self, reparar: bool = False):
+        """Enfileira as mutações do journal a partir de `_lido`.
+
+        Uma linha sem quebra no fim ainda está sendo gravada (ou a gravação
+        caiu): fica para a próxima leitura; com `reparar` (na abertura, com a
+        trava) uma linha inválida é cortada do arquivo.
+        """
+        with open(self.path_journal, "rb") as fh:
+            fh.seek(self._lido)
+            conteudo = fh.read()
+        pos = inicio = self._lido
+        tocadas = set()
+        for linha in conteudo.splitlines(keepends=True):
+            try:
+                if not linha.endswith(b"\n"):
+                    raise ValueError
+                reg = json.loads(linha)
+            except ValueError:
+                if reparar:
+                    # Linha incompleta: a gravação foi interrompida; descarta o resto.
+                    with open(self.path_journal, "r+b") as fh:
+                        fh.truncate(pos)
+                break
+            pos += len(linha)
+            if reg["s"] <= self._seq:
+                continue  # já incorporado (ao snapshot ou a esta memória)
+            for op, nome, doc_id, payload in reg["ops"]:
+                docs = self._dados.get(nome)
+                if docs is None:
+                    self._replay.setdefault(nome, []).append((op, doc_id, payload))
+                else:
+                    _aplicar(docs, op, doc_id, payload)
+                    tocadas.add(nome)
+            self._seq = reg["s"]
+        self._lido = pos
+        if pos > inicio:
+            self._geracao += 1
+        for nome in tocadas:
+            if nome in self._tabelas:
+                self._tabelas[nome].reindexar()
+
+    def sincronizar(self):
+        """Incorpora o que outros processos gravaram (dois `stat` se nada mudou).
+
+        Não faz nada no meio de uma transação ou com mudanças ainda não
+        gravadas no journal: elas precisam ficar por último.
+        """
+        with self.lock:
+            if self._nivel or self._pendentes:
+                return
+            if assinatura_arquivo(self.path) != self._assinatura:
+                self._recarregar()  # outro processo compactou
+                return
+            try:
+                tamanho = os.path.getsize(self.path_journal)
+            except FileNotFoundError:
+                tamanho = 0
+            if tamanho < self._lido:
+                self._recarregar()
+            elif tamanho > self._lido:
+                self._ler_journal()
+
+    def _recarregar(self):
+        self._carregar()
+        for nome, tabela in self._tabelas.items():
+            tabela._docs = self._carregar_tabela(nome)
+            tabela.reindexar()
+
+    def assinatura(self):
+        try:
+            tamanho = os.path.getsize(self.path_journal)
+        except FileNotFoundError:
+            tamanho = 0
+        return assinatura_arquivo(self.path), tamanho
+
+    def geracao(self):
+        with self.lock:
+            self.sincronizar()
+            return self._geracao
+
+    def _carregar_tabela(self, nome: str) -> dict:
+        """Documentos da tabela: decodifica o snapshot e aplica o journal no 1º acesso."""
+        docs = self._dados.get(nome)
+        if docs is None:
+            bruto = self._snapshot.pop(nome, {})
+            docs = self._dados[nome] = {int(i): d for i, d in bruto.items()}
+            for op, doc_id, payload in self._replay.pop(nome, ()):
+                _aplicar(docs, op, doc_id, payload)
+        return docs
+
+    def table(self, nome: str) -> Tabela:
+        with self.lock:
+            if nome not in self._tabelas:
+                self._tabelas[nome] = TabelaJournal(self, nome)
+            return self._tabelas[nome]
+
+    def tabelas(self):
+        with self.lock:
+            return sorted(set(self._snapshot) | set(self._dados) | set(self._replay))
+
+    # -- journal -- #
+    def _registrar(self, registro, desfazer):
+        self._pendentes.append(registro)
+        if self._nivel:
+            self._desfazer.append(desfazer)
+
+    def _gravar_pendentes(self):
+        if not self._pendentes:
+            return
+        self._seq += 1
+        linha = json.dumps({"s": self._seq, "ops": self._pendentes})
+        self._fh.write(linha + "\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._lido = self._fh.tell()
+        self._pendentes = []
+
+    def _talvez_compactar(self):
+        if self._fh is not None and self._fh.tell() > self.limite_journal:
+            self.compactar()
+
+    @contextmanager
+    def gravando(self):
+        if self.somente_leitura:
+            raise PermissionError(f"{self.path} foi aberto somente para leitura.")
+        with self.lock:
+            if self._nivel:
+                yield
+                return
+            if self._adiada is not None:
+                yield
+                if self._pendentes:
+                    self._adiada.agendar()
+                return
+            with self.trava():
+                self.sincronizar()
+                yield
+                self._gravar_pendentes()
+                self._talvez_compactar()
+
+    @contextmanager
+    def transacao(self):
+        with self.lock, self.trava():
+            if not self._nivel:
+                self.descarregar()
+                self.sincronizar()
+            self._nivel += 1
+            try:
+                yield self
+            except BaseException:
+                self._nivel -= 1
+                if not self._nivel:
+                    self._reverter()
+                raise
+            self._nivel -= 1
+            if not self._nivel:
+                self._desfazer = []
+                self._gravar_pendentes()
+                self._talvez_compactar()
+
+    def _reverter(self):
+        tocadas = set()
+        for nome, doc_id, anterior in reversed(self._desfazer):
+            docs = self._carregar_tabela(nome)
+            if doc_id is None:
+                docs.clear()
+                docs.update(anterior)
+            elif anterior is None:
+                docs.pop(doc_id, None)
+            else:
+                docs[doc_id] = anterior
+            tocadas.add(nome)
+        for nome in tocadas:
+            if nome in self._tabelas:
+                self._tabelas[nome].reindexar()
+        self._desfazer = []
+        self._pendentes = []
+        self._geracao += 1
+
+    def escrita_adiada(self, janela: float):
+        self._adiada = EscritaAdiada(self.descarregar, janela)
+
+    def descarregar(self):
+        with self.lock:
+            if self._adiada:
+                self._adiada.cancelar()
+            if not self._nivel:
+                with self.trava():
+                    self._gravar_pendentes()
+                    self._talvez_compactar()
+
+    # -- snapshot -- #
+    def compactar(self):
+        """Grava um snapshot novo (temp + rename) e zera o journal."""
+        with self.lock, self.trava():
+            if self._nivel or self.somente_leitura:
+                return
+            self._gravar_pendentes()
+            self.sincronizar()
+            for nome in list(self._replay):
+                self._carregar_tabela(nome)
+            # Tabelas nunca acessadas são copiadas do snapshot anterior sem decodificar.
+            carregadas = (
+                (nome, {str(i): d for i, d in docs.items()}) for nome, docs in self._dados.items()
+            )
+            meta = [(TABELA_META, {"1": {"seq": self._seq}})]
+            pasta = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp = tempfile.mkstemp(prefix=".dogflow-", suffix=".tmp", dir=pasta)
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    gravar_tabelas(fh, chain(self._snapshot.pares(), carregadas, meta))
+                    fh.flush()
+                    os.fsync(fh.fileno())
+                os.replace(tmp, self.path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            # Se cair aqui, o journal antigo é ignorado na abertura pelo `seq`.
+            self._fh.truncate(0)
+            self._fh.seek(0)
+            self._lido = 0
+            self._assinatura = assinatura_arquivo(self.path)
+
+    def close(self):
+        with self.lock:
+            if self._fh is not None:
+                self.descarregar()
+                if os.path.getsize(self.path_journal):
+                    self.compactar()
+                self._fh.close()
+            if self._adiada:
+                self._adiada.encerrar()
+            self.trava.close()
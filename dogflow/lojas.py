@@ -0,0 +1,92 @@
+"""Lojas (unidades): execução separada por loja, catálogo compartilhado.
+
+Com uma loja configurada (`DOGFLOW_LOJA` ou `--loja`), o banco principal
+guarda só o catálogo — modelos, insumos, fichas e histórico de custos — e os
+dados de execução da loja (checklists, resumos, vendas e contagens de
+estoque, o arquivo mensal e o log de eventos) ficam num banco próprio:
+
+    buffet_db.json                  catálogo
+    buffet_db.json.lojas/centro.json
+    buffet_db.json.lojas/praia.json
+
+O banco de cada loja usa o mesmo backend do catálogo (pela extensão) e é
+gravado só pelos terminais daquela loja. O relatório consolidado lê os
+resumos de cada loja num processo separado (`ProcessPoolExecutor`).
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from dogflow.storage import abrir_banco
+
+PADRAO_LOJA = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def pasta_lojas(path_catalogo: str) -> str:
+    return path_catalogo + ".lojas"
+
+
+def _extensao(path_catalogo: str) -> str:
+    return os.path.splitext(path_catalogo)[1] or ".json"
+
+
+def caminho_loja(path_catalogo: str, loja: str) -> str:
+    """Banco da loja `loja`, com a mesma extensão (e backend) do catálogo."""
+    if not PADRAO_LOJA.match(loja or ""):
+        raise ValueError(f"Nome de loja inválido: '{loja}' (use letras, números, - e _).")
+    return os.path.join(pasta_lojas(path_catalogo), loja + _extensao(path_catalogo))
+
+
+def listar_lojas(path_catalogo: str):
+    """Lojas com banco criado, em ordem alfabética; só lista a pasta."""
+    pasta = pasta_lojas(path_catalogo)
+    if not os.path.isdir(pasta):
+        return []
+    ext = _extensao(path_catalogo)
+    nomes = (n[: -len(ext)] for n in os.listdir(pasta) if n.endswith(ext))
+    return sorted(n for n in nomes if PADRAO_LOJA.match(n))
+
+
+# ------------------------- RELATÓRIO CONSOLIDADO ------------------------- #
+def resumir_loja(loja: str, path: str, de: str = None, ate: str = None):
+    """Conformidade por modelo de uma loja no período (roda num processo do pool)."""
+    banco = abrir_banco(path, somente_leitura=True)
+    try:
+        grupos = {}
+        for r in banco.table("resumos"):
+            if (de and r["data"] < de) or (ate and r["data"] > ate):
+                continue
+            g = grupos.get(r["template"])
+            if g is None:
+                g = grupos[r["template"]] = {
+                    "loja": loja, "template": r["template"],
+                    "checklists": 0, "completos": 0, "done": 0, "total": 0,
+                }
+            g["checklists"] += 1
+            g["completos"] += 1 if r["pct"] == 100 else 0
+            g["done"] += r["done"]
+            g["total"] += r["total"]
+    finally:
+        banco.close()
+    linhas = [grupos[t] for t in sorted(grupos)]
+    for g in linhas:
+        g["pct"] = int(g["done"] * 100 / g["total"]) if g["total"] else 0
+    return linhas
+
+
+def conformidade_por_loja(path_catalogo: str, de: str = None, ate: str = None, processos: int = None):
+    """Conformidade por loja e modelo, lendo as lojas em paralelo.
+
+    Cada loja é lida por um processo (até `processos`, padrão: núcleos da
+    máquina); com uma loja só, lê no próprio processo.
+    """
+    lojas = listar_lojas(path_catalogo)
+    argumentos = (lojas, [caminho_loja(path_catalogo, loja) for loja in lojas], [de] * len(lojas), [ate] * len(lojas))
+    processos = min(len(lojas), processos or os.cpu_count() or 1)
+    if processos <= 1:
+        partes = list(map(resumir_loja, *argumentos))
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            partes = list(pool.map(resumir_loja, *argumentos))
+    return [linha for parte in partes for linha in parte]
@@ -0,0 +1,1280 @@
+"""Operações de negócio do DogFlow, sem interface de terminal.
+
+Tudo o que os menus de `Buffet_checklist.py` fazem está aqui como funções
+que recebem parâmetros e devolvem dados (sem `input()`/`print()`), para uso
+pelo CLI (`python -m dogflow`), por scripts e testes. O banco só é aberto no
+primeiro acesso a uma tabela — importar este módulo não toca no disco.
+"""
+
+from datetime import datetime, date, timedelta
+import heapq
+import itertools
+import os
+
+from dogflow import transferencia
+from dogflow.analise import AnaliseItens, caminho_analise, minutos_do_prazo
+from dogflow.arquivo import ArquivoChecklists, caminho_arquivo
+from dogflow.custos import MatrizCustos, preco_por_margem
+from dogflow.eventos import LeitorEventos, PainelDoDia, RegistroEventos, barramento, caminho_eventos
+from dogflow.indices import IndiceBusca, IndiceReverso
+from dogflow import lojas
+from dogflow.lojas import caminho_loja
+from dogflow.storage import Vigia, abrir_banco
+from dogflow.vendas import LoteVendas, indicadores, somar_dia
+
+# Extensão .sqlite/.sqlite3/.db usa o backend SQLite; o padrão segue em JSON (TinyDB).
+# DOGFLOW_WRITE_BEHIND=<segundos> agrupa as gravações avulsas nessa janela (write-behind).
+# DOGFLOW_JOURNAL=1 grava cada mudança num journal ao lado do JSON (à prova de queda de energia).
+DB_PATH = os.environ.get("DOGFLOW_DB", "buffet_db.json")
+ESCRITA_ADIADA = float(os.environ.get("DOGFLOW_WRITE_BEHIND") or 0)
+JOURNAL = os.environ.get("DOGFLOW_JOURNAL", "") not in ("", "0")
+# Dias mantidos na partição quente (hoje e ontem); os anteriores vão para o arquivo mensal.
+DIAS_QUENTES = int(os.environ.get("DOGFLOW_DIAS_QUENTES") or 2)
+# DOGFLOW_LOJA=<nome> separa os checklists da loja em <banco>.lojas/<nome>.json; o banco fica com o catálogo.
+LOJA = os.environ.get("DOGFLOW_LOJA") or None
+# DOGFLOW_EVENTOS=0 desliga o log de eventos (<banco>.eventos.jsonl) que alimenta os painéis ao vivo.
+EVENTOS = os.environ.get("DOGFLOW_EVENTOS", "1") not in ("", "0")
+# Tentativas de gravar uma marcação quando outro terminal muda o mesmo checklist no meio.
+TENTATIVAS_CONFLITO = 5
+
+_banco = None
+_banco_loja = None
+_arquivo = None
+_registro_eventos = None
+
+
+def banco():
+    """Banco atual, aberto no primeiro uso."""
+    global _banco, _registro_eventos
+    if _banco is None:
+        _banco = abrir_banco(DB_PATH, escrita_adiada=ESCRITA_ADIADA, journal=JOURNAL)
+        if LOJA:
+            os.makedirs(lojas.pasta_lojas(DB_PATH), exist_ok=True)
+        if EVENTOS:
+            _registro_eventos = barramento.assinar(RegistroEventos(caminho_eventos(caminho_da_loja())))
+    return _banco
+
+
+def caminho_da_loja() -> str:
+    """Arquivo com os checklists: o da loja configurada ou o próprio banco."""
+    return caminho_loja(DB_PATH, LOJA) if LOJA else DB_PATH
+
+
+def banco_da_loja():
+    """Banco dos checklists e resumos: o da loja configurada ou o próprio banco."""
+    global _banco_loja
+    if not LOJA:
+        return banco()
+    if _banco_loja is None:
+        banco()  # o catálogo abre primeiro (e cria a pasta das lojas)
+        _banco_loja = abrir_banco(caminho_da_loja(), escrita_adiada=ESCRITA_ADIADA, journal=JOURNAL)
+    return _banco_loja
+
+
+def configurar(path: str = None, escrita_adiada: float = None, journal: bool = None, loja: str = None):
+    """Troca o arquivo/modo do banco ou a loja ("" = nenhuma); a próxima operação abre o novo."""
+    global DB_PATH, ESCRITA_ADIADA, JOURNAL, LOJA, _banco, _arquivo, _fichas_por_insumo, _busca_insumos, _versoes
+    fechar()
+    if path is not None:
+        DB_PATH = path
+    if loja is not None:
+        if loja:
+            caminho_loja(DB_PATH, loja)  # valida o nome
+        LOJA = loja or None
+    if escrita_adiada is not None:
+        ESCRITA_ADIADA = escrita_adiada
+    if journal is not None:
+        JOURNAL = journal
+    _arquivo = None
+    _fichas_por_insumo = None
+    _busca_insumos = None
+    _versoes = {}
+
+
+def fechar():
+    global _banco, _banco_loja, _registro_eventos
+    if _banco_loja is not None:
+        _banco_loja.close()
+        _banco_loja = None
+    if _banco is not None:
+        _banco.close()
+        _banco = None
+    if _registro_eventos is not None:
+        barramento.cancelar(_registro_eventos)
+        _registro_eventos.close()
+        _registro_eventos = None
+
+
+def transacao():
+    """Atalho para `banco().transacao()` (catálogo)."""
+    return banco().transacao()
+
+
+def transacao_da_loja():
+    """Transação no banco dos checklists; não trava o catálogo nem as outras lojas."""
+    return banco_da_loja().transacao()
+
+
+def vigia() -> Vigia:
+    """Detector de mudanças feitas no banco (e na loja) por outro terminal."""
+    return Vigia(banco(), banco_da_loja()) if LOJA else Vigia(banco())
+
+
+def leitor_eventos(do_inicio: bool = False) -> LeitorEventos:
+    """Acompanha o log de eventos do banco atual (gravado por todos os terminais)."""
+    return LeitorEventos(caminho_eventos(caminho_da_loja()), do_inicio)
+
+
+def arquivo() -> ArquivoChecklists:
+    """Arquivo mensal dos checklists antigos, ao lado do banco."""
+    global _arquivo
+    if _arquivo is None:
+        _arquivo = ArquivoChecklists(caminho_arquivo(caminho_da_loja()))
+    return _arquivo
+
+
+class TabelaDoBanco:
+    """Acesso à tabela `nome` do banco atual (ou do da loja), resolvido a cada uso."""
+
+    def __init__(self, nome: str, da_loja: bool = False):
+        self.nome = nome
+        self._banco = banco_da_loja if da_loja else banco
+
+    def __getattr__(self, attr):
+        return getattr(self._banco().table(self.nome), attr)
+
+    def __len__(self):
+        return len(self._banco().table(self.nome))
+
+    def __iter__(self):
+        return iter(self._banco().table(self.nome))
+
+
+# Tabelas do banco
+tpl_table = TabelaDoBanco("templates")      # modelos de checklist (itens padrão)
+versoes_table = TabelaDoBanco("versoes_modelos")  # revisões imutáveis dos modelos {nome, rev, itens}
+chk_table = TabelaDoBanco("checklists", da_loja=True)  # checklists recentes (partição quente)
+insumos_table = TabelaDoBanco("insumos")    # insumos (matérias-primas)
+fichas_table = TabelaDoBanco("fichas")      # fichas técnicas (produtos)
+hist_custos_table = TabelaDoBanco("historico_custos")  # mudanças de custo das fichas
+meta_table = TabelaDoBanco("meta")          # marcadores internos {chave, valor}
+resumos_table = TabelaDoBanco("resumos", da_loja=True)  # um resumo por checklist (rollup do histórico)
+meta_loja_table = TabelaDoBanco("meta", da_loja=True)  # marcadores da execução (arquivamento, resumos)
+vendas_table = TabelaDoBanco("vendas_dia", da_loja=True)  # um documento por dia: vendas por produto e consumo
+lotes_vendas_table = TabelaDoBanco("lotes_vendas", da_loja=True)  # importações já feitas (pela assinatura)
+contagens_table = TabelaDoBanco("contagens", da_loja=True)  # contagens físicas de estoque por insumo e data
+
+# Tabelas que ficam no banco da loja, quando há lojas.
+TABELAS_DA_LOJA = ("checklists", "resumos", "vendas_dia", "lotes_vendas", "contagens")
+# Marcadores guardados junto com os checklists (na loja, quando há lojas).
+MARCADORES_DA_LOJA = ("arquivado_em", "resumos", "checklists_compactos")
+
+
+def money(v: float) -> str:
+    """Formata valores monetários em R$."""
+    return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+# ------------------------- INSUMOS & FICHAS ------------------------- #
+def find_insumo(nome: str):
+    """Busca um insumo cadastrado pelo nome."""
+    return insumos_table.get(nome=nome.strip())
+
+
+def custo_unit_do_ingrediente(item: dict) -> float:
+    """Custo unitário atual do insumo referenciado pelo ingrediente."""
+    if "insumo_id" not in item:
+        return item["custo_unit"]  # ficha antiga, ainda com a cópia do custo
+    ins = insumos_table.get(doc_id=item["insumo_id"])
+    return ins["custo_unit"] if ins else 0.0
+
+
+def custo_da_ficha(ficha: dict) -> float:
+    """Calcula o custo total de uma ficha técnica com os preços atuais dos insumos."""
+    total = 0.0
+    for item in ficha["ingredientes"]:
+        total += item["qtd"] * custo_unit_do_ingrediente(item)
+    return round(total, 2)
+
+
+def ingredientes_da_ficha(ficha: dict):
+    """Ingredientes com nome, unidade e custo resolvidos a partir dos insumos."""
+    linhas = []
+    for item in ficha["ingredientes"]:
+        ins = insumos_table.get(doc_id=item["insumo_id"]) if "insumo_id" in item else item
+        linhas.append(
+            {
+                "nome": ins["nome"] if ins else "(insumo removido)",
+                "unidade": ins["unidade"] if ins else "",
+                "qtd": item["qtd"],
+                "custo_unit": ins["custo_unit"] if ins else 0.0,
+            }
+        )
+    return linhas
+
+
+# ------------------------- BUSCA DE INSUMOS ------------------------- #
+_busca_insumos = None
+
+
+def busca_insumos() -> IndiceBusca:
+    """Índice de busca nos nomes dos insumos, construído no primeiro uso.
+
+    Os cadastros deste processo o atualizam um a um; se a tabela mudou de
+    tamanho por fora (outro terminal), ele é reconstruído.
+    """
+    global _busca_insumos
+    if _busca_insumos is None or len(_busca_insumos) != len(insumos_table):
+        _busca_insumos = IndiceBusca()
+        _busca_insumos.construir((i.doc_id, i["nome"]) for i in insumos_table.all())
+    return _busca_insumos
+
+
+def _indexar_insumo(doc_id, nome: str):
+    if _busca_insumos is not None:
+        _busca_insumos.atualizar(doc_id, nome)
+
+
+def sugerir_insumos(texto: str, limite: int = 8):
+    """Insumos mais parecidos com `texto` (sem acento e sem caixa), do melhor para o pior."""
+    achados = (insumos_table.get(doc_id=doc_id) for doc_id in busca_insumos().buscar(texto, limite))
+    return [i for i in achados if i]
+
+
+# ------------------------- CUSTOS INCREMENTAIS ------------------------- #
+_fichas_por_insumo = None
+_geracao_fichas = None
+
+
+def fichas_por_insumo() -> IndiceReverso:
+    """Índice reverso insumo → fichas, construído no primeiro uso.
+
+    É reconstruído quando o banco incorpora gravações de outro terminal
+    (`Banco.geracao`): uma ficha criada lá também precisa ser recalculada aqui.
+    """
+    global _fichas_por_insumo, _geracao_fichas
+    geracao = banco().geracao()
+    if _fichas_por_insumo is None or geracao != _geracao_fichas:
+        _fichas_por_insumo = IndiceReverso(
+            lambda f: [it["insumo_id"] for it in f["ingredientes"] if "insumo_id" in it]
+        )
+        _fichas_por_insumo.construir((f.doc_id, f) for f in fichas_table.all())
+        _geracao_fichas = banco().geracao()
+    return _fichas_por_insumo
+
+
+def registrar_custo(ficha: dict, custo: float, motivo: str):
+    """Grava o novo custo da ficha e a mudança no histórico, se houve mudança."""
+    anterior = ficha.get("custo")
+    fichas_table.update({"custo": custo}, doc_ids=[ficha.doc_id])
+    if anterior != custo:
+        hist_custos_table.insert(
+            {
+                "data": datetime.now().isoformat(timespec="seconds"),
+                "ficha_id": ficha.doc_id,
+                "nome_prod": ficha["nome_prod"],
+                "custo_anterior": anterior,
+                "custo": custo,
+                "motivo": motivo,
+            }
+        )
+
+
+def salvar_insumo(nome: str, unidade: str, custo_unit: float):
+    """Cadastra ou atualiza um insumo e recalcula só as fichas que o usam.
+
+    Tudo numa transação: o insumo, os custos das fichas afetadas e o
+    histórico são gravados juntos. Retorna (doc_id, fichas recalculadas).
+    """
+    with transacao():
+        existente = find_insumo(nome)
+        if not existente:
+            doc_id = insumos_table.insert({"nome": nome, "unidade": unidade, "custo_unit": custo_unit})
+            _indexar_insumo(doc_id, nome)
+            return doc_id, 0
+
+        insumos_table.update({"unidade": unidade, "custo_unit": custo_unit}, doc_ids=[existente.doc_id])
+        if existente["custo_unit"] == custo_unit:
+            return existente.doc_id, 0
+        motivo = f"{nome}: {money(existente['custo_unit'])} → {money(custo_unit)}"
+        afetadas = fichas_por_insumo().buscar(existente.doc_id)
+        for fid in afetadas:
+            ficha = fichas_table.get(doc_id=fid)
+            registrar_custo(ficha, custo_da_ficha(ficha), motivo)
+        return existente.doc_id, len(afetadas)
+
+
+def salvar_ficha(nome_prod: str, ingredientes: list, preco=None) -> dict:
+    """Cria ou substitui a ficha `nome_prod`; ingredientes são {insumo_id, qtd}."""
+    with transacao():
+        found = fichas_table.get(nome_prod=nome_prod)
+        payload = {"nome_prod": nome_prod, "ingredientes": ingredientes, "preco": preco}
+        if found:
+            fichas_table.update(payload, doc_ids=[found.doc_id])
+            fid = found.doc_id
+        else:
+            fid = fichas_table.insert({**payload, "custo": None})
+        ficha = fichas_table.get(doc_id=fid)
+        registrar_custo(ficha, custo_da_ficha(ficha), "ficha editada" if found else "ficha criada")
+        fichas_por_insumo().atualizar(fid, ficha)
+        return fichas_table.get(doc_id=fid)
+
+
+def ajustar_preco(nome_prod: str, preco: float = None, margem: float = None):
+    """Define o preço de venda direto ou pela margem (%); retorna (custo, preço)."""
+    ficha = fichas_table.get(nome_prod=nome_prod)
+    if not ficha:
+        raise ValueError(f"Ficha '{nome_prod}' não existe.")
+    custo = ficha.get("custo") or custo_da_ficha(ficha)
+    if margem is not None:
+        preco = preco_por_margem(custo, margem)
+    if preco is None:
+        raise ValueError("Informe o preço ou a margem.")
+    fichas_table.update({"preco": preco, "custo": custo}, doc_ids=[ficha.doc_id])
+    barramento.publicar("preco_alterado", produto=nome_prod, custo=custo, preco=preco, anterior=ficha.get("preco"))
+    return custo, preco
+
+
+def matriz_custos() -> MatrizCustos:
+    """Matriz insumo × ficha com os custos atuais, para custeio em lote."""
+    return MatrizCustos(
+        fichas_table.all(), {i.doc_id: i["custo_unit"] for i in insumos_table.all()}
+    )
+
+
+def recalcular_cardapio(motivo: str = "recálculo geral") -> int:
+    """Recalcula o custo de todas as fichas de uma vez; grava só as que mudaram."""
+    matriz = matriz_custos()
+    mudaram = 0
+    with transacao():
+        for ficha, custo in zip(matriz.fichas, matriz.custos()):
+            if ficha.get("custo") != custo:
+                registrar_custo(ficha, custo, motivo)
+                mudaram += 1
+    return mudaram
+
+
+def atualizar_custos_insumos(novos: dict):
+    """Atualiza vários insumos {nome: custo_unit} e recusteia o cardápio em lote.
+
+    Retorna (insumos atualizados, fichas com custo alterado).
+    """
+    with transacao():
+        atualizados = 0
+        for nome, custo_unit in novos.items():
+            ins = find_insumo(nome)
+            if ins and ins["custo_unit"] != custo_unit:
+                insumos_table.update({"custo_unit": custo_unit}, doc_ids=[ins.doc_id])
+                atualizados += 1
+        fichas = recalcular_cardapio(f"reajuste de {atualizados} insumo(s)") if atualizados else 0
+    return atualizados, fichas
+
+
+def reprecificar_cardapio(margem: float) -> int:
+    """Aplica a margem desejada (%) a todos os produtos; retorna quantos mudaram."""
+    matriz = matriz_custos()
+    custos = matriz.custos()
+    mudaram = 0
+    with transacao():
+        for ficha, custo, preco in zip(matriz.fichas, custos, matriz.precos_por_margem(margem, custos)):
+            if ficha.get("preco") != preco or ficha.get("custo") != custo:
+                fichas_table.update({"preco": preco, "custo": custo}, doc_ids=[ficha.doc_id])
+                mudaram += 1
+    return mudaram
+
+
+def normalizar_fichas() -> int:
+    """Converte fichas antigas (cópia de nome/custo do insumo) para referências por id.
+
+    Insumos citados pela ficha e não cadastrados são criados com os dados copiados.
+    """
+    antigas = [
+        f for f in fichas_table.all() if any("insumo_id" not in it for it in f["ingredientes"])
+    ]
+    if not antigas:
+        return 0
+    with transacao():
+        for f in antigas:
+            ingredientes = []
+            for it in f["ingredientes"]:
+                if "insumo_id" not in it:
+                    ins = find_insumo(it["nome"])
+                    if ins:
+                        iid = ins.doc_id
+                    else:
+                        iid = insumos_table.insert(
+                            {"nome": it["nome"], "unidade": it["unidade"], "custo_unit": it["custo_unit"]}
+                        )
+                        _indexar_insumo(iid, it["nome"])
+                    it = {"insumo_id": iid, "qtd": it["qtd"]}
+                ingredientes.append(it)
+            fichas_table.update({"ingredientes": ingredientes}, doc_ids=[f.doc_id])
+            ficha = fichas_table.get(doc_id=f.doc_id)
+            registrar_custo(ficha, custo_da_ficha(ficha), "normalização (preços atuais)")
+    global _fichas_por_insumo
+    _fichas_por_insumo = None
+    return len(antigas)
+
+
+# ------------------------- DADOS & MODELOS ------------------------- #
+DEFAULT_TEMPLATES = [
+    {
+        "nome": "Abertura – Hot Dog",
+        "itens": [
+            "Higienização pessoal: lavar mãos, unhas curtas, avental/luvas (POP Higiene Pessoal)",
+            "Checagem de gás e exaustão; teste de vazamento com espuma (segurança)",
+            "Ligar chapa e banho-maria; pré-aquecer até temperatura operacional",
+            "Sanitizar bancadas, pinças, espátulas, facas e tábua (diluição correta do sanitizante)",
+            "Conferir validades: pães, salsichas, molhos, bebidas (FIFO/PEPS)",
+            "Mise en place: pães cortados, caixas GN com molhos tampadas",
+            "Descongelar pães/insumos conforme previsão de vendas (registro de tempo/temperatura)",
+            "Checar estoque mínimo do turno (pães, salsichas, guardanapos, embalagens, copos)",
+            "Abrir caixa: conferir troco inicial e registrar valor",
+            "Briefing rápido da equipe: metas do dia + POPs críticos",
+        ],
+    },
+    {
+        "nome": "Operação – Produção & Qualidade",
+        "itens": [
+            "Controle de temperatura: chapa ≥ 170°C; banho-maria 60–70°C (HACCP PCC)",
+            "Cozimento/regeneração de salsichas por batelada; descartar após 2h no aquecimento",
+            "Reposição de molhos com etiqueta (data/hora) e tampa; não misturar antigo com novo",
+            "Limpeza rápida a cada 30 min: bancadas, alça de geladeira, puxadores e POS",
+            "Medição de temperatura de alimentos prontos (≥ 65°C) com termômetro higienizado",
+            "Reposição de pães conforme demanda; evitar sobras ao final do turno",
+            "Separação de áreas/utensílios crus x prontos (evitar contaminação cruzada)",
+            "Registro de vendas fora do sistema (contingência) — lançar no fim do turno",
+            "Coleta de feedback dos clientes (anotar itens mais pedidos e reclamações)",
+            "Verificar validade/aparência dos perecíveis a cada 2h; descartar suspeitos",
+        ],
+    },
+    {
+        "nome": "Operação – Delivery/Embalagem",
+        "itens": [
+            "Checar integridade das embalagens, selos e sacolas (sem odor/umidade)",
+            "Padronizar montagem (peso do hot dog, sequência de ingredientes, foto-modelo)",
+            "Separar pedidos múltiplos por cliente; conferência dupla (itens/bebidas/molhos)",
+            "Etiquetar pedido com hora de saída, nome do cliente e observações",
+            "Despacho: motorista/entregador registrado; manter alimento protegido do calor externo",
+        ],
+    },
+    {
+        "nome": "Fechamento – Limpeza & Caixa",
+        "itens": [
+            "Desligar chapa/gás e fechar registro; aguardar resfriar para limpeza",
+            "Descartar restos conforme POP de resíduos (orgânico/reciclável/óleo)",
+            "Lavar e sanitizar utensílios, GN, bancadas, coifa e piso (checklist de pontos críticos)",
+            "Conferência de caixa: total do sistema x dinheiro/PIX/cartão; lançar sangria",
+            "Atualizar estoque mínimo para o dia seguinte; registrar faltas e perdas",
+            "Guardar insumos etiquetados (PEPS), tampados e refrigerados",
+            "Checklist final da loja (portas, luzes, gás, lixo externo, documentos)",
+        ],
+    },
+    {
+        "nome": "POP – Preparação de Molhos",
+        "itens": [
+            "Higienizar utensílios e recipientes; conferir validade dos ingredientes",
+            "Preparar receita padrão (gramas/ml) — fidelidade à ficha técnica",
+            "Envasar em bisnagas/recipientes sanitizados; etiquetar com data/hora e validade",
+            "Armazenar refrigerado; controlar primeira saída (PEPS)",
+            "Registrar lote do molho em planilha para rastreio",
+        ],
+    },
+    {
+        "nome": "POP – Higienização de Equipamentos",
+        "itens": [
+            "Chapa: raspar resíduos após resfriar; aplicar desengordurante; enxaguar e secar",
+            "Banho-maria: esvaziar, remover incrustações e sanitizar; enxaguar",
+            "Coifa/filtros: desengordurar, lavar, secar; agendar limpeza profunda semanal",
+            "Geladeira/freezer: limpeza de prateleiras; checar borrachas e drenagem",
+            "Registrar execução (data/hora/responsável) em planilha ou caderno",
+            "Descartar resíduos conforme POP de resíduos (orgânico/reciclável/óleo)",
+        ],
+    },
+]
+
+
+# ------------------------- VERSÕES DOS MODELOS ------------------------- #
+# Cada checklist guarda só (template, rev), a máscara de itens feitos e os
+# horários; o texto dos itens vem da revisão do modelo, que nunca muda nem é
+# apagada. Editar um modelo cria uma revisão nova; os checklists antigos
+# continuam mostrando os itens com que foram feitos.
+_versoes = {}
+
+
+def registrar_versao(nome: str, itens) -> int:
+    """Revisão do modelo `nome` com exatamente estes itens (cria uma nova se preciso).
+
+    Chame dentro de `transacao()`: dois terminais não criam a mesma revisão.
+    """
+    itens = list(itens)
+    revisoes = versoes_table.search(nome=nome)
+    for v in revisoes:
+        if v["itens"] == itens:
+            return v["rev"]
+    rev = max((v["rev"] for v in revisoes), default=0) + 1
+    versoes_table.insert({"nome": nome, "rev": rev, "itens": itens})
+    _versoes[(nome, rev)] = tuple(itens)
+    return rev
+
+
+def itens_do_modelo(nome: str, rev: int):
+    """Textos dos itens da revisão `rev` do modelo; imutáveis, ficam em cache."""
+    itens = _versoes.get((nome, rev))
+    if itens is None:
+        doc = versoes_table.get(nome=nome, rev=rev)
+        if doc is None:
+            raise ValueError(f"Revisão {rev} do modelo '{nome}' não existe.")
+        itens = _versoes[(nome, rev)] = tuple(doc["itens"])
+    return itens
+
+
+def _com_revisao(t: dict) -> dict:
+    return {"nome": t["nome"], "itens": list(t["itens"]), "rev": registrar_versao(t["nome"], t["itens"])}
+
+
+def versionar_modelos() -> int:
+    """Dá uma revisão aos modelos gravados antes das versões; retorna quantos."""
+    with transacao():
+        antigos = [t for t in tpl_table.all() if "rev" not in t]
+        for t in antigos:
+            tpl_table.update({"rev": registrar_versao(t["nome"], t["itens"])}, doc_ids=[t.doc_id])
+    return len(antigos)
+
+
+def restaurar_modelos_recomendados():
+    with transacao():
+        tpl_table.truncate()
+        tpl_table.insert_multiple([_com_revisao(t) for t in DEFAULT_TEMPLATES])
+
+
+def criar_template(nome: str, itens) -> int:
+    nome = nome.strip()
+    itens = [i.strip() for i in itens if i.strip()]
+    if not nome:
+        raise ValueError("Nome inválido.")
+    if not itens:
+        raise ValueError("Modelo precisa ter ao menos um item.")
+    with transacao():
+        return tpl_table.insert(_com_revisao({"nome": nome, "itens": itens}))
+
+
+def apagar_template(nome: str) -> bool:
+    return bool(tpl_table.remove(nome=nome))
+
+
+def _meta(chave: str):
+    return meta_loja_table if chave in MARCADORES_DA_LOJA else meta_table
+
+
+def marcador(chave: str):
+    """Valor do marcador `chave` na tabela meta (None se nunca marcado)."""
+    doc = _meta(chave).get(chave=chave)
+    return doc["valor"] if doc else None
+
+
+def marcar(chave: str, valor=True):
+    meta = _meta(chave)
+    if meta.get(chave=chave):
+        meta.update({"valor": valor}, chave=chave)
+    else:
+        meta.insert({"chave": chave, "valor": valor})
+
+
+def ensure_default_templates():
+    """Carrega os modelos padrão uma única vez por banco.
+
+    O marcador evita abrir a tabela de modelos a cada início; apagar todos os
+    modelos não os traz de volta (use "Restaurar modelos recomendados").
+    """
+    if marcador("modelos_padrao"):
+        return
+    with transacao():
+        if len(tpl_table) == 0:
+            tpl_table.insert_multiple([_com_revisao(t) for t in DEFAULT_TEMPLATES])
+        marcar("modelos_padrao")
+
+
+def today_str() -> str:
+    return date.today().isoformat()
+
+
+def get_or_create_checklist(dia: str, nome_template: str) -> dict:
+    found = chk_table.get(data=dia, template=nome_template)
+    if found:
+        return found
+
+    modelo = tpl_table.get(nome=nome_template)
+    if not modelo:
+        raise ValueError(f"Template '{nome_template}' não existe.")
+    hoje = today_str()
+    if dia < hoje and arquivo().obter(dia, nome_template):
+        raise ValueError(f"O checklist de {dia} ({nome_template}) está arquivado (somente leitura).")
+    if dia == hoje:
+        arquivar_dias_antigos()  # primeiro checklist do dia: vira a partição
+
+    total = len(modelo["itens"])
+    with transacao_da_loja():
+        # Com o banco travado: outro terminal pode ter iniciado o mesmo checklist.
+        found = chk_table.get(data=dia, template=nome_template)
+        if found:
+            return found
+        cid = chk_table.insert(
+            {"data": dia, "template": nome_template, "rev": modelo["rev"], "feitos": 0, "horas": [0] * total,
+             "versao": 0}
+        )
+        reg = chk_table.get(doc_id=cid)
+        atualizar_resumo(reg)
+    barramento.publicar(
+        "checklist_criado", data=dia, template=nome_template, itens=list(modelo["itens"]), total=total
+    )
+    return reg
+
+
+def list_templates_names():
+    return [tpl["nome"] for tpl in tpl_table.all()]
+
+
+def resolver_template(ref: str) -> str:
+    """Aceita o nome do modelo ou o seu número (1, 2, ...) na listagem."""
+    nomes = list_templates_names()
+    if ref in nomes:
+        return ref
+    if ref.isdigit() and 1 <= int(ref) <= len(nomes):
+        return nomes[int(ref) - 1]
+    raise ValueError(f"Template '{ref}' não existe.")
+
+
+def _marcados(reg):
+    """(máscara de itens feitos, nº de itens) do checklist gravado ou da visão com `itens`."""
+    if "itens" in reg:
+        return sum(1 << pos for pos, it in enumerate(reg["itens"]) if it["done"]), len(reg["itens"])
+    return reg["feitos"], len(reg["horas"])
+
+
+def checklist_progress(reg):
+    feitos, n = _marcados(reg)
+    done = bin(feitos).count("1")
+    total = n or 1
+    return done, total, int(done * 100 / total)
+
+
+# ------------------------- CHECKLISTS ------------------------- #
+# Checklist gravado: {data, template, rev, feitos, horas, versao}. O bit `pos`
+# de `feitos` marca o item pos+1; `horas[pos]` é o horário da marcação em
+# segundos desde a meia-noite do dia do checklist (0 se não feito, None se
+# feito sem horário conhecido).
+def _segundos(dia: str, momento: datetime):
+    return int((momento - datetime.fromisoformat(dia)).total_seconds())
+
+
+def _horario(dia: str, segundos):
+    if segundos is None:
+        return None
+    return (datetime.fromisoformat(dia) + timedelta(seconds=segundos)).isoformat(timespec="seconds")
+
+
+def item_feito(reg, n: int) -> bool:
+    """O item `n` (1, 2, ...) está marcado?"""
+    return bool(_marcados(reg)[0] >> (n - 1) & 1)
+
+
+def itens_do_checklist(reg):
+    """Itens {nome, done, timestamp}; o texto vem da revisão do modelo (só para exibir)."""
+    if "itens" in reg:
+        return reg["itens"]
+    nomes = itens_do_modelo(reg["template"], reg["rev"])
+    feitos = reg["feitos"]
+    return [
+        {"nome": nome, "done": feito, "timestamp": _horario(reg["data"], h) if feito else None}
+        for nome, h, feito in zip(nomes, reg["horas"], (bool(feitos >> pos & 1) for pos in range(len(nomes))))
+    ]
+
+
+def expandir_checklist(reg) -> dict:
+    """Checklist com os itens por extenso (telas, API, exportação, painel)."""
+    return {
+        "data": reg["data"], "template": reg["template"], "versao": reg.get("versao", 0),
+        "itens": itens_do_checklist(reg),
+    }
+
+
+def compactar_checklist(reg) -> dict:
+    """Checklist do formato antigo (itens copiados) no formato compacto.
+
+    Registra a revisão do modelo com os itens do registro, que podem ser
+    diferentes dos do modelo atual; chame dentro de `transacao()`.
+    """
+    if "itens" not in reg:
+        return reg
+    feitos, horas = 0, []
+    for pos, it in enumerate(reg["itens"]):
+        hora = 0
+        if it["done"]:
+            feitos |= 1 << pos
+            try:
+                hora = _segundos(reg["data"], datetime.fromisoformat(it["timestamp"]))
+            except (TypeError, ValueError):
+                hora = None
+        horas.append(hora)
+    compacto = {
+        "data": reg["data"], "template": reg["template"],
+        "rev": registrar_versao(reg["template"], [it["nome"] for it in reg["itens"]]),
+        "feitos": feitos, "horas": horas,
+    }
+    if "versao" in reg:
+        compacto["versao"] = reg["versao"]
+    return compacto
+
+
+def _alternados(reg, visto, numeros):
+    """(feitos, horas) de `reg` com cada item de `numeros` no contrário do estado `visto`."""
+    feitos, horas = reg["feitos"], list(reg["horas"])
+    feitos_visto, n_visto = _marcados(visto)
+    posicoes = [n - 1 for n in numeros]
+    if not posicoes or not all(0 <= pos < min(len(horas), n_visto) for pos in posicoes):
+        raise ValueError("Índice inválido.")
+    agora = _segundos(reg["data"], datetime.now())
+    for pos in posicoes:
+        bit = 1 << pos
+        desejado = not feitos_visto & bit
+        if bool(feitos & bit) != desejado:
+            feitos ^= bit
+            horas[pos] = agora if desejado else 0
+    return feitos, horas
+
+
+def _publicar_alternados(antes, depois):
+    """Um evento `item_alternado` por item que mudou de `antes` para `depois`."""
+    feitos, total, _ = checklist_progress(depois)
+    mudaram = antes["feitos"] ^ depois["feitos"]
+    nomes = itens_do_modelo(depois["template"], depois["rev"]) if mudaram else ()
+    for pos, nome in enumerate(nomes):
+        if mudaram >> pos & 1:
+            done = bool(depois["feitos"] >> pos & 1)
+            barramento.publicar(
+                "item_alternado", data=depois["data"], template=depois["template"], n=pos + 1, item=nome,
+                done=done, timestamp=_horario(depois["data"], depois["horas"][pos]) if done else None,
+                feitos=feitos, total=total, versao=depois["versao"],
+            )
+
+
+def alternar_itens(nome_template: str, numeros, dia: str = None, visto: dict = None) -> dict:
+    """Alterna os itens `numeros` (1, 2, ...) do checklist numa única gravação.
+
+    `visto` é o checklist como a tela o mostrou (padrão: o atual); cada item
+    vai para o contrário do estado visto. A gravação é otimista: só vale se
+    a `versao` do checklist não mudou desde a leitura; se outro terminal
+    gravou no meio, as marcações são refeitas sobre a versão nova, sem
+    desfazer o que ele marcou.
+    """
+    dia = dia or today_str()
+    for _ in range(TENTATIVAS_CONFLITO):
+        reg = get_or_create_checklist(dia, nome_template)
+        feitos, horas = _alternados(reg, visto or reg, numeros)
+        versao = reg.get("versao", 0)
+        with transacao_da_loja():
+            atual = chk_table.get(doc_id=reg.doc_id)
+            if atual is None or atual.get("versao", 0) != versao:
+                continue  # outro terminal gravou entre a leitura e a trava
+            chk_table.update({"feitos": feitos, "horas": horas, "versao": versao + 1}, doc_ids=[reg.doc_id])
+            novo = chk_table.get(doc_id=reg.doc_id)
+            atualizar_resumo(novo)
+        _publicar_alternados(reg, novo)
+        return novo
+    raise ValueError("O checklist foi alterado por outro terminal várias vezes seguidas; tente de novo.")
+
+
+def painel_do_dia(dia: str = None) -> PainelDoDia:
+    """Progresso do dia que se atualiza pelo log de eventos, sem reler o banco."""
+    dia = dia or today_str()
+    leitor = leitor_eventos()  # antes da leitura: o que for gravado no meio é reaplicado pela versão
+    return PainelDoDia(dia, [expandir_checklist(r) for r in checklists_do_dia(dia)], leitor)
+
+
+def checklists_do_dia(dia: str = None):
+    """Checklists iniciados no dia, ordenados pelo nome do modelo."""
+    dia = dia or today_str()
+    registros = {r["template"]: r for r in chk_table.search(data=dia)}
+    if dia < today_str():
+        for reg in arquivo().ler(dia, dia):
+            registros.setdefault(reg["template"], reg)
+    return [registros[t] for t in sorted(registros)]
+
+
+def checklists_no_periodo(de: str = None, ate: str = None):
+    """Checklists do arquivo e da partição quente, em ordem de (data, template).
+
+    Só os meses do intervalo são abertos; se o mesmo checklist estiver nas
+    duas partições (arquivamento interrompido), vale o da partição quente.
+    """
+    quentes = sorted(
+        (r for r in chk_table if (not de or r["data"] >= de) and (not ate or r["data"] <= ate)),
+        key=lambda r: (r["data"], r["template"]),
+    )
+    chaves = {(r["data"], r["template"]) for r in quentes}
+    arquivados = (r for r in arquivo().ler(de, ate) if (r["data"], r["template"]) not in chaves)
+    return heapq.merge(arquivados, quentes, key=lambda r: (r["data"], r["template"]))
+
+
+def historico_execucao(de: str = None, ate: str = None):
+    """(data, template, feitos, total, pct) de cada checklist, por data e modelo.
+
+    Vem da tabela de resumos: não abre o arquivo nem reconta os itens.
+    """
+    for r in resumos_no_periodo(de, ate):
+        yield r["data"], r["template"], r["done"], r["total"], r["pct"]
+
+
+def arquivar_dias_antigos(hoje: str = None) -> int:
+    """Move os checklists anteriores aos últimos `DIAS_QUENTES` dias para o arquivo.
+
+    Roda no máximo uma vez por dia (marcador `arquivado_em`). O arquivo é
+    gravado antes de os registros saírem da partição quente.
+    """
+    hoje = hoje or today_str()
+    if marcador("arquivado_em") == hoje:
+        return 0
+    limite = (date.fromisoformat(hoje) - timedelta(days=max(DIAS_QUENTES, 1) - 1)).isoformat()
+    antigos = [r for r in chk_table if r["data"] < limite]
+    arquivo().acrescentar(antigos)
+    with transacao_da_loja():
+        if antigos:
+            chk_table.remove(doc_ids=[r.doc_id for r in antigos])
+        marcar("arquivado_em", hoje)
+    return len(antigos)
+
+
+# ------------------------- RESUMOS (ROLLUP) ------------------------- #
+def resumo_do_checklist(reg) -> dict:
+    """Linha de resumo: progresso e primeiro/último horário de item marcado."""
+    done, total, pct = checklist_progress(reg)
+    feitos = reg["feitos"]
+    horas = [h for pos, h in enumerate(reg["horas"]) if feitos >> pos & 1 and h is not None]
+    return {
+        "data": reg["data"],
+        "template": reg["template"],
+        "done": done,
+        "total": total,
+        "pct": pct,
+        "primeiro": _horario(reg["data"], min(horas)) if horas else None,
+        "ultimo": _horario(reg["data"], max(horas)) if horas else None,
+    }
+
+
+def atualizar_resumo(reg):
+    """Atualiza o resumo de um checklist (chamado a cada criação/marcação)."""
+    novo = resumo_do_checklist(reg)
+    atual = resumos_table.get(data=reg["data"], template=reg["template"])
+    if atual is None:
+        resumos_table.insert(novo)
+    elif any(atual.get(k) != v for k, v in novo.items()):
+        resumos_table.update(novo, doc_ids=[atual.doc_id])
+
+
+def compactar_checklists() -> int:
+    """Converte os checklists do formato antigo (quentes e arquivados); retorna quantos.
+
+    As revisões dos modelos são gravadas primeiro, então o arquivo nunca
+    aponta para uma revisão inexistente; repetir depois de uma queda só
+    converte o que faltou.
+    """
+    with transacao():
+        for reg in itertools.chain(chk_table, arquivo().ler()):
+            if "itens" in reg:
+                registrar_versao(reg["template"], [it["nome"] for it in reg["itens"]])
+    convertidos = arquivo().converter(compactar_checklist)
+    with transacao_da_loja():
+        antigos = [r for r in chk_table if "itens" in r]
+        if antigos:
+            chk_table.remove(doc_ids=[r.doc_id for r in antigos])
+            chk_table.insert_multiple([compactar_checklist(r) for r in antigos])
+        marcar("checklists_compactos")
+    return convertidos + len(antigos)
+
+
+def reconstruir_resumos() -> int:
+    """Recalcula a tabela de resumos a partir de todos os checklists (arquivo + quentes)."""
+    with transacao_da_loja():
+        resumos_table.truncate()
+        ids = resumos_table.insert_multiple(resumo_do_checklist(r) for r in checklists_no_periodo())
+        marcar("resumos", True)
+    return len(ids)
+
+
+def resumos_no_periodo(de: str = None, ate: str = None):
+    """Resumos entre `de` e `ate` (inclusivas), em ordem de (data, template)."""
+    return sorted(
+        (r for r in resumos_table if (not de or r["data"] >= de) and (not ate or r["data"] <= ate)),
+        key=lambda r: (r["data"], r["template"]),
+    )
+
+
+def _periodo(dia: str, agrupamento: str) -> str:
+    if agrupamento == "mes":
+        return dia[:7]
+    ano, semana, _ = date.fromisoformat(dia).isocalendar()
+    return f"{ano}-S{semana:02d}"
+
+
+def conformidade(agrupamento: str = "semana", de: str = None, ate: str = None):
+    """Conformidade por semana ISO ('2025-S07') ou mês ('2025-02') e modelo.
+
+    Cada linha: periodo, template, checklists, completos (100%), done, total
+    (itens) e pct (itens feitos sobre o total do período).
+    """
+    if agrupamento not in ("semana", "mes"):
+        raise ValueError("Agrupamento deve ser 'semana' ou 'mes'.")
+    grupos = {}
+    for r in resumos_no_periodo(de, ate):
+        chave = (_periodo(r["data"], agrupamento), r["template"])
+        g = grupos.get(chave)
+        if g is None:
+            g = grupos[chave] = {
+                "periodo": chave[0], "template": chave[1],
+                "checklists": 0, "completos": 0, "done": 0, "total": 0,
+            }
+        g["checklists"] += 1
+        g["completos"] += 1 if r["pct"] == 100 else 0
+        g["done"] += r["done"]
+        g["total"] += r["total"]
+    linhas = [grupos[k] for k in sorted(grupos)]
+    for g in linhas:
+        g["pct"] = int(g["done"] * 100 / g["total"]) if g["total"] else 0
+    return linhas
+
+
+def paginar(linhas, pagina: int = 1, por_pagina: int = 20):
+    """Página `pagina` (1, 2, ...) de `linhas`; retorna (itens, total de páginas)."""
+    linhas = list(linhas)
+    paginas = max(1, -(-len(linhas) // por_pagina))
+    pagina = min(max(pagina, 1), paginas)
+    inicio = (pagina - 1) * por_pagina
+    return linhas[inicio:inicio + por_pagina], paginas
+
+
+# ------------------------- ANÁLISE POR ITEM ------------------------- #
+ORDENS_ANALISE = {
+    "modelo": None,
+    "pendentes": lambda r: (-r["pendentes"], r["template"], r["n"]),
+    "atraso": lambda r: (-r["pct_atraso"], -r["atraso_medio_min"], r["template"], r["n"]),
+}
+
+
+def definir_prazo(nome_template: str, prazo: str = None):
+    """Prazo 'HH:MM' para terminar os itens do modelo (None remove); não cria revisão."""
+    modelo = tpl_table.get(nome=nome_template)
+    if not modelo:
+        raise ValueError(f"Template '{nome_template}' não existe.")
+    if prazo:
+        minutos_do_prazo(prazo)  # valida
+    tpl_table.update({"prazo": prazo or None}, doc_ids=[modelo.doc_id])
+
+
+def prazos_dos_modelos() -> dict:
+    return {t["nome"]: t["prazo"] for t in tpl_table.all() if t.get("prazo")}
+
+
+def analise_itens(refazer: bool = False) -> AnaliseItens:
+    """Acumulado por item até ontem; só os dias depois do último processado são lidos.
+
+    O cache fica em `<banco>.analise.json` (por loja); `refazer` descarta o
+    cache e percorre todo o histórico.
+    """
+    caminho = caminho_analise(caminho_da_loja())
+    analise = AnaliseItens() if refazer else AnaliseItens.carregar(caminho)
+    ontem = (date.fromisoformat(today_str()) - timedelta(days=1)).isoformat()
+    if analise.ate is not None and analise.ate >= ontem:
+        return analise
+    de = (date.fromisoformat(analise.ate) + timedelta(days=1)).isoformat() if analise.ate else None
+    for reg in checklists_no_periodo(de, ontem):
+        analise.acumular(reg, itens_do_modelo(reg["template"], reg["rev"]))
+    analise.ate = ontem  # dias sem checklist também ficam processados
+    analise.gravar(caminho)
+    return analise
+
+
+def estatisticas_itens(template: str = None, ordem: str = "modelo", refazer: bool = False):
+    """Linhas por item (ver `dogflow.analise.CAMPOS`), na `ordem` pedida."""
+    if ordem not in ORDENS_ANALISE:
+        raise ValueError(f"Ordem deve ser uma de {', '.join(ORDENS_ANALISE)}.")
+    linhas = analise_itens(refazer).linhas(prazos_dos_modelos(), template)
+    if ORDENS_ANALISE[ordem]:
+        linhas.sort(key=ORDENS_ANALISE[ordem])
+    return linhas
+
+
+# ------------------------- VENDAS & ESTOQUE ------------------------- #
+def importar_vendas(registros, rejeitados) -> tuple:
+    """Agrega as vendas em memória e grava numa transação; retorna (vendas, agregados).
+
+    Cada venda é somada ao agregado (data, produto) e explodida pelos
+    ingredientes da ficha no consumo (data, insumo); cada dia do lote vira
+    um documento (ou é somado ao documento do dia, se já existe). Importar
+    de novo o mesmo conteúdo é recusado.
+    """
+    lote = LoteVendas(fichas_table.all(), {i.doc_id: i["custo_unit"] for i in insumos_table.all()})
+    for venda in transferencia.validar_vendas(registros, lote.produtos(), rejeitados):
+        lote.acrescentar(venda)
+    if not lote.linhas:
+        return 0, 0
+    assinatura = lote.assinatura()
+    with transacao_da_loja():
+        if lotes_vendas_table.get(lote=assinatura):
+            raise ValueError("Estas vendas já foram importadas (mesmo conteúdo).")
+        novos = []
+        for dia in lote.dias():
+            atual = vendas_table.get(data=dia["data"])
+            if atual is None:
+                novos.append(dia)
+            else:
+                vendas_table.update(somar_dia(atual, dia), doc_ids=[atual.doc_id])
+        if novos:
+            vendas_table.insert_multiple(novos)
+        lotes_vendas_table.insert(
+            {"lote": assinatura, "em": datetime.now().isoformat(timespec="seconds"), "vendas": lote.linhas}
+        )
+    return lote.linhas, len(lote)
+
+
+def _dias_no_periodo(de: str = None, ate: str = None):
+    return (r for r in vendas_table if (not de or r["data"] >= de) and (not ate or r["data"] <= ate))
+
+
+def _linha_de_vendas(campo, chave, produtos):
+    soma = {"qtd": 0.0, "receita": 0.0, "custo": 0.0}
+    for valores in produtos:
+        for c in soma:
+            soma[c] += valores[c]
+    return indicadores({campo: chave, **{c: round(v, 2) for c, v in soma.items()}})
+
+
+def vendas_por_produto(de: str = None, ate: str = None):
+    """produto, qtd, receita, custo, margem, margem_pct e food_cost_pct no período."""
+    por_produto = {}
+    for dia in _dias_no_periodo(de, ate):
+        for produto, valores in dia["produtos"].items():
+            por_produto.setdefault(produto, []).append(valores)
+    return [_linha_de_vendas("produto", p, por_produto[p]) for p in sorted(por_produto)]
+
+
+def vendas_por_dia(de: str = None, ate: str = None):
+    """data, qtd, receita, custo, margem, margem_pct e food_cost_pct de cada dia."""
+    dias = sorted(_dias_no_periodo(de, ate), key=lambda r: r["data"])
+    return [_linha_de_vendas("data", dia["data"], dia["produtos"].values()) for dia in dias]
+
+
+def total_de_vendas(linhas) -> dict:
+    return indicadores(
+        {c: round(sum(r[c] for r in linhas), 2) for c in ("qtd", "receita", "custo")}
+    )
+
+
+def registrar_contagem(nome_insumo: str, qtd: float, dia: str = None):
+    """Estoque contado de um insumo ao fim do dia `dia` (padrão: hoje); substitui a do mesmo dia."""
+    ins = find_insumo(nome_insumo)
+    if not ins:
+        raise ValueError(f"Insumo '{nome_insumo}' não existe.")
+    if qtd < 0:
+        raise ValueError("A contagem não pode ser negativa.")
+    dia = date.fromisoformat(dia or today_str()).isoformat()
+    with transacao_da_loja():
+        if contagens_table.get(insumo_id=ins.doc_id, data=dia):
+            contagens_table.update({"qtd": qtd}, insumo_id=ins.doc_id, data=dia)
+        else:
+            contagens_table.insert({"insumo_id": ins.doc_id, "data": dia, "qtd": qtd})
+
+
+def estoque_esperado(ate: str = None):
+    """Estoque teórico de cada insumo ao fim de `ate` (padrão: hoje).
+
+    Última contagem até `ate` menos o consumo teórico dos dias seguintes a
+    ela; sem contagem, `esperado` fica None e a linha mostra só o consumo.
+    """
+    ate = ate or today_str()
+    contagens = {}
+    for c in contagens_table:
+        atual = contagens.get(c["insumo_id"])
+        if c["data"] <= ate and (atual is None or c["data"] > atual["data"]):
+            contagens[c["insumo_id"]] = c
+    consumo = {}
+    for dia in _dias_no_periodo(None, ate):
+        for chave, valores in dia["insumos"].items():
+            iid = int(chave)
+            c = contagens.get(iid)
+            if c is None or dia["data"] > c["data"]:
+                consumo[iid] = consumo.get(iid, 0.0) + valores["qtd"]
+    linhas = []
+    for iid in set(contagens) | set(consumo):
+        ins = insumos_table.get(doc_id=iid)
+        c = contagens.get(iid)
+        gasto = round(consumo.get(iid, 0.0), 4)
+        linhas.append({
+            "insumo": ins["nome"] if ins else "(insumo removido)",
+            "unidade": ins["unidade"] if ins else "",
+            "contado_em": c["data"] if c else None,
+            "contagem": c["qtd"] if c else None,
+            "consumo": gasto,
+            "esperado": round(c["qtd"] - gasto, 4) if c else None,
+        })
+    return sorted(linhas, key=lambda r: r["insumo"].lower())
+
+
+# ------------------------- LOJAS ------------------------- #
+def lojas_cadastradas():
+    """Lojas com banco próprio ao lado do catálogo atual."""
+    return lojas.listar_lojas(DB_PATH)
+
+
+def conformidade_por_loja(de: str = None, ate: str = None):
+    """Conformidade por loja e modelo no período, lendo todas as lojas em paralelo."""
+    if LOJA:
+        banco_da_loja().descarregar()  # os outros processos leem o arquivo, não a memória
+    return lojas.conformidade_por_loja(DB_PATH, de, ate)
+
+
+def separar_loja(loja: str) -> int:
+    """Passa os checklists do banco único para a loja `loja`; retorna quantos.
+
+    Para adotar lojas num banco que já tem histórico: checklists, resumos,
+    vendas, contagens, marcadores de execução e o arquivo mensal vão para o
+    banco da loja, que precisa estar vazio. O banco da loja é gravado antes
+    de o catálogo ser limpo.
+    """
+    global _arquivo
+    if LOJA:
+        raise ValueError("Separe a loja a partir do banco único (sem loja configurada).")
+    path = caminho_loja(DB_PATH, loja)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    destino = abrir_banco(path, journal=JOURNAL)
+    try:
+        if any(len(destino.table(t)) for t in TABELAS_DA_LOJA):
+            raise ValueError(f"A loja '{loja}' já tem checklists ou vendas.")
+        origem = banco()
+        regs = origem.table("checklists").all()
+        with destino.transacao():
+            for t in TABELAS_DA_LOJA:
+                destino.table(t).insert_multiple(dict(r) for r in origem.table(t).all())
+            for chave in MARCADORES_DA_LOJA:
+                doc = origem.table("meta").get(chave=chave)
+                if doc:
+                    destino.table("meta").insert({"chave": chave, "valor": doc["valor"]})
+    finally:
+        destino.close()
+    pasta = caminho_arquivo(DB_PATH)
+    if os.path.isdir(pasta):
+        os.replace(pasta, caminho_arquivo(path))
+    with transacao():
+        for t in TABELAS_DA_LOJA:
+            origem.table(t).truncate()
+        for chave in MARCADORES_DA_LOJA:
+            origem.table("meta").remove(chave=chave)
+    _arquivo = None
+    return len(regs)
+
+
+# ------------------------- IMPORTAÇÃO / EXPORTAÇÃO ------------------------- #
+def importar_insumos(validos):
+    """Upsert por nome numa única transação; recusteia o cardápio se algum custo mudou."""
+    inseridos = atualizados = 0
+    custo_mudou = False
+    with transacao():
+        for r in validos:
+            ins = find_insumo(r["nome"])
+            if not ins:
+                _indexar_insumo(insumos_table.insert(r), r["nome"])
+                inseridos += 1
+            elif ins["unidade"] != r["unidade"] or ins["custo_unit"] != r["custo_unit"]:
+                insumos_table.update(r, doc_ids=[ins.doc_id])
+                custo_mudou = custo_mudou or ins["custo_unit"] != r["custo_unit"]
+                atualizados += 1
+        if custo_mudou:
+            recalcular_cardapio("importação de insumos")
+    return inseridos, atualizados
+
+
+def importar_fichas(validos):
+    """Upsert por nome_prod; sem preço no arquivo, mantém o preço já cadastrado."""
+    inseridos = atualizados = 0
+    with transacao():
+        for f in validos:
+            existente = fichas_table.get(nome_prod=f["nome_prod"])
+            preco = f["preco"] if f["preco"] is not None else (existente or {}).get("preco")
+            salvar_ficha(f["nome_prod"], f["ingredientes"], preco)
+            if existente:
+                atualizados += 1
+            else:
+                inseridos += 1
+    return inseridos, atualizados
+
+
+def importar_templates(validos):
+    inseridos = atualizados = 0
+    with transacao():
+        for t in validos:
+            existente = tpl_table.get(nome=t["nome"])
+            if existente:
+                if existente["itens"] != t["itens"]:
+                    tpl_table.update(_com_revisao(t), doc_ids=[existente.doc_id])
+                    atualizados += 1
+            else:
+                tpl_table.insert(_com_revisao(t))
+                inseridos += 1
+    return inseridos, atualizados
+
+
+def importar_arquivo(entidade: str, caminho: str, formato: str = None):
+    """Importa insumos/fichas/templates/vendas; retorna (inseridos, atualizados, rejeitados).
+
+    Para vendas: (vendas importadas, agregados por dia e produto, rejeitados).
+    """
+    registros = transferencia.ler_registros(caminho, formato)
+    rejeitados = transferencia.Rejeitados()
+    if entidade == "insumos":
+        res = importar_insumos(transferencia.validar_insumos(registros, rejeitados))
+    elif entidade == "fichas":
+        res = importar_fichas(transferencia.validar_fichas(registros, find_insumo, rejeitados))
+    elif entidade == "vendas":
+        res = importar_vendas(registros, rejeitados)
+    else:
+        res = importar_templates(transferencia.validar_templates(registros, rejeitados))
+    return res[0], res[1], rejeitados
+
+
+def exportar_arquivo(entidade: str, caminho: str, formato: str = None) -> int:
+    """Exporta em fluxo; retorna o número de linhas escritas."""
+    if entidade == "insumos":
+        linhas = transferencia.linhas_insumos(insumos_table)
+    elif entidade == "fichas":
+        linhas = transferencia.linhas_fichas(fichas_table, ingredientes_da_ficha)
+    elif entidade == "templates":
+        linhas = transferencia.linhas_templates(tpl_table)
+    elif entidade == "itens":
+        linhas = estatisticas_itens()
+    else:
+        linhas = transferencia.linhas_checklists(map(expandir_checklist, checklists_no_periodo()))
+    campos = transferencia.CAMPOS_EXPORTACAO[entidade]
+    return transferencia.escrever_registros(linhas, caminho, campos, formato)
+
+
+# ------------------------- INICIALIZAÇÃO ------------------------- #
+def inicializar():
+    """Preparação feita antes do primeiro menu: modelos padrão e fichas antigas.
+
+    Depois da primeira vez, só lê a tabela meta (alguns bytes): as demais
+    tabelas são carregadas quando o menu precisar delas.
+    """
+    ensure_default_templates()
+    if not marcador("modelos_versionados"):
+        with transacao():
+            versionar_modelos()
+            marcar("modelos_versionados")
+    if not marcador("fichas_normalizadas"):
+        with transacao():
+            normalizar_fichas()
+            marcar("fichas_normalizadas")
+    if not marcador("checklists_compactos"):
+        compactar_checklists()
+    if not marcador("resumos"):
+        reconstruir_resumos()
+    arquivar_dias_antigos()
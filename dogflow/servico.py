@@ -0,0 +1,462 @@
+"""Modo serviço: API HTTP/JSON para tablets (`python -m dogflow serve`).
+
+Um servidor asyncio, só com a biblioteca padrão, atende dezenas de tablets
+numa máquina pequena. Todo acesso ao banco acontece numa única thread:
+
+- gravações entram numa fila e a tarefa escritora as executa uma de cada
+  vez, cada uma com a sua transação;
+- leituras saem de um cache em memória das respostas já serializadas
+  (com ETag); só a primeira consulta de cada rota vai ao banco, e consultas
+  iguais simultâneas esperam a mesma leitura.
+
+O cache é descartado a cada gravação e quando outro processo muda o banco
+(`Vigia`, consultado a cada segundo). Um tablet que repete a consulta com
+`If-None-Match` recebe 304 sem corpo.
+
+Em vez de consultar de tempos em tempos, o tablet pode abrir
+`GET /api/eventos` (Server-Sent Events) e receber cada evento de
+`dogflow.eventos` assim que é gravado: os deste processo na hora, os de
+outros terminais pelo log de eventos, lido a cada segundo. Conexão parada
+recebe só um comentário de tempos em tempos.
+
+Rotas:
+    GET  /api/templates
+    GET  /api/checklists[?data=AAAA-MM-DD]
+    POST /api/checklists            {"template", "data"?}
+    POST /api/checklists/alternar   {"template", "itens": [n, ...], "data"?, "visto"?}
+    GET  /api/insumos[?busca=]
+    GET  /api/fichas
+    POST /api/fichas/preco          {"produto", "preco" | "margem"}
+    GET  /api/relatorios/historico[?de=&ate=]
+    GET  /api/relatorios/semanal[?de=&ate=]
+    GET  /api/relatorios/mensal[?de=&ate=]
+    GET  /api/relatorios/lojas[?de=&ate=]   (todas as lojas)
+    GET  /api/relatorios/itens[?template=&ordem=modelo|pendentes|atraso]
+    GET  /api/relatorios/vendas[?de=&ate=&por=produto|dia]
+    GET  /api/estoque[?ate=]               (estoque esperado por insumo)
+    GET  /api/eventos               (text/event-stream)
+
+`visto` é o checklist como o tablet o mostrou (ver `negocio.alternar_itens`).
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from dogflow import negocio, transferencia
+from dogflow.eventos import barramento
+
+CORPO_MAXIMO = 1024 * 1024
+RESPOSTAS_EM_CACHE = 256
+INTERVALO_VIGIA = 1.0
+INTERVALO_PING = 15.0
+# Eventos pendentes por ouvinte SSE; um tablet que não lê a tempo é desconectado e reconecta.
+FILA_EVENTOS = 256
+ROTA_EVENTOS = "/api/eventos"
+
+STATUS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class ErroHTTP(Exception):
+    def __init__(self, status: int, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+
+
+# ------------------------- CONSULTAS (thread do banco) ------------------------- #
+def _checklist(reg) -> dict:
+    done, total, pct = negocio.checklist_progress(reg)
+    return {
+        "data": reg["data"], "template": reg["template"], "versao": reg.get("versao", 0),
+        "done": done, "total": total, "pct": pct, "itens": negocio.itens_do_checklist(reg),
+    }
+
+
+def ler_templates(q):
+    return [{"nome": t["nome"], "itens": t["itens"]} for t in negocio.tpl_table.all()]
+
+
+def ler_checklists(q):
+    return [_checklist(r) for r in negocio.checklists_do_dia(q.get("data"))]
+
+
+def ler_insumos(q):
+    insumos = negocio.sugerir_insumos(q["busca"]) if q.get("busca") else negocio.insumos_table.all()
+    return [
+        {"id": i.doc_id, "nome": i["nome"], "unidade": i["unidade"], "custo_unit": i["custo_unit"]}
+        for i in insumos
+    ]
+
+
+def ler_fichas(q):
+    fichas = []
+    for f in negocio.fichas_table.all():
+        custo = negocio.custo_da_ficha(f)
+        preco = f.get("preco")
+        fichas.append({
+            "nome_prod": f["nome_prod"], "custo": custo, "preco": preco,
+            "margem": round((preco - custo) / preco * 100, 2) if preco else None,
+            "ingredientes": negocio.ingredientes_da_ficha(f),
+        })
+    return fichas
+
+
+def ler_historico(q):
+    campos = ("data", "template", "done", "total", "pct")
+    return [dict(zip(campos, h)) for h in negocio.historico_execucao(q.get("de"), q.get("ate"))]
+
+
+def ler_conformidade(agrupamento, q):
+    return negocio.conformidade(agrupamento, q.get("de"), q.get("ate"))
+
+
+def ler_lojas(q):
+    return negocio.conformidade_por_loja(q.get("de"), q.get("ate"))
+
+
+def ler_vendas(q):
+    por = negocio.vendas_por_dia if q.get("por") == "dia" else negocio.vendas_por_produto
+    linhas = por(q.get("de"), q.get("ate"))
+    return {"linhas": linhas, "total": negocio.total_de_vendas(linhas)}
+
+
+def ler_estoque(q):
+    return negocio.estoque_esperado(q.get("ate"))
+
+
+def ler_itens(q):
+    template = negocio.resolver_template(q["template"]) if q.get("template") else None
+    return negocio.estatisticas_itens(template, q.get("ordem") or "modelo")
+
+
+# ------------------------- GRAVAÇÕES (tarefa escritora) ------------------------- #
+def _campo(dados: dict, nome: str):
+    if dados.get(nome) in (None, ""):
+        raise ValueError(f"Campo '{nome}' obrigatório.")
+    return dados[nome]
+
+
+def iniciar_checklist(dados):
+    nome = negocio.resolver_template(str(_campo(dados, "template")))
+    return _checklist(negocio.get_or_create_checklist(dados.get("data") or negocio.today_str(), nome))
+
+
+def alternar(dados):
+    nome = negocio.resolver_template(str(_campo(dados, "template")))
+    itens = _campo(dados, "itens")
+    if not isinstance(itens, list) or not all(isinstance(n, int) for n in itens):
+        raise ValueError("'itens' deve ser uma lista de números.")
+    return _checklist(negocio.alternar_itens(nome, itens, dados.get("data"), visto=dados.get("visto")))
+
+
+def definir_preco(dados):
+    produto = _campo(dados, "produto")
+    preco = transferencia.numero(dados["preco"]) if dados.get("preco") is not None else None
+    margem = transferencia.numero(dados["margem"]) if dados.get("margem") is not None else None
+    custo, preco = negocio.ajustar_preco(produto, preco=preco, margem=margem)
+    return {"produto": produto, "custo": custo, "preco": preco}
+
+
+LEITURAS = {
+    "/api/templates": ler_templates,
+    "/api/checklists": ler_checklists,
+    "/api/insumos": ler_insumos,
+    "/api/fichas": ler_fichas,
+    "/api/relatorios/historico": ler_historico,
+    "/api/relatorios/semanal": functools.partial(ler_conformidade, "semana"),
+    "/api/relatorios/mensal": functools.partial(ler_conformidade, "mes"),
+    "/api/relatorios/lojas": ler_lojas,
+    "/api/relatorios/itens": ler_itens,
+    "/api/relatorios/vendas": ler_vendas,
+    "/api/estoque": ler_estoque,
+}
+
+GRAVACOES = {
+    "/api/checklists": iniciar_checklist,
+    "/api/checklists/alternar": alternar,
+    "/api/fichas/preco": definir_preco,
+}
+
+
+def _serializar(dados):
+    """(etag, corpo) de uma resposta JSON."""
+    corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+    return '"' + hashlib.blake2b(corpo, digest_size=12).hexdigest() + '"', corpo
+
+
+# ------------------------- HTTP ------------------------- #
+async def _ler_pedido(reader):
+    """(método, alvo, cabeçalhos, corpo) do próximo pedido, ou None se a conexão fechou."""
+    linha = await reader.readline()
+    if not linha.strip():
+        return None
+    try:
+        metodo, alvo, versao = linha.decode("latin-1").split()
+    except ValueError:
+        raise ErroHTTP(400, "Linha de pedido inválida.") from None
+    cabecalhos = {"_versao": versao}
+    while True:
+        linha = await reader.readline()
+        if linha in (b"\r\n", b"\n", b""):
+            break
+        nome, _, valor = linha.decode("latin-1").partition(":")
+        cabecalhos[nome.strip().lower()] = valor.strip()
+    try:
+        tamanho = int(cabecalhos.get("content-length") or 0)
+    except ValueError:
+        tamanho = -1
+    if tamanho < 0:
+        raise ErroHTTP(400, "Content-Length inválido.")
+    if tamanho > CORPO_MAXIMO:
+        raise ErroHTTP(413, "Corpo grande demais.")
+    corpo = await reader.readexactly(tamanho) if tamanho else b""
+    return metodo.upper(), alvo, cabecalhos, corpo
+
+
+def _resposta(status: int, corpo: bytes = b"", etag: str = None, manter: bool = True) -> bytes:
+    cabecalhos = [
+        f"HTTP/1.1 {status} {STATUS[status]}",
+        "Content-Type: application/json; charset=utf-8",
+        f"Content-Length: {len(corpo)}",
+        "Cache-Control: no-cache",
+        "Connection: " + ("keep-alive" if manter else "close"),
+    ]
+    if etag:
+        cabecalhos.append(f"ETag: {etag}")
+    return ("\r\n".join(cabecalhos) + "\r\n\r\n").encode("latin-1") + corpo
+
+
+def _erro(status: int, mensagem: str, manter: bool = True) -> bytes:
+    return _resposta(status, json.dumps({"erro": mensagem}, ensure_ascii=False).encode("utf-8"), manter=manter)
+
+
+class Servico:
+    """Servidor HTTP com uma thread de banco, fila de gravações e cache de leituras."""
+
+    def __init__(self):
+        self._banco = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dogflow-banco")
+        self._cache = {}  # (rota, consulta, dia) → (etag, corpo)
+        self._carregando = {}  # chave → Future da leitura em andamento
+        self._geracao = 0  # muda a cada invalidação; leituras antigas não entram no cache
+        self._fila = None
+        self._ouvintes = set()  # filas dos tablets conectados em /api/eventos
+        self.gravacoes = 0
+
+    async def no_banco(self, fn, *args):
+        """Executa `fn` na thread do banco (a única que toca nele)."""
+        return await asyncio.get_running_loop().run_in_executor(self._banco, functools.partial(fn, *args))
+
+    def invalidar(self):
+        self._geracao += 1
+        self._cache.clear()
+
+    # -- leituras -- #
+    async def consultar(self, rota: str, consulta: dict):
+        chave = (rota, tuple(sorted(consulta.items())), negocio.today_str())
+        resposta = self._cache.get(chave)
+        if resposta is not None:
+            return resposta
+        futuro = self._carregando.get(chave)
+        if futuro is None:
+            futuro = asyncio.ensure_future(self._carregar(chave, LEITURAS[rota], consulta))
+            self._carregando[chave] = futuro
+            futuro.add_done_callback(lambda _f: self._carregando.pop(chave, None))
+        return await asyncio.shield(futuro)
+
+    async def _carregar(self, chave, fn, consulta):
+        geracao = self._geracao
+        resposta = await self.no_banco(lambda: _serializar(fn(consulta)))
+        if geracao == self._geracao:
+            if len(self._cache) >= RESPOSTAS_EM_CACHE:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[chave] = resposta
+        return resposta
+
+    # -- gravações -- #
+    async def gravar(self, fn, dados):
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((fn, dados, futuro))
+        return await futuro
+
+    async def _escritor(self):
+        while True:
+            fn, dados, futuro = await self._fila.get()
+            try:
+                resultado = await self.no_banco(lambda: _serializar(fn(dados)))
+            except Exception as e:  # noqa: BLE001 — devolvido ao pedido que gravou
+                if not futuro.done():
+                    futuro.set_exception(e)
+            else:
+                self.gravacoes += 1
+                if not futuro.done():
+                    futuro.set_result(resultado)
+            finally:
+                self.invalidar()
+
+    async def _vigiar(self):
+        vigia = await self.no_banco(negocio.vigia)
+        leitor = await self.no_banco(negocio.leitor_eventos)
+        while True:
+            await asyncio.sleep(INTERVALO_VIGIA)
+            if await self.no_banco(vigia.mudou):
+                self.invalidar()
+            for evento in await self.no_banco(leitor.novos):
+                if evento.get("pid") != os.getpid():  # os nossos já saíram pelo barramento
+                    self._difundir(evento)
+
+    # -- eventos (SSE) -- #
+    def _difundir(self, evento):
+        for fila in list(self._ouvintes):
+            try:
+                fila.put_nowait(evento)
+            except asyncio.QueueFull:
+                self._desligar(fila)  # o tablet reconecta e relê o estado
+
+    def _desligar(self, fila):
+        """Encerra a transmissão que consome `fila`."""
+        self._ouvintes.discard(fila)
+        if fila.full():
+            fila.get_nowait()
+        fila.put_nowait(None)
+
+    async def _transmitir(self, writer):
+        writer.write((
+            "HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n"
+            "Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\nretry: 3000\n\n"
+        ).encode("latin-1"))
+        fila = asyncio.Queue(FILA_EVENTOS)
+        self._ouvintes.add(fila)
+        try:
+            while True:
+                await writer.drain()
+                try:
+                    evento = await asyncio.wait_for(fila.get(), INTERVALO_PING)
+                except asyncio.TimeoutError:
+                    writer.write(b": ping\n\n")
+                    continue
+                if evento is None:
+                    return
+                dados = json.dumps(evento, ensure_ascii=False)
+                quadro = f"id: {evento['pid']}-{evento['seq']}\nevent: {evento['tipo']}\ndata: {dados}\n\n"
+                writer.write(quadro.encode("utf-8"))
+        finally:
+            self._ouvintes.discard(fila)
+
+    # -- conexões -- #
+    async def _responder(self, metodo, alvo, cabecalhos, corpo) -> bytes:
+        partes = urlsplit(alvo)
+        rota = unquote(partes.path).rstrip("/") or "/"
+        consulta = dict(parse_qsl(partes.query))
+        if metodo == "GET" and rota in LEITURAS:
+            etag, dados = await self.consultar(rota, consulta)
+            if cabecalhos.get("if-none-match") == etag:
+                return _resposta(304, etag=etag)
+            return _resposta(200, dados, etag=etag)
+        if metodo == "POST" and rota in GRAVACOES:
+            try:
+                dados = json.loads(corpo or b"{}")
+            except ValueError:
+                raise ErroHTTP(400, "JSON inválido.") from None
+            if not isinstance(dados, dict):
+                raise ErroHTTP(400, "O corpo deve ser um objeto JSON.")
+            _, resultado = await self.gravar(GRAVACOES[rota], dados)
+            return _resposta(200, resultado)
+        if rota in LEITURAS or rota in GRAVACOES:
+            raise ErroHTTP(405, f"Método {metodo} não aceito em {rota}.")
+        raise ErroHTTP(404, f"Rota {rota} não existe.")
+
+    async def atender(self, reader, writer):
+        try:
+            while True:
+                try:
+                    pedido = await _ler_pedido(reader)
+                except ErroHTTP as e:
+                    writer.write(_erro(e.status, str(e), manter=False))
+                    break
+                if pedido is None:
+                    break
+                metodo, alvo, cabecalhos, corpo = pedido
+                if metodo == "GET" and urlsplit(alvo).path.rstrip("/") == ROTA_EVENTOS:
+                    await self._transmitir(writer)  # a conexão fica dedicada aos eventos
+                    break
+                conexao = cabecalhos.get("connection", "").lower()
+                manter = conexao == "keep-alive" or (cabecalhos["_versao"] == "HTTP/1.1" and conexao != "close")
+                try:
+                    resposta = await self._responder(metodo, alvo, cabecalhos, corpo)
+                except ErroHTTP as e:
+                    resposta = _erro(e.status, str(e))
+                except TimeoutError as e:  # banco travado por outro terminal
+                    resposta = _erro(503, str(e))
+                except (OSError, ValueError) as e:
+                    resposta = _erro(400, str(e))
+                except Exception as e:  # noqa: BLE001 — a conexão segue atendendo
+                    resposta = _erro(500, f"{type(e).__name__}: {e}")
+                if not manter:
+                    resposta = resposta.replace(b"Connection: keep-alive", b"Connection: close", 1)
+                writer.write(resposta)
+                await writer.drain()
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def rodar(self, host: str, port: int, pronto=None):
+        await self.no_banco(negocio.inicializar)
+        self._fila = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        local = barramento.assinar(lambda evento: loop.call_soon_threadsafe(self._difundir, evento))
+        tarefas = [asyncio.ensure_future(self._escritor()), asyncio.ensure_future(self._vigiar())]
+        servidor = await asyncio.start_server(self.atender, host, port, backlog=512)
+        parar = asyncio.Event()
+        for nome in ("SIGINT", "SIGTERM"):
+            try:
+                asyncio.get_running_loop().add_signal_handler(getattr(signal, nome), parar.set)
+            except (AttributeError, NotImplementedError, RuntimeError):
+                pass  # Windows: fica o KeyboardInterrupt
+        if pronto:
+            pronto(servidor.sockets[0].getsockname())
+        try:
+            async with servidor:
+                await parar.wait()
+                for fila in list(self._ouvintes):
+                    self._desligar(fila)
+                await asyncio.sleep(0)  # deixa as transmissões fecharem as conexões
+        finally:
+            barramento.cancelar(local)
+            for t in tarefas:
+                t.cancel()
+
+    def fechar(self):
+        self._banco.submit(negocio.fechar).result()
+        self._banco.shutdown()
+
+
+def servir(host: str = "127.0.0.1", port: int = 8080):
+    """Atende até Ctrl+C (ou SIGTERM); o banco é fechado na saída."""
+    servico = Servico()
+
+    def pronto(endereco):
+        print(f"DogFlow servindo em http://{endereco[0]}:{endereco[1]}/api/ (Ctrl+C para sair)", flush=True)
+
+    try:
+        asyncio.run(servico.rodar(host, port, pronto))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servico.fechar()
@@ -0,0 +1,1065 @@
+"""Camada de armazenamento do DogFlow.
+
+As quatro tabelas do sistema (templates, checklists, insumos, fichas) são
+acessadas por uma interface única, com duas implementações:
+
+- `BancoTinyDB`: o arquivo JSON original (`buffet_db.json`), mantido em
+  memória e com índices hash nas chaves de busca;
+- `BancoSQLite`: um documento por linha, modo WAL e índices reais nas chaves
+  de busca — gravar um item custa um UPDATE de uma linha.
+
+`abrir_banco()` escolhe a implementação pela extensão do arquivo. Os dois
+backends oferecem `transacao()` (várias gravações, um único commit durável)
+e `escrita_adiada(janela)` (write-behind: agrupa as gravações da janela).
+
+Vários terminais podem usar o mesmo arquivo JSON (ex.: num compartilhamento
+de rede): cada gravação trava `<banco>.lock` entre a releitura do disco e a
+gravação, e `Vigia` avisa quando outro processo mudou o banco.
+"""
+
+import atexit
+import functools
+import json
+import os
+import shutil
+import signal
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+
+from tinydb import TinyDB, where
+from tinydb.storages import Storage
+
+from dogflow.arquivo import PADRAO_MES, caminho_arquivo
+from dogflow.indices import INDICES, IndiceHash, escolher_indice
+
+# Campos de busca por tabela; no SQLite viram colunas indexadas.
+CHAVES = {
+    "templates": ("nome",),
+    "versoes_modelos": ("nome", "rev"),
+    "checklists": ("data", "template"),
+    "insumos": ("nome",),
+    "fichas": ("nome_prod",),
+    "resumos": ("data", "template"),
+    "vendas_dia": ("data",),
+    "lotes_vendas": ("lote",),
+    "contagens": ("insumo_id", "data"),
+}
+
+EXTENSOES_SQLITE = (".sqlite", ".sqlite3", ".db")
+
+
+class Documento(dict):
+    """Documento de uma tabela: um dict com o `doc_id` da linha."""
+
+    def __init__(self, valor, doc_id):
+        super().__init__(valor)
+        self.doc_id = doc_id
+
+
+# ------------------------- INTERFACE ------------------------- #
+class Tabela:
+    """Interface comum às tabelas de todos os backends.
+
+    Buscas são por igualdade de campos: `tabela.get(nome="Pão 50g")`,
+    `tabela.search(data="2024-05-01")`. `update` e `remove` aceitam
+    `doc_ids=[...]` ou os mesmos filtros por campo.
+    """
+
+    nome = ""
+
+    def all(self):
+        raise NotImplementedError
+
+    def get(self, doc_id=None, **campos):
+        raise NotImplementedError
+
+    def search(self, **campos):
+        raise NotImplementedError
+
+    def insert(self, doc) -> int:
+        raise NotImplementedError
+
+    def insert_multiple(self, docs):
+        return [self.insert(d) for d in docs]
+
+    def update(self, campos, doc_ids=None, **filtro):
+        raise NotImplementedError
+
+    def remove(self, doc_ids=None, **filtro):
+        raise NotImplementedError
+
+    def truncate(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        return len(self.all())
+
+    def __iter__(self):
+        """Percorre os documentos em ordem de doc_id; os backends que podem
+        sobrescrevem para não materializar a tabela inteira."""
+        return iter(self.all())
+
+
+class Banco:
+    """Conjunto de tabelas com o mesmo arquivo de origem."""
+
+    path = ""
+
+    def table(self, nome: str) -> Tabela:
+        raise NotImplementedError
+
+    def tabelas(self):
+        """Nomes das tabelas existentes no banco, em ordem."""
+        raise NotImplementedError
+
+    def transacao(self):
+        """Context manager: as gravações do bloco viram um único commit atômico.
+
+        Ao entrar, gravações adiadas pendentes são descarregadas; ao sair sem
+        erro tudo é gravado de uma vez; com erro, nada do bloco é gravado.
+        """
+        raise NotImplementedError
+
+    def escrita_adiada(self, janela: float):
+        """Ativa o write-behind: gravações fora de transação são agrupadas e
+        descarregadas `janela` segundos após a primeira, ao sair ou num sinal."""
+        raise NotImplementedError
+
+    def descarregar(self):
+        """Grava imediatamente o que estiver pendente no write-behind."""
+
+    def assinatura(self):
+        """Valor barato de obter que muda quando o banco muda no disco
+        (inclusive por outro processo); usado pelo `Vigia`."""
+        return None
+
+    def geracao(self):
+        """Muda quando o banco incorpora gravações de outro processo ou
+        desfaz uma transação — não com as próprias gravações. Estruturas em
+        memória derivadas do banco devem ser reconstruídas quando ela muda."""
+        return None
+
+    def close(self):
+        self.descarregar()
+
+
+# ------------------------- WRITE-BEHIND ------------------------- #
+class EscritaAdiada:
+    """Agenda um descarregamento `janela` segundos após a primeira gravação
+    pendente; também descarrega na saída do processo e em SIGTERM/SIGHUP."""
+
+    def __init__(self, descarregar, janela: float):
+        self.janela = janela
+        self._descarregar = descarregar
+        self._timer = None
+        self._lock = threading.Lock()
+        atexit.register(self._na_saida)
+        _instalar_sinais(self._na_saida)
+
+    def agendar(self):
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.janela, self._disparar)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def cancelar(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _disparar(self):
+        with self._lock:
+            self._timer = None
+        self._descarregar()
+
+    def _na_saida(self):
+        if self._descarregar is not None:
+            self._descarregar()
+
+    def encerrar(self):
+        """Cancela o timer e a descarga na saída (o banco foi fechado)."""
+        self.cancelar()
+        self._descarregar = None
+        atexit.unregister(self._na_saida)
+
+
+def _instalar_sinais(descarregar):
+    for nome in ("SIGTERM", "SIGHUP"):
+        sig = getattr(signal, nome, None)
+        if sig is None:
+            continue
+        anterior = signal.getsignal(sig)
+        if anterior == signal.SIG_IGN:
+            continue
+
+        def tratador(signum, frame, anterior=anterior):
+            descarregar()
+            if callable(anterior):
+                anterior(signum, frame)
+            else:
+                sys.exit(128 + signum)
+
+        try:
+            signal.signal(sig, tratador)
+        except ValueError:
+            pass  # fora da thread principal: fica só o atexit
+
+
+# ------------------------- TRAVA ENTRE PROCESSOS ------------------------- #
+# Segundos esperando outro terminal liberar o banco antes de desistir.
+ESPERA_TRAVA = 10.0
+
+
+def caminho_trava(path: str) -> str:
+    return path + ".lock"
+
+
+class TravaArquivo:
+    """Trava consultiva exclusiva em `<banco>.lock`, reentrante no processo.
+
+    Usa locks POSIX (`fcntl.lockf`, que o NFS e o SMB repassam ao servidor)
+    ou `msvcrt.locking` no Windows. Quem não consegue a trava em
+    `ESPERA_TRAVA` segundos recebe TimeoutError.
+    """
+
+    def __init__(self, path: str, espera: float = None):
+        self.path = path
+        self.espera = ESPERA_TRAVA if espera is None else espera
+        self._lock = threading.RLock()
+        self._nivel = 0
+        self._fh = None
+
+    def _tentar(self) -> bool:
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.lockf(self._fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def _soltar(self):
+        if os.name == "nt":
+            import msvcrt
+
+            self._fh.seek(0)
+            msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.lockf(self._fh.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def __call__(self):
+        with self._lock:
+            if not self._nivel:
+                if self._fh is None:
+                    self._fh = open(self.path, "a+b")
+                limite = time.monotonic() + self.espera
+                while not self._tentar():
+                    if time.monotonic() > limite:
+                        raise TimeoutError(f"Banco em uso por outro terminal ({self.path}); tente de novo.")
+                    time.sleep(0.05)
+            self._nivel += 1
+            try:
+                yield
+            finally:
+                self._nivel -= 1
+                if not self._nivel:
+                    self._soltar()
+
+    def close(self):
+        with self._lock:
+            if self._fh is not None and not self._nivel:
+                self._fh.close()
+                self._fh = None
+
+
+# ------------------------- DETECÇÃO DE MUDANÇAS ------------------------- #
+def assinatura_arquivo(path: str):
+    """(mtime, tamanho, inode): a gravação por temp + rename sempre troca o inode,
+    então duas gravações no mesmo segundo (mtime grosso em rede) são distinguidas."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class Vigia:
+    """Detecta, com um `stat` (ou um PRAGMA no SQLite), que o banco mudou.
+
+    Barato o bastante para ser consultado a cada segundo enquanto a tela
+    espera o usuário; só quando `mudou()` é verdadeiro a tela relê os dados.
+    Aceita mais de um banco (catálogo e loja). Usa polling e não inotify:
+    o inotify não vê gravações feitas por outra máquina num compartilhamento
+    de rede.
+    """
+
+    def __init__(self, *bancos):
+        self._bancos = bancos
+        self._ultima = self._assinatura()
+
+    def _assinatura(self):
+        return tuple(b.assinatura() for b in self._bancos)
+
+    def mudou(self) -> bool:
+        atual = self._assinatura()
+        if atual == self._ultima:
+            return False
+        self._ultima = atual
+        return True
+
+
+# ------------------------- ARQUIVO JSON POR TABELA ------------------------- #
+class TabelasJSON(MutableMapping):
+    """Conteúdo do arquivo JSON, com cada tabela decodificada só no primeiro acesso.
+
+    Tabelas ainda não acessadas ficam como bytes crus e são regravadas como
+    estão — abrir o sistema não custa o parse do histórico inteiro.
+    """
+
+    def __init__(self, brutos=None, tabelas=None):
+        self._brutos = dict(brutos or {})
+        self._tabelas = dict(tabelas or {})
+        self._ordem = list(self._brutos) + [n for n in self._tabelas if n not in self._brutos]
+
+    def __getitem__(self, nome):
+        if nome not in self._tabelas:
+            self._tabelas[nome] = json.loads(bytes(self._brutos.pop(nome)))  # KeyError se não existir
+        return self._tabelas[nome]
+
+    def __setitem__(self, nome, valor):
+        if nome not in self._tabelas and nome not in self._brutos:
+            self._ordem.append(nome)
+        self._brutos.pop(nome, None)
+        self._tabelas[nome] = valor
+
+    def __delitem__(self, nome):
+        if nome not in self._tabelas and nome not in self._brutos:
+            raise KeyError(nome)
+        self._brutos.pop(nome, None)
+        self._tabelas.pop(nome, None)
+        self._ordem.remove(nome)
+
+    def __iter__(self):
+        return iter(list(self._ordem))
+
+    def __len__(self):
+        return len(self._ordem)
+
+    def __contains__(self, nome):
+        return nome in self._tabelas or nome in self._brutos
+
+    def pares(self):
+        """(nome, valor) na ordem do arquivo; o valor é o JSON cru se nunca foi decodificado."""
+        for nome in self._ordem:
+            yield nome, self._tabelas[nome] if nome in self._tabelas else self._brutos[nome]
+
+
+def _separar_linha(conteudo: bytes, ini: int, fim: int):
+    """Linha `"nome": {...},` em conteudo[ini:fim] → (nome, memoryview do valor).
+
+    Devolve None se a linha não tem esse formato. Não copia o valor.
+    """
+    while fim > ini and conteudo[fim - 1] in b",\r":
+        fim -= 1
+    if conteudo[ini:ini + 1] != b'"' or conteudo[fim - 1:fim] != b"}":
+        return None
+    i = ini + 1
+    while i < fim and conteudo[i] != ord('"'):
+        i += 2 if conteudo[i] == ord("\\") else 1
+    if conteudo[i + 1:i + 3] != b": ":
+        return None
+    return json.loads(conteudo[ini:i + 1]), memoryview(conteudo)[i + 3:fim]
+
+
+def ler_tabelas(path: str) -> TabelasJSON:
+    """Lê o arquivo sem decodificar as tabelas (formato de `gravar_tabelas`).
+
+    Arquivos em outro layout (TinyDB original, JSON indentado) são lidos por
+    inteiro, como antes.
+    """
+    with open(path, "rb") as fh:
+        conteudo = fh.read()
+    pos = conteudo.find(b"\n") + 1
+    if pos and conteudo[:pos].strip() == b"{":
+        brutos = {}
+        while True:
+            fim = conteudo.find(b"\n", pos)
+            if fim == -1:
+                fim = len(conteudo)
+            if fim - pos <= 2 and conteudo[pos:fim].strip() == b"}":
+                if not conteudo[fim:].strip():
+                    return TabelasJSON(brutos=brutos)
+                break
+            par = _separar_linha(conteudo, pos, fim)
+            if par is None or fim == len(conteudo):
+                break
+            brutos[par[0]] = par[1]
+            pos = fim + 1
+    return TabelasJSON(tabelas=json.loads(conteudo) if conteudo.strip() else {})
+
+
+def gravar_tabelas(fh, pares):
+    """Grava {nome: tabela} em `fh` (binário) com uma tabela por linha.
+
+    O resultado é JSON comum (o TinyDB lê normalmente), mas permite a
+    `ler_tabelas` separar as tabelas sem decodificá-las. Valores ainda crus
+    (bytes/memoryview) são copiados como estão.
+    """
+    fh.write(b"{")
+    primeiro = True
+    for nome, valor in pares:
+        if not isinstance(valor, (bytes, memoryview)):
+            valor = json.dumps(valor).encode("utf-8")
+        fh.write((b"\n" if primeiro else b",\n") + json.dumps(nome).encode("utf-8") + b": " + valor)
+        primeiro = False
+    fh.write(b"\n}\n")
+
+
+# ------------------------- TINYDB (JSON) ------------------------- #
+def _condicao(campos):
+    cond = None
+    for campo, valor in campos.items():
+        c = where(campo) == valor
+        cond = c if cond is None else (cond & c)
+    return cond
+
+
+class ArmazenamentoJSON(Storage):
+    """Storage do TinyDB com cache: o arquivo só é relido se mudar no disco.
+
+    A mudança é detectada por `assinatura_arquivo`; cada releitura incrementa
+    `geracao`, o que invalida os índices em memória das tabelas. Dentro de uma
+    transação (ou com write-behind) as gravações ficam só em memória até o
+    commit, que grava um arquivo temporário e o renomeia sobre o original.
+    O arquivo é gravado com uma tabela por linha (`gravar_tabelas`) e cada
+    tabela só é decodificada quando alguém a acessa.
+
+    Transações e gravações avulsas seguram a `trava` do arquivo da releitura
+    até a gravação, então dois terminais não sobrescrevem um ao outro. O
+    write-behind guarda gravações em memória fora da trava: é para um único
+    terminal por arquivo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.geracao = 0
+        self.lock = threading.RLock()
+        self.trava = TravaArquivo(caminho_trava(path))
+        self._cache = None
+        self._assinatura = None
+        self._nivel = 0
+        self._pendente = False
+        self._adiada = None
+
+    def _stat(self):
+        return assinatura_arquivo(self.path)
+
+    def read(self):
+        if self._pendente:
+            return self._cache  # a versão em memória é mais nova que o disco
+        assinatura = self._stat()
+        if self._cache is None or assinatura != self._assinatura:
+            dados = TabelasJSON()
+            if assinatura and assinatura[1]:
+                dados = ler_tabelas(self.path)
+            self._cache = dados
+            self._assinatura = assinatura
+            self.geracao += 1
+        return self._cache
+
+    def write(self, data):
+        self._cache = data
+        if self._nivel or self._adiada:
+            self._pendente = True
+            if not self._nivel:
+                self._adiada.agendar()
+            return
+        self._gravar_arquivo(data)
+
+    def _gravar_arquivo(self, data):
+        pasta = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(prefix=".dogflow-", suffix=".tmp", dir=pasta)
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                gravar_tabelas(fh, data.pares() if isinstance(data, TabelasJSON) else data.items())
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._assinatura = self._stat()
+
+    def descarregar(self):
+        with self.lock:
+            if self._adiada:
+                self._adiada.cancelar()
+            if self._pendente and not self._nivel:
+                with self.trava():
+                    self._gravar_arquivo(self._cache)
+                self._pendente = False
+
+    def escrita_adiada(self, janela: float):
+        self._adiada = EscritaAdiada(self.descarregar, janela)
+
+    @contextmanager
+    def gravando(self):
+        """Gravação avulsa: trava o arquivo, a não ser dentro de uma transação
+        (que já o travou) ou com write-behind (que grava depois)."""
+        with self.lock:
+            if self._nivel or self._adiada:
+                yield
+                return
+            with self.trava():
+                yield
+
+    @contextmanager
+    def transacao(self):
+        with self.lock, self.trava():
+            if not self._nivel:
+                self.descarregar()
+            self._nivel += 1
+            try:
+                yield
+            except BaseException:
+                self._nivel -= 1
+                if not self._nivel:
+                    # Descarta a memória: a próxima leitura volta ao disco
+                    # (e a nova geração reconstrói os índices).
+                    self._cache = None
+                    self._pendente = False
+                raise
+            self._nivel -= 1
+            if not self._nivel:
+                self.descarregar()
+
+    def close(self):
+        self.descarregar()
+        if self._adiada:
+            self._adiada.encerrar()
+        self.trava.close()
+
+
+def _travado(metodo):
+    """Executa a operação com o lock do storage (o TinyDB altera o dict em
+    memória entre o read e o write; o timer do write-behind não pode gravar
+    no meio disso)."""
+
+    @functools.wraps(metodo)
+    def envolvido(self, *args, **kwargs):
+        with self._storage.lock:
+            return metodo(self, *args, **kwargs)
+
+    return envolvido
+
+
+def _gravacao(metodo):
+    """Como `_travado`, e também trava o arquivo: a releitura do disco, a
+    mudança e a gravação acontecem sem outro processo no meio."""
+
+    @functools.wraps(metodo)
+    def envolvido(self, *args, **kwargs):
+        with self._storage.gravando():
+            return metodo(self, *args, **kwargs)
+
+    return envolvido
+
+
+class TabelaTinyDB(Tabela):
+    """Tabela TinyDB com índices hash nas chaves de busca (ver `indices.INDICES`)."""
+
+    def __init__(self, tabela, storage):
+        self._t = tabela
+        self._storage = storage
+        self.nome = tabela.name
+        self._indices = [IndiceHash(c) for c in INDICES.get(self.nome, [])]
+        self._geracao = None
+
+    # -- índices -- #
+    def _sincronizar(self):
+        """Reconstrói os índices se o arquivo foi relido desde a última vez."""
+        self._storage.read()
+        if self._geracao == self._storage.geracao:
+            return
+        # Outro processo pode ter inserido documentos: recalcula o próximo id.
+        self._t._next_id = None
+        self._t.clear_cache()
+        pares = [(d.doc_id, d) for d in self._t.all()]
+        for idx in self._indices:
+            idx.construir(pares)
+        self._geracao = self._storage.geracao
+
+    def _indexar(self, doc_id, doc, remover=False):
+        if self._geracao != self._storage.geracao:
+            return  # índices desatualizados: serão reconstruídos na próxima busca
+        for idx in self._indices:
+            (idx.remover if remover else idx.adicionar)(doc_id, doc)
+
+    def _ids(self, campos):
+        """doc_ids que casam com `campos`, ou None se não houver índice."""
+        idx = escolher_indice(self._indices, campos)
+        if idx is None:
+            return None
+        self._sincronizar()
+        return list(idx.buscar(campos))
+
+    # -- leitura -- #
+    @_travado
+    def all(self):
+        return self._t.all()
+
+    @_travado
+    def get(self, doc_id=None, **campos):
+        if doc_id is not None:
+            return self._t.get(doc_id=doc_id)
+        ids = self._ids(campos)
+        if ids is None:
+            return self._t.get(_condicao(campos))
+        return self._t.get(doc_id=ids[0]) if ids else None
+
+    @_travado
+    def search(self, **campos):
+        if not campos:
+            return self._t.all()
+        ids = self._ids(campos)
+        if ids is None:
+            return self._t.search(_condicao(campos))
+        return [self._t.get(doc_id=i) for i in ids]
+
+    # -- escrita -- #
+    def _alvos(self, doc_ids, filtro):
+        if doc_ids is None:
+            doc_ids = self._ids(filtro)
+            if doc_ids is None:
+                return self._t.search(_condicao(filtro))
+        return [d for d in (self._t.get(doc_id=i) for i in doc_ids) if d is not None]
+
+    @_gravacao
+    def insert(self, doc) -> int:
+        self._sincronizar()
+        doc_id = self._t.insert(doc)
+        self._indexar(doc_id, doc)
+        return doc_id
+
+    @_gravacao
+    def insert_multiple(self, docs):
+        self._sincronizar()
+        docs = list(docs)
+        ids = self._t.insert_multiple(docs)
+        for doc_id, doc in zip(ids, docs):
+            self._indexar(doc_id, doc)
+        return ids
+
+    @_gravacao
+    def update(self, campos, doc_ids=None, **filtro):
+        self._sincronizar()
+        alvos = self._alvos(doc_ids, filtro)
+        ids = self._t.update(campos, doc_ids=[d.doc_id for d in alvos])
+        for doc in alvos:
+            self._indexar(doc.doc_id, doc, remover=True)
+            self._indexar(doc.doc_id, {**doc, **campos})
+        return ids
+
+    @_gravacao
+    def remove(self, doc_ids=None, **filtro):
+        self._sincronizar()
+        alvos = self._alvos(doc_ids, filtro)
+        ids = self._t.remove(doc_ids=[d.doc_id for d in alvos])
+        for doc in alvos:
+            self._indexar(doc.doc_id, doc, remover=True)
+        return ids
+
+    @_gravacao
+    def truncate(self):
+        self._t.truncate()
+        for idx in self._indices:
+            idx.limpar()
+
+    @_travado
+    def __len__(self):
+        return len(self._t)
+
+    def __iter__(self):
+        return iter(self._t)
+
+
+class BancoTinyDB(Banco):
+    def __init__(self, path: str):
+        self.path = path
+        self._db = TinyDB(path, storage=ArmazenamentoJSON)
+        self._tabelas = {}
+
+    def table(self, nome: str) -> Tabela:
+        if nome not in self._tabelas:
+            self._tabelas[nome] = TabelaTinyDB(self._db.table(nome), self._db.storage)
+        return self._tabelas[nome]
+
+    def tabelas(self):
+        return sorted(self._db.tables())
+
+    def transacao(self):
+        return self._db.storage.transacao()
+
+    def escrita_adiada(self, janela: float):
+        self._db.storage.escrita_adiada(janela)
+
+    def descarregar(self):
+        self._db.storage.descarregar()
+
+    def assinatura(self):
+        return self._db.storage._stat()
+
+    def geracao(self):
+        storage = self._db.storage
+        with storage.lock:
+            storage.read()  # um `stat`; relê se outro processo gravou
+            return storage.geracao
+
+    def close(self):
+        self._db.close()
+
+
+# ------------------------- SQLITE ------------------------- #
+class TabelaSQLite(Tabela):
+    def __init__(self, banco, nome: str):
+        self._banco = banco
+        self.nome = nome
+        self._chaves = CHAVES.get(nome, ())
+        self._sql = f'"{nome}"'
+        cols = "".join(f', "{c}"' for c in self._chaves)
+        marcas = ", ?" * len(self._chaves)
+        self._sql_insert = f"INSERT INTO {self._sql} (doc_id{cols}, doc) VALUES (?{marcas}, ?)"
+        sets = "".join(f'"{c}" = ?, ' for c in self._chaves)
+        self._sql_update = f"UPDATE {self._sql} SET {sets}doc = ? WHERE doc_id = ?"
+
+    @property
+    def _con(self):
+        return self._banco.con
+
+    def criar(self):
+        cols = "".join(f', "{c}"' for c in self._chaves)
+        self._con.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._sql} "
+            f"(doc_id INTEGER PRIMARY KEY{cols}, doc TEXT NOT NULL)"
+        )
+        if self._chaves:
+            idx = ", ".join(f'"{c}"' for c in self._chaves)
+            self._con.execute(
+                f'CREATE INDEX IF NOT EXISTS "ix_{self.nome}" ON {self._sql} ({idx})'
+            )
+
+    def _where(self, campos):
+        """Monta o WHERE: colunas indexadas quando possível, JSON no resto."""
+        partes, params = [], []
+        for campo, valor in campos.items():
+            if campo in self._chaves:
+                partes.append(f'"{campo}" = ?')
+            else:
+                partes.append(f"json_extract(doc, '$.\"{campo}\"') = ?")
+            params.append(valor)
+        return (" WHERE " + " AND ".join(partes)) if partes else "", params
+
+    def _linhas(self, sql, params=()):
+        with self._banco.lock:
+            return [
+                Documento(json.loads(doc), doc_id)
+                for doc_id, doc in self._con.execute(sql, params)
+            ]
+
+    def _valores(self, doc):
+        return [doc.get(c) for c in self._chaves]
+
+    def all(self):
+        return self._linhas(f"SELECT doc_id, doc FROM {self._sql} ORDER BY doc_id")
+
+    def get(self, doc_id=None, **campos):
+        if doc_id is not None:
+            achados = self._linhas(
+                f"SELECT doc_id, doc FROM {self._sql} WHERE doc_id = ?", (doc_id,)
+            )
+        else:
+            where, params = self._where(campos)
+            achados = self._linhas(
+                f"SELECT doc_id, doc FROM {self._sql}{where} ORDER BY doc_id LIMIT 1", params
+            )
+        return achados[0] if achados else None
+
+    def search(self, **campos):
+        where, params = self._where(campos)
+        return self._linhas(f"SELECT doc_id, doc FROM {self._sql}{where} ORDER BY doc_id", params)
+
+    def insert(self, doc) -> int:
+        doc_id = getattr(doc, "doc_id", None)
+        with self._banco.gravando():
+            cur = self._con.execute(
+                self._sql_insert, [doc_id, *self._valores(doc), json.dumps(doc)]
+            )
+        return cur.lastrowid
+
+    def insert_multiple(self, docs):
+        with self._banco.gravando():
+            return [self.insert(d) for d in docs]
+
+    def _alvos(self, doc_ids, filtro):
+        if doc_ids is not None:
+            return [d for d in (self.get(doc_id=i) for i in doc_ids) if d is not None]
+        return self.search(**filtro)
+
+    def update(self, campos, doc_ids=None, **filtro):
+        ids = []
+        with self._banco.gravando():
+            for doc in self._alvos(doc_ids, filtro):
+                doc.update(campos)
+                self._con.execute(
+                    self._sql_update, [*self._valores(doc), json.dumps(doc), doc.doc_id]
+                )
+                ids.append(doc.doc_id)
+        return ids
+
+    def remove(self, doc_ids=None, **filtro):
+        with self._banco.gravando():
+            ids = [d.doc_id for d in self._alvos(doc_ids, filtro)]
+            self._con.executemany(
+                f"DELETE FROM {self._sql} WHERE doc_id = ?", [(i,) for i in ids]
+            )
+        return ids
+
+    def truncate(self):
+        with self._banco.gravando():
+            self._con.execute(f"DELETE FROM {self._sql}")
+
+    def __len__(self):
+        with self._banco.lock:
+            return self._con.execute(f"SELECT COUNT(*) FROM {self._sql}").fetchone()[0]
+
+    def __iter__(self):
+        """Lê em lotes do cursor: a memória não cresce com o tamanho da tabela."""
+        with self._banco.lock:
+            cur = self._con.execute(f"SELECT doc_id, doc FROM {self._sql} ORDER BY doc_id")
+        while True:
+            with self._banco.lock:
+                lote = cur.fetchmany(500)
+            if not lote:
+                return
+            for doc_id, doc in lote:
+                yield Documento(json.loads(doc), doc_id)
+
+
+class BancoSQLite(Banco):
+    """Banco SQLite em modo WAL; cada tabela é uma tabela SQL de documentos JSON.
+
+    Transações aninhadas usam SAVEPOINT. Cada gravação avulsa é um commit
+    curto: a trava de escrita do SQLite nunca fica com um terminal além da
+    gravação, e quem não a obtém em `ESPERA_TRAVA` segundos recebe
+    TimeoutError, como na trava dos arquivos JSON.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.con = sqlite3.connect(path, timeout=ESPERA_TRAVA, isolation_level=None, check_same_thread=False)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.lock = threading.RLock()
+        self._tabelas = {}
+        self._nivel = 0
+        self._revertidas = 0
+
+    def table(self, nome: str) -> Tabela:
+        with self.lock:
+            if nome not in self._tabelas:
+                t = TabelaSQLite(self, nome)
+                t.criar()
+                self._tabelas[nome] = t
+            return self._tabelas[nome]
+
+    def tables(self):
+        with self.lock:
+            rows = self.con.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def tabelas(self):
+        return self.tables()
+
+    def _iniciar(self):
+        try:
+            self.con.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            raise TimeoutError(f"Banco em uso por outro terminal ({self.path}); tente de novo.") from None
+
+    @contextmanager
+    def gravando(self):
+        """Envolve uma gravação avulsa: entra na transação aberta, se houver;
+        senão faz BEGIN/COMMIT."""
+        with self.lock:
+            if self.con.in_transaction:
+                yield
+                return
+            self._iniciar()
+            try:
+                yield
+            except BaseException:
+                self.con.execute("ROLLBACK")
+                self._revertidas += 1
+                raise
+            self.con.execute("COMMIT")
+
+    @contextmanager
+    def transacao(self):
+        with self.lock:
+            if self._nivel == 0:
+                self._iniciar()
+            else:
+                self.con.execute(f"SAVEPOINT sp{self._nivel}")
+            self._nivel += 1
+            try:
+                yield self
+            except BaseException:
+                self._nivel -= 1
+                self._revertidas += 1
+                if self._nivel == 0:
+                    self.con.execute("ROLLBACK")
+                else:
+                    self.con.execute(f"ROLLBACK TO sp{self._nivel}")
+                    self.con.execute(f"RELEASE sp{self._nivel}")
+                raise
+            self._nivel -= 1
+            self.con.execute("COMMIT" if self._nivel == 0 else f"RELEASE sp{self._nivel}")
+
+    def escrita_adiada(self, janela: float):
+        """No SQLite não há janela: segurar a transação aberta travaria os
+        outros terminais. Os commits avulsos deixam de esperar o fsync
+        (`synchronous=NORMAL`, seguro no WAL); uma queda de energia pode
+        perder os últimos, como no write-behind, mas nunca corrompe o banco."""
+        with self.lock:
+            self.con.execute("PRAGMA synchronous=NORMAL")
+
+    def assinatura(self):
+        # data_version só muda com commits de outras conexões.
+        with self.lock:
+            return self.con.execute("PRAGMA data_version").fetchone()[0]
+
+    def geracao(self):
+        return self.assinatura(), self._revertidas
+
+    def close(self):
+        self.con.close()
+
+
+# ------------------------- ABERTURA & MIGRAÇÃO ------------------------- #
+def abrir_banco(path: str, escrita_adiada: float = 0, journal: bool = False, somente_leitura: bool = False) -> Banco:
+    """Abre o banco escolhendo o backend pela extensão do arquivo.
+
+    `escrita_adiada` > 0 ativa o write-behind com essa janela (segundos).
+    `journal` usa o modo JSON com journal (ver `dogflow.journal`); se já
+    existir um journal ao lado do arquivo, esse modo é usado de qualquer
+    forma, para não ignorar mutações ainda não compactadas. Com
+    `somente_leitura` o journal é lido mas nunca compactado nem cortado:
+    para ler o banco que outro terminal está usando.
+    """
+    from dogflow.journal import BancoJournal, caminho_journal  # evita import circular
+
+    pendente = os.path.exists(caminho_journal(path)) and os.path.getsize(caminho_journal(path))
+    if path.lower().endswith(EXTENSOES_SQLITE):
+        banco = BancoSQLite(path)
+    elif journal or pendente:
+        banco = BancoJournal(path, somente_leitura=somente_leitura)
+    else:
+        banco = BancoTinyDB(path)
+    if escrita_adiada:
+        banco.escrita_adiada(escrita_adiada)
+    return banco
+
+
+def migrar_json_para_sqlite(origem: str, destino: str, sobrescrever: bool = False) -> dict:
+    """Copia um `buffet_db.json` (formato TinyDB) para um banco SQLite.
+
+    A origem é lida como `abrir_banco` a abriria (com o journal ainda não
+    compactado, se houver), sem ser alterada. Os `doc_id` originais são
+    preservados e os meses arquivados (`<origem>.arquivo`) vão junto para
+    `<destino>.arquivo`. Retorna a contagem por tabela e, em "arquivo", o
+    número de meses copiados.
+    """
+    from dogflow.journal import TABELA_META  # evita import circular
+
+    pasta_origem, pasta_destino = caminho_arquivo(origem), caminho_arquivo(destino)
+    meses = _meses_arquivados(pasta_origem)
+    if _meses_arquivados(pasta_destino) and not sobrescrever:
+        raise ValueError(f"Já existe um arquivo de checklists em {pasta_destino}.")
+    fonte = abrir_banco(origem, somente_leitura=True)
+    try:
+        with fonte.transacao():
+            dados = {nome: fonte.table(nome).all() for nome in fonte.tabelas() if nome != TABELA_META}
+    finally:
+        fonte.close()
+
+    banco = BancoSQLite(destino)
+    try:
+        contagem = {}
+        with banco.transacao():
+            for nome, docs in dados.items():
+                if not docs and nome == "_default":
+                    continue
+                tabela = banco.table(nome)
+                if len(tabela) and not sobrescrever:
+                    raise ValueError(f"Tabela '{nome}' já tem dados em {destino}.")
+                tabela.truncate()
+                for doc in docs:
+                    tabela.insert(doc)
+                contagem[nome] = len(docs)
+    finally:
+        banco.close()
+
+    if meses or os.path.isdir(pasta_destino):
+        os.makedirs(pasta_destino, exist_ok=True)
+        for nome in _meses_arquivados(pasta_destino):
+            if nome not in meses:
+                os.remove(os.path.join(pasta_destino, nome))
+        for nome in meses:
+            tmp = os.path.join(pasta_destino, nome + ".tmp")
+            shutil.copy2(os.path.join(pasta_origem, nome), tmp)
+            os.replace(tmp, os.path.join(pasta_destino, nome))
+    contagem["arquivo"] = len(meses)
+    return contagem
+
+
+def _meses_arquivados(pasta: str):
+    if not os.path.isdir(pasta):
+        return []
+    return sorted(nome for nome in os.listdir(pasta) if PADRAO_MES.match(nome))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migra buffet_db.json para SQLite.")
+    parser.add_argument("origem", nargs="?", default="buffet_db.json")
+    parser.add_argument("destino", nargs="?", default="buffet_db.sqlite3")
+    parser.add_argument("--sobrescrever", action="store_true")
+    args = parser.parse_args()
+    if not os.path.exists(args.origem) and not os.path.exists(args.origem + ".journal"):
+        sys.exit(f"Arquivo não encontrado: {args.origem}")
+    contagem = migrar_json_para_sqlite(args.origem, args.destino, args.sobrescrever)
+    meses = contagem.pop("arquivo")
+    for tabela, n in contagem.items():
+        print(f"{tabela}: {n} registro(s)")
+    print(f"arquivo: {meses} mês(es)")
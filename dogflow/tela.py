@@ -0,0 +1,488 @@
+"""Desenho das telas do terminal: caixas, menus e paginação.
+
+As caixas são geradas linha a linha (`linhas_caixa`) a partir de um
+iterável, então uma listagem longa não precisa ser montada inteira na
+memória. O `Paginador` formata e quebra só os itens da página visível,
+com a altura e a largura medidas do terminal.
+
+O `Terminal` limpa a tela com sequências ANSI (sem abrir um shell) e
+redesenha só o que mudou; sem TTY (saída redirecionada, NO_COLOR,
+TERM=dumb) as cores são desligadas e nada é apagado.
+"""
+
+import functools
+import os
+import re
+import shutil
+import sys
+import textwrap
+from collections.abc import Sequence
+
+
+# ------------------------- CORES ANSI ------------------------- #
+def _ativar_vt_windows() -> bool:
+    """Liga o processamento de sequências ANSI no console do Windows 10+."""
+    try:
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        modo = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(modo)):
+            return False
+        return bool(kernel32.SetConsoleMode(handle, modo.value | 0x0004))  # VT_PROCESSING
+    except (AttributeError, OSError):
+        return False
+
+
+def _suporta_ansi() -> bool:
+    if os.environ.get("TERM") == "dumb" or not sys.stdout.isatty():
+        return False
+    return _ativar_vt_windows() if os.name == "nt" else True
+
+
+ANSI = _suporta_ansi()
+CORES = ANSI and not os.environ.get("NO_COLOR")
+
+
+def _cor(codigo: str) -> str:
+    return codigo if CORES else ""
+
+
+RESET = _cor("\033[0m")
+BOLD = _cor("\033[1m")
+RED = _cor("\033[91m")
+GREEN = _cor("\033[92m")
+YELLOW = _cor("\033[93m")
+BLUE = _cor("\033[94m")
+CYAN = _cor("\033[96m")
+
+LARGURA_MIN, LARGURA_MAX = 40, 100
+
+
+def largura_terminal() -> int:
+    """Largura útil para as caixas (colunas do terminal, entre 40 e 100)."""
+    colunas = shutil.get_terminal_size((80, 24)).columns
+    return max(LARGURA_MIN, min(LARGURA_MAX, colunas - 1))
+
+
+def altura_terminal() -> int:
+    return shutil.get_terminal_size((80, 24)).lines
+
+
+# ------------------------- LARGURA VISÍVEL ------------------------- #
+_SGR = re.compile(r"\x1b\[[0-9;]*m")
+RESET_SGR = "\x1b[0m"
+
+
+def largura_visivel(texto: str) -> int:
+    """Colunas ocupadas na tela, sem contar os códigos de cor."""
+    return len(_SGR.sub("", texto)) if "\x1b" in texto else len(texto)
+
+
+def _centralizar(texto: str, width: int, preenchimento: str) -> str:
+    falta = width - largura_visivel(texto)
+    if falta <= 0:
+        return texto
+    esq = falta // 2 + (falta & width & 1)  # mesmo arredondamento de str.center
+    return preenchimento * esq + texto + preenchimento * (falta - esq)
+
+
+def _fechar(texto: str) -> str:
+    """Garante que a cor não vaze para a borda da caixa."""
+    codigos = _SGR.findall(texto)
+    return texto + RESET_SGR if codigos and codigos[-1] != RESET_SGR else texto
+
+
+def _quebrar_colorido(linha: str, width: int):
+    """textwrap para linhas com códigos de cor: mede cada palavra uma vez,
+    sem os códigos, e fecha/reabre a cor aberta na quebra de linha."""
+    linhas, atual, usado, cor = [], [], 0, ""
+    for palavra in linha.split(" "):
+        codigos = _SGR.findall(palavra)
+        w = largura_visivel(palavra)
+        if atual and usado + 1 + w > width:
+            linhas.append((_fechar(" ".join(atual)), usado))
+            atual, usado = [cor] if cor else [], 0
+        if w > width:  # palavra maior que a linha: corta sem os códigos
+            palavra = _SGR.sub("", palavra)
+            while len(palavra) > width:
+                linhas.append((_fechar(cor + palavra[:width]), width))
+                palavra = palavra[width:]
+            w = len(palavra)
+        if atual and (usado or atual != [cor]):
+            usado += 1
+            atual.append(palavra)
+        else:
+            atual = [cor + palavra] if cor else [palavra]
+        usado += w
+        for codigo in codigos:
+            cor = "" if codigo == RESET_SGR else codigo
+    linhas.append((_fechar(" ".join(atual)), usado))
+    return linhas
+
+
+def quebrar(linha: str, width: int):
+    """Gera (texto, colunas visíveis) das linhas quebradas em `width` colunas."""
+    if "\x1b" not in linha:
+        if len(linha) <= width and "\t" not in linha:  # cabe: o textwrap só tiraria o espaço final
+            linha = linha.rstrip()
+            yield linha, len(linha)
+            return
+        for wrapped in textwrap.wrap(linha, width=width, replace_whitespace=False) or [""]:
+            yield wrapped, len(wrapped)
+    else:
+        usado = largura_visivel(linha)  # medida uma vez; reaproveitada se a linha couber
+        if usado <= width and "\t" not in linha:
+            yield _fechar(linha), usado
+            return
+        yield from _quebrar_colorido(linha, width)
+
+
+# ------------------------- CAIXAS ------------------------- #
+# Caixas desenhadas mantidas em memória (menus e telas fixas voltam sempre
+# iguais); corpos maiores que CORPO_MAX_EM_CACHE são desenhados sem cache.
+CAIXAS_EM_CACHE = 256
+CORPO_MAX_EM_CACHE = 8192
+
+
+def linhas_do_corpo(linha: str, width: int):
+    """Quebra uma linha lógica nas linhas internas da caixa."""
+    for wrapped, usado in quebrar(linha, width - 4):
+        yield "║ " + wrapped + " " * (width - 4 - usado) + " ║"
+
+
+def topo(title: str, width: int):
+    title = f" {title.strip()} "
+    yield BLUE + "╔" + "═" * (width - 2) + "╗" + RESET
+    yield "║" + BOLD + CYAN + _centralizar(title, width - 2, "═") + RESET + "║"
+    yield "║" + " " * (width - 2) + "║"
+
+
+def base(width: int):
+    yield "║" + " " * (width - 2) + "║"
+    yield BLUE + "╚" + "═" * (width - 2) + "╝" + RESET
+
+
+def secao(title: str, width: int) -> str:
+    """Separador com título dentro da caixa (um bloco de uma listagem)."""
+    return "╟" + f" {title.strip()} ".center(width - 2, "─") + "╢"
+
+
+def linhas_caixa(title: str, linhas, width: int = None):
+    """Gera as linhas da caixa sob demanda a partir de um iterável de linhas."""
+    width = width or largura_terminal()
+    yield from topo(title, width)
+    for linha in linhas:
+        yield from linhas_do_corpo(linha, width)
+    yield from base(width)
+
+
+def _desenhar_caixa(title: str, body: str, width: int) -> str:
+    linhas = [l for l in body.splitlines() if l.strip()] if body else []
+    return "\n".join(linhas_caixa(title, linhas, width))
+
+
+_caixa_em_cache = functools.lru_cache(maxsize=CAIXAS_EM_CACHE)(_desenhar_caixa)
+
+
+def boxed(title: str, body: str = "", width: int = None) -> str:
+    """Desenha uma caixa com título e corpo opcional (agora com cores)."""
+    width = width or largura_terminal()
+    if len(body) > CORPO_MAX_EM_CACHE:
+        return _desenhar_caixa(title, body, width)
+    return _caixa_em_cache(title, body, width)
+
+
+@functools.lru_cache(maxsize=64)
+def quadro_menu(options: tuple, title: str, width: int) -> str:
+    """Menu já desenhado; os menus são fixos, então cada um é montado uma vez por largura."""
+    body = []
+    for key, label in options:
+        body.append(f"{YELLOW}[{key}]{RESET} {label}")
+    return boxed(title, "\n".join(body), width)
+
+
+def menu_box(options, title="MENU PRINCIPAL"):
+    """Mostra um menu com as opções coloridas."""
+    mostrar(quadro_menu(tuple(options), title, largura_terminal()))
+
+
+# ------------------------- PAGINAÇÃO ------------------------- #
+class _ListaPreguicosa:
+    """Acesso por índice a um iterador, consumindo-o só até onde for pedido."""
+
+    def __init__(self, iteravel):
+        self._it = iter(iteravel)
+        self._vistos = []
+
+    def __getitem__(self, i):
+        while len(self._vistos) <= i:
+            try:
+                self._vistos.append(next(self._it))
+            except StopIteration:
+                raise IndexError(i) from None
+        return self._vistos[i]
+
+
+class Paginador:
+    """Páginas de uma listagem, formatadas sob demanda.
+
+    `itens` pode ser uma sequência (ex.: linhas do resumo) ou um iterador;
+    `formatar(item)` devolve as linhas lógicas de um item, e uma linha que
+    começa com `SECAO` vira um separador com título. `chave(item)` (opcional,
+    crescente ao longo dos itens) permite saltar para uma data.
+    """
+
+    SECAO = "\x00"
+
+    def __init__(self, itens, formatar, chave=None, altura: int = None, largura: int = None):
+        self._sequencia = isinstance(itens, Sequence)
+        self._itens = itens if self._sequencia else _ListaPreguicosa(itens)
+        self._formatar = formatar
+        self.chave = chave
+        self.altura = altura or max(5, altura_terminal() - 16)
+        self.largura = largura or largura_terminal()
+        self._inicios = [(0, 0)]  # (item, linha dentro do item) de cada página visitada
+        self.fim = False
+
+    def _item(self, i):
+        try:
+            return self._itens[i]
+        except IndexError:
+            return None
+
+    def _linhas_item(self, item):
+        linhas = []
+        for logica in self._formatar(item):
+            if logica.startswith(self.SECAO):
+                linhas.append(secao(logica[1:], self.largura))
+            else:
+                linhas.extend(linhas_do_corpo(logica, self.largura))
+        return linhas
+
+    def pagina(self):
+        """Linhas internas (já com bordas laterais) da página atual."""
+        i, desloc = self._inicios[-1]
+        saida = []
+        while len(saida) < self.altura:
+            item = self._item(i)
+            if item is None:
+                self.fim = True
+                self._proximo = None
+                return saida
+            linhas = self._linhas_item(item)[desloc:]
+            cabe = self.altura - len(saida)
+            saida.extend(linhas[:cabe])
+            if len(linhas) > cabe:
+                self._proximo = (i, desloc + cabe)
+                break
+            i, desloc = i + 1, 0
+            self._proximo = (i, 0)
+        self.fim = self._item(self._proximo[0]) is None
+        return saida
+
+    @property
+    def numero(self) -> int:
+        return len(self._inicios)
+
+    def avancar(self) -> bool:
+        if self.fim:
+            return False
+        self._inicios.append(self._proximo)
+        return True
+
+    def voltar(self) -> bool:
+        if len(self._inicios) == 1:
+            return False
+        self._inicios.pop()
+        return True
+
+    def saltar(self, alvo) -> bool:
+        """Vai para a página que começa no primeiro item com chave >= `alvo`."""
+        if self.chave is None:
+            return False
+        if self._sequencia:
+            i = _bisect(self._itens, alvo, self.chave)
+        else:
+            i = 0
+            while self._item(i) is not None and self.chave(self._item(i)) < alvo:
+                i += 1
+        if self._item(i) is None:
+            return False
+        self._inicios.append((i, 0))
+        return True
+
+    def desenhar(self, title: str) -> str:
+        """Caixa da página atual; o custo depende só do tamanho da página."""
+        linhas = self.pagina()
+        title = f"{title} – página {self.numero}" + (" (fim)" if self.fim else "")
+        return "\n".join([*topo(title, self.largura), *linhas, *base(self.largura)])
+
+
+def _bisect(itens, alvo, chave):
+    """bisect_left por `chave` (o parâmetro key do bisect só existe no Python 3.10+)."""
+    lo, hi = 0, len(itens)
+    while lo < hi:
+        meio = (lo + hi) // 2
+        if chave(itens[meio]) < alvo:
+            lo = meio + 1
+        else:
+            hi = meio
+    return lo
+
+
+# ------------------------- TERMINAL ------------------------- #
+class _SaidaVigiada:
+    """Envolve o sys.stdout para o Terminal saber o que foi escrito na tela."""
+
+    def __init__(self, terminal, real):
+        self._terminal = terminal
+        self._real = real
+
+    def write(self, texto):
+        self._terminal._antes_de_escrever()
+        self._terminal._contar(texto)
+        return self._real.write(texto)
+
+    def flush(self):
+        # input() chama flush antes de escrever o prompt direto no console:
+        # conta a linha do prompt + o Enter do usuário.
+        self._terminal._antes_de_escrever()
+        self._terminal._linhas += 1
+        return self._real.flush()
+
+    def __getattr__(self, nome):
+        return getattr(self._real, nome)
+
+
+class Terminal:
+    """Tela interativa que redesenha só o que mudou.
+
+    Na primeira vez (ou se a tela rolou ou mudou de tamanho) `limpar()`
+    apaga tudo e escreve o cabeçalho. Nas seguintes, o cabeçalho continua
+    na tela: o cursor vai para a linha logo abaixo dele e o resto é apagado
+    só na próxima escrita. `mostrar(quadro)` pula as linhas iniciais iguais
+    às do quadro anterior, então voltar ao mesmo menu não reescreve nada.
+    Sem ANSI, `limpar()` só separa as telas com uma linha em branco.
+    """
+
+    def __init__(self, saida=None, ansi: bool = None):
+        self.saida = saida or sys.stdout
+        self.ansi = ANSI if ansi is None else ansi
+        self._cabecalho = None  # cabeçalho que está no topo da tela
+        self._tamanho = None
+        self._linhas = 0  # linhas da tela ocupadas desde o último redesenho completo
+        self._anterior = None  # linhas do quadro logo abaixo do cabeçalho
+        self._pendente = False  # corpo a apagar antes da próxima escrita
+        self._vigiando = False
+
+    def instalar(self):
+        """Passa a observar o sys.stdout (necessário para o redesenho parcial)."""
+        if self.ansi and not self._vigiando:
+            self.saida = sys.stdout
+            sys.stdout = _SaidaVigiada(self, self.saida)
+            self._vigiando = True
+
+    def _escrever(self, texto: str):
+        self._contar(texto)
+        self.saida.write(texto)
+
+    def _contar(self, texto: str):
+        colunas = (self._tamanho or (80, 24))[0]
+        self._linhas += texto.count("\n") + sum(len(l) // colunas for l in texto.split("\n"))
+
+    def _antes_de_escrever(self):
+        if self._pendente:
+            self._pendente = False
+            self._anterior = None
+            self.saida.write("\033[J")
+
+    def limpar(self, cabecalho: str = ""):
+        if not self.ansi:
+            if self._cabecalho is None:
+                self.saida.write(cabecalho)
+                self._cabecalho = cabecalho
+            else:
+                self.saida.write("\n")
+            return
+        tamanho = tuple(shutil.get_terminal_size((80, 24)))
+        altura = cabecalho.count("\n")
+        parcial = (
+            self._vigiando
+            and cabecalho == self._cabecalho
+            and tamanho == self._tamanho
+            and self._linhas < tamanho[1]  # nada rolou para fora da tela
+        )
+        if parcial:
+            self.saida.write(f"\033[{altura + 1};1H")
+        else:
+            self._tamanho = tamanho
+            self._linhas = 0
+            self._anterior = None
+            self.saida.write("\033[H\033[2J")
+            self._escrever(cabecalho)
+            self._cabecalho = cabecalho
+        self._linhas = altura
+        self._pendente = True
+        self.saida.flush()
+
+    def mostrar(self, quadro: str):
+        """Escreve um quadro; logo após `limpar()`, só a parte que mudou."""
+        linhas = quadro.split("\n")
+        if not self._pendente:
+            self._escrever(quadro + "\n")
+            self._anterior = None
+            return
+        self._pendente = False
+        anterior = self._anterior or []
+        comum = 0
+        for nova, velha in zip(linhas, anterior):
+            if nova != velha:
+                break
+            comum += 1
+        if comum:
+            self.saida.write(f"\033[{comum}B")
+            self._linhas += comum
+        self.saida.write("\033[J")
+        if comum < len(linhas):
+            self._escrever("\n".join(linhas[comum:]) + "\n")
+        self._anterior = linhas
+
+
+def ler(prompt: str = "", mudou=None, intervalo: float = 1.0):
+    """`input()` que devolve None se `mudou()` ficar verdadeiro antes da resposta.
+
+    Consultado a cada `intervalo` segundos enquanto o usuário não responde,
+    para a tela se redesenhar com dados de outro terminal. Sem TTY ou no
+    Windows (onde o `select` não aceita o console) é um `input()` comum.
+    """
+    if mudou is None or not ANSI or os.name == "nt" or not sys.stdin.isatty():
+        return input(prompt)
+    import select
+
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    while True:
+        pronto, _, _ = select.select([sys.stdin], [], [], intervalo)
+        if pronto:
+            linha = sys.stdin.readline()
+            if not linha:
+                raise EOFError
+            return linha.rstrip("\n")
+        if mudou():
+            return None
+
+
+_terminal = None
+
+
+def terminal() -> Terminal:
+    global _terminal
+    if _terminal is None:
+        _terminal = Terminal()
+    return _terminal
+
+
+def mostrar(quadro: str):
+    terminal().mostrar(quadro)
@@ -0,0 +1,310 @@
+"""Importação e exportação em lote (CSV, JSON e JSON Lines).
+
+Leitura e escrita são em fluxo: as linhas são lidas, validadas e gravadas
+uma a uma, então exportar anos de checklists não carrega o histórico na
+memória. O formato vem da extensão (`.csv`, `.json`, `.jsonl`) ou do
+parâmetro `formato` (obrigatório para `-`, stdin/stdout).
+
+Layouts aceitos na importação:
+- insumos:   nome, unidade, custo_unit
+- fichas:    nome_prod, insumo, qtd, preco — uma linha por ingrediente; em
+             JSON também {"nome_prod", "preco", "ingredientes": [{"insumo", "qtd"}]}
+- templates: nome, item — uma linha por item; em JSON também {"nome", "itens": [...]}
+- vendas:    data, produto, qtd, valor — uma linha por venda (export do PDV);
+             `qtd` padrão 1; `valor` é o total da linha (ou `preco` unitário;
+             sem nenhum dos dois, vale o preço da ficha)
+
+Este módulo só lê, valida e escreve arquivos; a gravação no banco (upsert
+por nome numa única transação) fica com a aplicação.
+"""
+
+import csv
+import json
+import sys
+from datetime import date
+
+from dogflow import analise
+
+FORMATOS = ("csv", "json", "jsonl")
+
+CAMPOS_EXPORTACAO = {
+    "insumos": ["nome", "unidade", "custo_unit"],
+    "fichas": ["nome_prod", "insumo", "unidade", "qtd", "preco", "custo"],
+    "templates": ["nome", "item"],
+    "checklists": ["data", "template", "n", "item", "done", "timestamp"],
+    "itens": analise.CAMPOS,
+}
+
+
+def detectar_formato(caminho: str, formato: str = None) -> str:
+    if formato:
+        return formato
+    ext = caminho.rsplit(".", 1)[-1].lower() if "." in caminho else ""
+    if ext not in FORMATOS:
+        raise ValueError(f"Formato não reconhecido para '{caminho}'; use --formato.")
+    return ext
+
+
+def numero(valor) -> float:
+    """Converte '1,20', '1.234,50' ou 1.2 em float."""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return float(valor)
+    texto = str(valor).strip().replace("R$", "").strip()
+    if "," in texto and "." in texto:
+        texto = texto.replace(".", "")
+    try:
+        return float(texto.replace(",", "."))
+    except ValueError:
+        raise ValueError(f"número inválido: {valor!r}") from None
+
+
+# ------------------------- LEITURA ------------------------- #
+def _abrir_leitura(caminho):
+    if caminho == "-":
+        return sys.stdin, False
+    return open(caminho, encoding="utf-8-sig", newline=""), True
+
+
+def ler_registros(caminho: str, formato: str = None):
+    """Gera (número da linha/registro, dict) de um arquivo CSV/JSON/JSONL."""
+    formato = detectar_formato(caminho, formato)
+    fh, fechar = _abrir_leitura(caminho)
+    try:
+        if formato == "csv":
+            cabecalho = fh.readline()
+            delim = ";" if cabecalho.count(";") > cabecalho.count(",") else ","
+            campos = [c.strip().lower() for c in next(csv.reader([cabecalho], delimiter=delim), [])]
+            for n, linha in enumerate(csv.reader(fh, delimiter=delim), start=2):
+                if not any(c.strip() for c in linha):
+                    continue
+                yield n, dict(zip(campos, (c.strip() for c in linha)))
+        elif formato == "jsonl":
+            for n, linha in enumerate(fh, start=1):
+                if linha.strip():
+                    yield n, json.loads(linha)
+        else:
+            dados = json.load(fh)
+            for n, reg in enumerate(dados if isinstance(dados, list) else [dados], start=1):
+                yield n, reg
+    finally:
+        if fechar:
+            fh.close()
+
+
+# ------------------------- VALIDAÇÃO ------------------------- #
+class Rejeitados(list):
+    """Lista de (linha, motivo, registro) das linhas recusadas."""
+
+    def anotar(self, linha, motivo, registro):
+        self.append((linha, motivo, registro))
+
+    def gravar(self, caminho: str):
+        with open(caminho, "w", encoding="utf-8", newline="") as fh:
+            w = csv.writer(fh)
+            w.writerow(["linha", "motivo", "registro"])
+            for linha, motivo, registro in self:
+                w.writerow([linha, motivo, json.dumps(registro, ensure_ascii=False)])
+
+
+def validar_insumos(registros, rejeitados: Rejeitados):
+    """Gera {nome, unidade, custo_unit} válidos; o resto vai para `rejeitados`."""
+    for n, reg in registros:
+        if not isinstance(reg, dict):
+            rejeitados.anotar(n, "registro não é um objeto", reg)
+            continue
+        nome = str(reg.get("nome") or "").strip()
+        if not nome:
+            rejeitados.anotar(n, "nome vazio", reg)
+            continue
+        try:
+            custo = numero(reg.get("custo_unit", ""))
+        except ValueError as e:
+            rejeitados.anotar(n, f"custo_unit: {e}", reg)
+            continue
+        if custo < 0:
+            rejeitados.anotar(n, "custo_unit negativo", reg)
+            continue
+        unidade = str(reg.get("unidade") or "").strip() or "un"
+        yield {"nome": nome, "unidade": unidade, "custo_unit": custo}
+
+
+def validar_fichas(registros, achar_insumo, rejeitados: Rejeitados):
+    """Agrupa ingredientes por produto e resolve os insumos pelo nome.
+
+    `achar_insumo(nome)` devolve o documento do insumo ou None. Gera
+    {nome_prod, preco, ingredientes: [{insumo_id, qtd}]}; um produto com
+    qualquer ingrediente inválido é recusado inteiro.
+    """
+    produtos, invalidos = {}, set()
+    for n, reg in registros:
+        if not isinstance(reg, dict):
+            rejeitados.anotar(n, "registro não é um objeto", reg)
+            continue
+        nome_prod = str(reg.get("nome_prod") or "").strip()
+        if not nome_prod:
+            rejeitados.anotar(n, "nome_prod vazio", reg)
+            continue
+        ficha = produtos.setdefault(nome_prod, {"nome_prod": nome_prod, "preco": None, "ingredientes": []})
+        itens = reg.get("ingredientes")
+        if itens is None:
+            itens = [reg] if reg.get("insumo") else []
+        try:
+            if str(reg.get("preco") or "").strip():
+                ficha["preco"] = numero(reg["preco"])
+            for it in itens:
+                if not isinstance(it, dict):
+                    raise ValueError("ingrediente não é um objeto")
+                ins = achar_insumo(str(it.get("insumo") or "").strip())
+                if not ins:
+                    raise ValueError(f"insumo '{it.get('insumo')}' não cadastrado")
+                qtd = numero(it.get("qtd", ""))
+                if qtd <= 0:
+                    raise ValueError("qtd deve ser positiva")
+                ficha["ingredientes"].append({"insumo_id": ins.doc_id, "qtd": qtd})
+        except ValueError as e:
+            rejeitados.anotar(n, str(e), reg)
+            invalidos.add(nome_prod)
+
+    for nome_prod, ficha in produtos.items():
+        if nome_prod in invalidos:
+            continue
+        if not ficha["ingredientes"]:
+            rejeitados.anotar(None, f"ficha '{nome_prod}' sem ingredientes", ficha)
+            continue
+        yield ficha
+
+
+def validar_templates(registros, rejeitados: Rejeitados):
+    """Agrupa itens por modelo; gera {nome, itens}."""
+    modelos = {}
+    for n, reg in registros:
+        if not isinstance(reg, dict):
+            rejeitados.anotar(n, "registro não é um objeto", reg)
+            continue
+        nome = str(reg.get("nome") or "").strip()
+        if not nome:
+            rejeitados.anotar(n, "nome vazio", reg)
+            continue
+        itens = reg.get("itens")
+        if itens is None:
+            itens = [reg.get("item")]
+        itens = [str(i).strip() for i in itens if i and str(i).strip()]
+        if not itens:
+            rejeitados.anotar(n, "item vazio", reg)
+            continue
+        modelos.setdefault(nome, []).extend(itens)
+    for nome, itens in modelos.items():
+        yield {"nome": nome, "itens": itens}
+
+
+def _data_da_venda(valor) -> str:
+    """'AAAA-MM-DD', 'AAAA-MM-DD HH:MM[:SS]' ou 'DD/MM/AAAA[ HH:MM]' → 'AAAA-MM-DD'."""
+    texto = str(valor or "").strip()[:10]
+    if len(texto) == 10 and texto[2] == "/" and texto[5] == "/":
+        texto = f"{texto[6:]}-{texto[3:5]}-{texto[:2]}"
+    try:
+        return date.fromisoformat(texto).isoformat()
+    except ValueError:
+        raise ValueError(f"data inválida: {valor!r}") from None
+
+
+def validar_vendas(registros, produtos, rejeitados: Rejeitados):
+    """Gera {data, produto, qtd, valor} das vendas de produtos com ficha.
+
+    `produtos` é o conjunto de nome_prod cadastrados; `valor` (total da
+    linha) fica None quando o arquivo não traz valor nem preço.
+    """
+    for n, reg in registros:
+        if not isinstance(reg, dict):
+            rejeitados.anotar(n, "registro não é um objeto", reg)
+            continue
+        produto = str(reg.get("produto") or reg.get("nome_prod") or "").strip()
+        if not produto:
+            rejeitados.anotar(n, "produto vazio", reg)
+            continue
+        if produto not in produtos:
+            rejeitados.anotar(n, f"produto '{produto}' sem ficha técnica", reg)
+            continue
+        try:
+            dia = _data_da_venda(reg.get("data"))
+            qtd = numero(reg["qtd"]) if reg.get("qtd") not in (None, "") else 1.0
+            if qtd <= 0:
+                raise ValueError("qtd deve ser positiva")
+            if reg.get("valor") not in (None, ""):
+                valor = numero(reg["valor"])
+            elif reg.get("preco") not in (None, ""):
+                valor = numero(reg["preco"]) * qtd
+            else:
+                valor = None
+        except ValueError as e:
+            rejeitados.anotar(n, str(e), reg)
+            continue
+        yield {"data": dia, "produto": produto, "qtd": qtd, "valor": valor}
+
+
+# ------------------------- EXPORTAÇÃO ------------------------- #
+def linhas_insumos(insumos):
+    for i in insumos:
+        yield {"nome": i["nome"], "unidade": i["unidade"], "custo_unit": i["custo_unit"]}
+
+
+def linhas_fichas(fichas, resolver_ingredientes):
+    """Uma linha por ingrediente; `resolver_ingredientes(ficha)` dá nome/unidade/qtd."""
+    for f in fichas:
+        for it in resolver_ingredientes(f):
+            yield {
+                "nome_prod": f["nome_prod"],
+                "insumo": it["nome"],
+                "unidade": it["unidade"],
+                "qtd": it["qtd"],
+                "preco": f.get("preco"),
+                "custo": f.get("custo"),
+            }
+
+
+def linhas_templates(templates):
+    for t in templates:
+        for item in t["itens"]:
+            yield {"nome": t["nome"], "item": item}
+
+
+def linhas_checklists(checklists):
+    """Uma linha por item de checklist, na ordem em que os registros chegam."""
+    for reg in checklists:
+        for n, it in enumerate(reg["itens"], start=1):
+            yield {
+                "data": reg["data"],
+                "template": reg["template"],
+                "n": n,
+                "item": it["nome"],
+                "done": it["done"],
+                "timestamp": it["timestamp"],
+            }
+
+
+def escrever_registros(linhas, caminho: str, campos, formato: str = None) -> int:
+    """Escreve as linhas em fluxo; retorna quantas foram escritas."""
+    formato = detectar_formato(caminho, formato)
+    fh = sys.stdout if caminho == "-" else open(caminho, "w", encoding="utf-8", newline="")
+    total = 0
+    try:
+        if formato == "csv":
+            w = csv.DictWriter(fh, fieldnames=campos, extrasaction="ignore")
+            w.writeheader()
+            for linha in linhas:
+                w.writerow(linha)
+                total += 1
+        elif formato == "jsonl":
+            for linha in linhas:
+                fh.write(json.dumps(linha, ensure_ascii=False) + "\n")
+                total += 1
+        else:
+            fh.write("[")
+            for linha in linhas:
+                fh.write(("," if total else "") + "\n  " + json.dumps(linha, ensure_ascii=False))
+                total += 1
+            fh.write("\n]\n")
+    finally:
+        if fh is not sys.stdout:
+            fh.close()
+    return total
@@ -0,0 +1,118 @@
+"""Vendas: agregados por dia e consumo teórico de insumos pelas fichas técnicas.
+
+Um `LoteVendas` recebe as vendas já validadas (`transferencia.validar_vendas`)
+e soma tudo em memória por (dia, produto); só no fim cada agregado é
+"explodido" pelos ingredientes da ficha em consumo por (dia, insumo). Assim
+dez mil linhas de um dia movimentado custam dez mil somas de dicionário e
+uma explosão por produto vendido no dia.
+
+O resultado é um documento por dia:
+
+    {"data", "produtos": {nome_prod: {qtd, receita, custo}},
+     "insumos": {"<insumo_id>": {qtd, custo}}}
+
+e importar um lote grava (ou soma a) um documento por dia do lote.
+
+O custo de cada venda é o da ficha no momento da importação (custos atuais
+dos insumos), então o food cost de um dia passado não muda quando um insumo
+é reajustado depois. Como `custos.py`, este módulo não grava nada.
+"""
+
+import hashlib
+import json
+
+CASAS = 4
+
+
+class LoteVendas:
+    """Vendas de uma importação, agregadas por (data, produto).
+
+    `fichas` são documentos com `nome_prod`, `ingredientes` ({insumo_id, qtd})
+    e `preco`; `custos_insumos` mapeia insumo_id → custo unitário atual.
+    """
+
+    def __init__(self, fichas, custos_insumos: dict):
+        self._fichas = {}
+        for f in fichas:
+            ingredientes = [(it["insumo_id"], it["qtd"]) for it in f["ingredientes"] if "insumo_id" in it]
+            custo = sum(q * custos_insumos.get(iid, 0.0) for iid, q in ingredientes)
+            # Ingredientes sem insumo cadastrado (fichas antigas) entram só no custo.
+            custo += sum(it["qtd"] * it.get("custo_unit", 0.0) for it in f["ingredientes"] if "insumo_id" not in it)
+            self._fichas[f["nome_prod"]] = (ingredientes, custo, f.get("preco") or 0.0)
+        self._custos_insumos = custos_insumos
+        self._vendas = {}
+        self.linhas = 0
+
+    def produtos(self):
+        return self._fichas.keys()
+
+    def acrescentar(self, venda: dict):
+        """Soma uma venda {data, produto, qtd, valor}; `valor` None usa o preço da ficha."""
+        chave = (venda["data"], venda["produto"])
+        acc = self._vendas.get(chave)
+        if acc is None:
+            acc = self._vendas[chave] = [0.0, 0.0]
+        valor = venda["valor"]
+        acc[0] += venda["qtd"]
+        acc[1] += valor if valor is not None else venda["qtd"] * self._fichas[venda["produto"]][2]
+        self.linhas += 1
+
+    def __len__(self):
+        return len(self._vendas)
+
+    def dias(self):
+        """Um documento por dia do lote (formato no topo do módulo), em ordem de data."""
+        por_dia = {}
+        for (dia, produto), (qtd, receita) in self._vendas.items():
+            doc = por_dia.get(dia)
+            if doc is None:
+                doc = por_dia[dia] = {"data": dia, "produtos": {}, "insumos": {}}
+            ingredientes, custo, _ = self._fichas[produto]
+            doc["produtos"][produto] = {"qtd": qtd, "receita": receita, "custo": qtd * custo}
+            insumos = doc["insumos"]
+            for iid, q in ingredientes:
+                acc = insumos.get(str(iid))
+                if acc is None:
+                    acc = insumos[str(iid)] = {"qtd": 0.0, "custo": 0.0}
+                acc["qtd"] += q * qtd
+                acc["custo"] += q * qtd * self._custos_insumos.get(iid, 0.0)
+        for dia in sorted(por_dia):
+            yield arredondar(por_dia[dia])
+
+    def assinatura(self) -> str:
+        """Hash do conteúdo agregado: a mesma exportação importada de novo tem a mesma assinatura."""
+        corpo = json.dumps(sorted(self._vendas.items()), ensure_ascii=False)
+        return hashlib.blake2b(corpo.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def arredondar(doc: dict) -> dict:
+    for grupo in ("produtos", "insumos"):
+        for valores in doc[grupo].values():
+            for campo, v in valores.items():
+                valores[campo] = round(v, CASAS)
+    return doc
+
+
+def somar_dia(atual: dict, novo: dict) -> dict:
+    """Documento do dia com `novo` somado a `atual` (os dois no formato do módulo)."""
+    soma = {"data": atual["data"], "produtos": {}, "insumos": {}}
+    for grupo in ("produtos", "insumos"):
+        destino = soma[grupo]
+        for origem in (atual[grupo], novo[grupo]):
+            for chave, valores in origem.items():
+                acc = destino.get(chave)
+                if acc is None:
+                    destino[chave] = dict(valores)
+                else:
+                    for campo, v in valores.items():
+                        acc[campo] = acc.get(campo, 0.0) + v
+    return arredondar(soma)
+
+
+def indicadores(linha: dict) -> dict:
+    """Acrescenta margem, margem_pct e food_cost_pct a uma linha com receita e custo."""
+    receita, custo = linha["receita"], linha["custo"]
+    linha["margem"] = round(receita - custo, 2)
+    linha["margem_pct"] = round((receita - custo) / receita * 100, 2) if receita else None
+    linha["food_cost_pct"] = round(custo / receita * 100, 2) if receita else None
+    return linha
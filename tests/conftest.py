@@ -0,0 +1,13 @@
+import pytest
+
+from dogflow import negocio
+
+
+@pytest.fixture
+def banco(tmp_path):
+    """Banco novo em `tmp_path`; devolve o caminho e fecha tudo no fim."""
+    caminho = str(tmp_path / "buffet_db.json")
+    negocio.configurar(path=caminho, escrita_adiada=0, journal=False, loja="")
+    negocio.inicializar()
+    yield caminho
+    negocio.fechar()
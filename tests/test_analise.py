@@ -0,0 +1,30 @@
+from datetime import date, timedelta
+
+from dogflow import negocio
+from dogflow.analise import AnaliseItens
+
+
+def _reg(data, feitos, horas):
+    return {"data": data, "template": "Abertura", "rev": 1, "feitos": feitos, "horas": horas}
+
+
+def test_horarios_fora_do_dia_contam_como_tardios():
+    analise = AnaliseItens()
+    analise.acumular(_reg("2024-05-06", 0b11, [8 * 3600, 3 * 86400 + 600]), ["Ligar forno", "Repor copos"])
+    analise.acumular(_reg("2024-05-07", 0b11, [8 * 3600 + 600, 25 * 3600]), ["Ligar forno", "Repor copos"])
+    forno, copos = analise.linhas({"Abertura": "09:00"})
+    assert (forno["mediana"], forno["tardios"], forno["atrasados"]) == ("08:00", 0, 0)
+    assert (copos["mediana"], copos["p90"]) == ("25:00", "25:00")  # madrugada seguinte ainda é horário
+    assert (copos["tardios"], copos["atrasados"], copos["pct_atraso"]) == (1, 2, 100)
+    assert copos["atraso_medio_min"] == 16 * 60 + 2.5  # só o que tem horário entra na média
+
+
+def test_checklist_de_dia_passado_marcado_hoje(banco):
+    negocio.criar_template("Fechamento", ["Apagar luzes", "Trancar porta"])
+    dia = (date.today() - timedelta(days=3)).isoformat()
+    negocio.alternar_itens("Fechamento", [1, 2], dia)
+
+    linhas = {r["item"]: r for r in negocio.estatisticas_itens("Fechamento", refazer=True)}
+    assert linhas["Apagar luzes"]["feitos"] == 1
+    assert linhas["Apagar luzes"]["tardios"] == 1
+    assert linhas["Apagar luzes"]["mediana"] == ""
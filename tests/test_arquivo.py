@@ -0,0 +1,25 @@
+from dogflow.arquivo import ArquivoChecklists
+
+
+def _reg(data, template="Abertura"):
+    return {"data": data, "template": template, "rev": 1, "feitos": 1, "horas": [3600]}
+
+
+def test_mes_em_cache_e_relido_quando_outro_processo_arquiva(tmp_path):
+    pasta = str(tmp_path / "buffet_db.json.arquivo")
+    longo, outro = ArquivoChecklists(pasta), ArquivoChecklists(pasta)
+    longo.acrescentar([_reg("2026-09-01")])
+    assert [r["data"] for r in longo.ler("2026-09-01", "2026-09-30")] == ["2026-09-01"]
+
+    outro.acrescentar([_reg("2026-09-10")])
+    assert [r["data"] for r in longo.ler("2026-09-01", "2026-09-30")] == ["2026-09-01", "2026-09-10"]
+    assert longo.obter("2026-09-10", "Abertura") == _reg("2026-09-10")
+
+
+def test_mes_em_cache_some_quando_o_arquivo_some(tmp_path):
+    pasta = tmp_path / "buffet_db.json.arquivo"
+    arquivo = ArquivoChecklists(str(pasta))
+    arquivo.acrescentar([_reg("2026-08-05")])
+    assert arquivo.ler_mes("2026-08")
+    (pasta / "checklists-2026-08.jsonl.gz").unlink()
+    assert arquivo.ler_mes("2026-08") == []
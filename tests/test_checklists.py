@@ -0,0 +1,120 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from dogflow import negocio
+
+HOJE = date.today().isoformat()
+ONTEM = (date.today() - timedelta(days=1)).isoformat()
+
+
+def _itens(*marcados):
+    return [{"nome": nome, "done": ts is not None, "timestamp": ts} for nome, ts in marcados]
+
+
+# Checklists como o Buffet_checklist.py original os gravava (itens por extenso).
+ANTIGOS = {
+    "1": {"data": "2024-03-05", "template": "Abertura", "itens": _itens(
+        ("Ligar chapa", "2024-03-05T08:15:30"),
+        ("Conferir validades", None),
+        ("Sanitizar bancadas", "2024-03-05T09:00:00"),
+    )},
+    "2": {"data": "2024-03-05", "template": "Fechamento", "itens": _itens(
+        ("Desligar gás", "2024-03-06T00:30:00"),  # fechado depois da meia-noite
+    )},
+    "3": {"data": ONTEM, "template": "Abertura", "itens": _itens(
+        ("Ligar chapa", ONTEM + "T07:59:59"), ("Sanitizar bancadas", None),  # revisão antiga do modelo
+    )},
+    "4": {"data": HOJE, "template": "Abertura", "itens": _itens(
+        ("Ligar chapa", None), ("Conferir validades", HOJE + "T10:00:00"), ("Sanitizar bancadas", None),
+    )},
+}
+
+
+@pytest.fixture
+def banco_antigo(tmp_path):
+    caminho = tmp_path / "buffet_db.json"
+    caminho.write_text(json.dumps({
+        "templates": {
+            "1": {"nome": "Abertura", "itens": ["Ligar chapa", "Conferir validades", "Sanitizar bancadas"]},
+            "2": {"nome": "Fechamento", "itens": ["Desligar gás"]},
+        },
+        "checklists": ANTIGOS,
+        "insumos": {},
+        "fichas": {},
+    }), encoding="utf-8")
+    negocio.configurar(path=str(caminho), escrita_adiada=0, journal=False, loja="")
+    yield str(caminho)
+    negocio.fechar()
+
+
+def _como_no_original(regs):
+    return {(r["data"], r["template"]): negocio.itens_do_checklist(r) for r in regs}
+
+
+def test_checklists_antigos_viram_mascara_e_horarios(banco_antigo):
+    negocio.inicializar()
+
+    regs = list(negocio.checklists_no_periodo())
+    assert all("itens" not in r and "rev" in r for r in regs)
+    assert _como_no_original(regs) == {(r["data"], r["template"]): r["itens"] for r in ANTIGOS.values()}
+    assert [r["data"] for r in negocio.arquivo().ler()] == ["2024-03-05", "2024-03-05"]  # dias antigos arquivados
+
+    abertura = {r["data"]: r for r in regs if r["template"] == "Abertura"}
+    assert abertura["2024-03-05"]["feitos"] == 0b101
+    assert abertura["2024-03-05"]["horas"] == [8 * 3600 + 15 * 60 + 30, 0, 9 * 3600]
+    assert abertura[ONTEM]["rev"] != abertura[HOJE]["rev"] == abertura["2024-03-05"]["rev"]
+    assert negocio.itens_do_modelo("Abertura", abertura[ONTEM]["rev"]) == ("Ligar chapa", "Sanitizar bancadas")
+    fechamento = next(r for r in regs if r["template"] == "Fechamento")
+    assert fechamento["horas"] == [24 * 3600 + 30 * 60]
+
+
+def test_conversao_e_idempotente(banco_antigo):
+    negocio.inicializar()
+    antes = list(negocio.checklists_no_periodo())
+    versoes = len(negocio.versoes_table)
+
+    negocio.inicializar()  # marcador gravado: não converte de novo
+    assert negocio.compactar_checklists() == 0  # nem se for chamada de novo (ex.: queda antes do marcador)
+    assert list(negocio.checklists_no_periodo()) == antes
+    assert len(negocio.versoes_table) == versoes
+
+    negocio.configurar(path=banco_antigo)  # reabrir lê o mesmo conteúdo do disco
+    assert _como_no_original(negocio.checklists_no_periodo()) == _como_no_original(antes)
+
+
+def test_marcar_depois_da_conversao(banco_antigo):
+    negocio.inicializar()
+    reg = negocio.alternar_itens("Abertura", [1, 2], HOJE)
+    itens = negocio.itens_do_checklist(reg)
+    assert [it["done"] for it in itens] == [True, False, False]
+    assert itens[0]["timestamp"].startswith(HOJE)
+
+
+def _resumos():
+    return [dict(r) for r in negocio.resumos_no_periodo()]
+
+
+def test_resumos_acompanham_marcacoes_e_arquivamento(banco):
+    negocio.criar_template("Abertura", ["Ligar chapa", "Conferir validades", "Sanitizar bancadas"])
+    negocio.criar_template("Fechamento", ["Desligar gás", "Trancar porta"])
+    dias = [(date.today() - timedelta(days=n)).isoformat() for n in range(5, -1, -1)]
+    for n, dia in enumerate(dias):
+        negocio.alternar_itens("Abertura", [1, 3], dia)
+        negocio.alternar_itens("Abertura", [n % 3 + 1], dia)  # desmarca ou marca mais um
+        if n % 2:
+            negocio.alternar_itens("Fechamento", [2], dia)
+    negocio.marcar("arquivado_em", ONTEM)  # a virada de hoje ainda não arquivou nada
+    assert negocio.arquivar_dias_antigos() == 6
+    assert len(negocio.chk_table) == 3
+    negocio.alternar_itens("Fechamento", [1, 2], ONTEM)
+    with pytest.raises(ValueError, match="arquivado"):
+        negocio.alternar_itens("Abertura", [2], dias[0])
+
+    esperado = [negocio.resumo_do_checklist(r) for r in negocio.checklists_no_periodo()]
+    assert len(esperado) == 10
+    assert _resumos() == esperado
+    assert negocio.reconstruir_resumos() == 10
+    assert _resumos() == esperado
+    assert list(negocio.historico_execucao(dias[0], dias[0])) == [(dias[0], "Abertura", 1, 3, 33)]
@@ -0,0 +1,21 @@
+import json
+
+from dogflow import cli, negocio
+
+
+def test_batch_com_outro_banco_inicializa_o_banco_novo(tmp_path, capsys):
+    principal, outro = str(tmp_path / "a.json"), str(tmp_path / "b.json")
+    lote = tmp_path / "lote.txt"
+    lote.write_text(f"start 1 --data 2024-05-10\n--db {outro} start 1 --data 2024-05-10\n", encoding="utf-8")
+    negocio.configurar(loja="", journal=False, escrita_adiada=0)
+    assert cli.main(["--json", "--db", principal, "batch", str(lote)]) == 0
+    linhas = [json.loads(linha) for linha in capsys.readouterr().out.splitlines()]
+    assert [r["data"] for r in linhas] == ["2024-05-10", "2024-05-10"]
+    assert linhas[0]["template"] == linhas[1]["template"]
+
+    negocio.configurar(path=outro)
+    try:
+        assert negocio.marcador("modelos_padrao")
+        assert len(negocio.tpl_table)
+    finally:
+        negocio.fechar()
@@ -0,0 +1,89 @@
+import multiprocessing
+
+import pytest
+
+from dogflow import negocio
+
+DIA = "2024-05-10"
+
+try:
+    _fork = multiprocessing.get_context("fork")
+except ValueError:
+    _fork = None
+
+
+@pytest.fixture(params=["json", "journal", "sqlite3"])
+def caminho(request, tmp_path):
+    caminho = str(tmp_path / ("buffet_db.sqlite3" if request.param == "sqlite3" else "buffet_db.json"))
+    negocio.configurar(path=caminho, escrita_adiada=0, journal=request.param == "journal", loja="")
+    negocio.criar_template("Abertura", ["Ligar forno", "Repor copos", "Conferir caixa"])
+    negocio.get_or_create_checklist(DIA, "Abertura")
+    negocio.fechar()
+    yield caminho
+    negocio.fechar()
+
+
+def _checklist():
+    return negocio.chk_table.get(data=DIA, template="Abertura")
+
+
+def _terminal(caminho, journal, numero, barreira, saida):
+    """Outro processo: lê o checklist, espera o colega ler também e então grava."""
+    negocio.configurar(path=caminho, escrita_adiada=0, journal=journal, loja="")
+    alternados = negocio._alternados
+    esperou = []
+
+    def alternados_depois_da_barreira(*args):
+        resultado = alternados(*args)
+        if not esperou:
+            esperou.append(True)
+            barreira.wait(10)
+        return resultado
+
+    negocio._alternados = alternados_depois_da_barreira
+    try:
+        negocio.alternar_itens("Abertura", [numero], DIA)
+        saida.put((numero, "ok"))
+    except Exception as e:  # noqa: BLE001 - vai para o processo do teste
+        saida.put((numero, repr(e)))
+    finally:
+        negocio.fechar()
+
+
+@pytest.mark.skipif(_fork is None, reason="precisa de fork")
+def test_dois_terminais_alternando_o_mesmo_checklist(caminho):
+    journal = negocio.JOURNAL
+    antes = _checklist().get("versao", 0)
+    negocio.fechar()
+
+    barreira, saida = _fork.Barrier(2), _fork.Queue()
+    processos = [_fork.Process(target=_terminal, args=(caminho, journal, n, barreira, saida)) for n in (1, 2)]
+    for p in processos:
+        p.start()
+    resultados = sorted(saida.get(timeout=30) for _ in processos)
+    for p in processos:
+        p.join(10)
+    assert resultados == [(1, "ok"), (2, "ok")]
+
+    negocio.configurar(path=caminho)
+    depois = _checklist()
+    assert depois["feitos"] == 0b011
+    assert depois["versao"] == antes + 2
+    assert depois["horas"][0] and depois["horas"][1] and not depois["horas"][2]
+
+
+def test_conflito_em_todas_as_tentativas(caminho, monkeypatch):
+    negocio.configurar(path=caminho)
+    alternados = negocio._alternados
+    tentativas = []
+
+    def outro_terminal_grava_no_meio(reg, visto, numeros):
+        tentativas.append(reg.get("versao", 0))
+        negocio.chk_table.update({"versao": tentativas[-1] + 1}, doc_ids=[reg.doc_id])
+        return alternados(reg, visto, numeros)
+
+    monkeypatch.setattr(negocio, "_alternados", outro_terminal_grava_no_meio)
+    with pytest.raises(ValueError, match="várias vezes seguidas"):
+        negocio.alternar_itens("Abertura", [1], DIA)
+    assert len(tentativas) == negocio.TENTATIVAS_CONFLITO
+    assert _checklist()["feitos"] == 0
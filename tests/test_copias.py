@@ -0,0 +1,130 @@
+import os
+from datetime import date
+
+import pytest
+
+from dogflow import negocio
+from dogflow.arquivo import ArquivoChecklists, caminho_arquivo
+from dogflow.copias import RepositorioCopias
+from dogflow.journal import BancoJournal, caminho_journal
+from dogflow.storage import abrir_banco
+
+HOJE = date.today().isoformat()
+MES_ARQUIVADO = "checklists-2024-03.jsonl.gz"
+
+
+def _conteudo(caminho):
+    """{tabela: {doc_id: doc}} do banco, sem alterá-lo."""
+    banco = abrir_banco(caminho, somente_leitura=True)
+    try:
+        tabelas = {nome: {d.doc_id: dict(d) for d in banco.table(nome).all()} for nome in banco.tabelas()}
+    finally:
+        banco.close()
+    return {nome: docs for nome, docs in tabelas.items() if docs}
+
+
+def _objetos(repo):
+    return sum(len(arqs) for _, _, arqs in os.walk(repo.objetos))
+
+
+def _bytes(caminho):
+    with open(caminho, "rb") as fh:
+        return fh.read()
+
+
+@pytest.fixture
+def com_dados(banco):
+    negocio.criar_template("Abertura", ["Ligar chapa", "Repor copos"])
+    negocio.alternar_itens("Abertura", [1], HOJE)
+    negocio.salvar_insumo("Pão", "un", 1.0)
+    ArquivoChecklists(caminho_arquivo(banco)).acrescentar(
+        [{"data": "2024-03-05", "template": "Abertura", "rev": 1, "feitos": 1, "horas": [3600, 0]}]
+    )
+    negocio.fechar()
+    return banco
+
+
+def test_copia_incremental_grava_so_o_que_mudou(com_dados):
+    repo = RepositorioCopias(com_dados)
+    primeira = repo.criar()
+    assert primeira["objetos_novos"] == _objetos(repo) > 0
+
+    assert repo.criar()["objetos_novos"] == 0  # nada mudou: nem relê o banco
+
+    negocio.configurar(path=com_dados)
+    negocio.alternar_itens("Abertura", [2], HOJE)
+    negocio.fechar()
+    terceira = repo.criar()
+    assert 0 < terceira["objetos_novos"] < primeira["objetos_novos"]
+    assert _objetos(repo) == primeira["objetos_novos"] + terceira["objetos_novos"]
+    assert repo.verificar() == (3, _objetos(repo), [])
+
+
+def test_verificar_acusa_objeto_corrompido(com_dados):
+    repo = RepositorioCopias(com_dados)
+    repo.criar()
+    sub = os.path.join(repo.objetos, sorted(os.listdir(repo.objetos))[0])
+    with open(os.path.join(sub, os.listdir(sub)[0]), "ab") as fh:
+        fh.write(b"lixo")
+    _, _, problemas = repo.verificar()
+    assert len(problemas) == 1 and "corrompido" in problemas[0]
+
+
+def test_restaurar_numa_pasta_nova(com_dados, tmp_path):
+    repo = RepositorioCopias(com_dados)
+    antes = _conteudo(com_dados)
+    primeira = repo.criar()["id"]
+    negocio.configurar(path=com_dados)
+    negocio.salvar_insumo("Queijo", "kg", 40.0)
+    negocio.fechar()
+    repo.criar()
+
+    restaurado = tmp_path / "restaurado"
+    repo.restaurar(primeira, str(restaurado))
+    caminho = str(restaurado / os.path.basename(com_dados))
+    assert _conteudo(caminho) == antes
+    assert _bytes(os.path.join(caminho_arquivo(caminho), MES_ARQUIVADO)) == _bytes(
+        os.path.join(caminho_arquivo(com_dados), MES_ARQUIVADO)
+    )
+
+    with pytest.raises(ValueError, match="pasta vazia"):
+        repo.restaurar(primeira, str(restaurado))
+    ultimo = tmp_path / "ultimo"
+    repo.restaurar(repo.ids()[-1], str(ultimo))
+    assert _conteudo(str(ultimo / os.path.basename(com_dados))) == _conteudo(com_dados)
+
+
+def test_podar_mantem_os_objetos_das_copias_que_ficam(com_dados, tmp_path):
+    repo = RepositorioCopias(com_dados)
+    for preco in (2.0, 3.0, 4.0):
+        negocio.configurar(path=com_dados)
+        negocio.salvar_insumo("Pão", "un", preco)
+        negocio.fechar()
+        repo.criar()
+    total = _objetos(repo)
+
+    apagados, objetos, liberados = repo.podar(horas=0, dias=0, meses=0)
+    assert apagados == 2 and objetos > 0 and liberados > 0
+    assert _objetos(repo) == total - objetos
+    assert repo.verificar() == (1, _objetos(repo), [])
+    repo.restaurar(repo.ids()[-1], str(tmp_path / "r"))
+    assert _conteudo(str(tmp_path / "r" / os.path.basename(com_dados))) == _conteudo(com_dados)
+
+
+def test_restaurar_banco_em_modo_journal(tmp_path):
+    caminho = str(tmp_path / "buffet_db.json")
+    banco = BancoJournal(caminho)
+    banco.table("insumos").insert({"nome": "Pão", "unidade": "un", "custo_unit": 1.0})
+    banco.compactar()
+    banco.table("insumos").insert({"nome": "Queijo", "unidade": "kg", "custo_unit": 40.0})
+    banco.table("insumos").update({"custo_unit": 1.5}, doc_ids=[1])
+    banco._fh.close()  # sem compactar: as duas últimas mudanças só no journal
+    banco.trava.close()
+    esperado = _conteudo(caminho)
+    assert esperado["insumos"][1]["custo_unit"] == 1.5
+
+    repo = RepositorioCopias(caminho)
+    repo.restaurar(repo.criar()["id"], str(tmp_path / "r"))
+    restaurado = str(tmp_path / "r" / "buffet_db.json")
+    assert _conteudo(restaurado) == esperado
+    assert not os.path.exists(caminho_journal(restaurado))
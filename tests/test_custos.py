@@ -0,0 +1,91 @@
+import multiprocessing
+import random
+
+import pytest
+
+from dogflow import custos, negocio
+from dogflow.custos import MatrizCustos
+
+try:
+    _fork = multiprocessing.get_context("fork")
+except ValueError:
+    _fork = None
+
+
+@pytest.fixture(params=["json", "journal", "sqlite3"])
+def caminho(request, tmp_path):
+    caminho = str(tmp_path / ("buffet_db.sqlite3" if request.param == "sqlite3" else "buffet_db.json"))
+    negocio.configurar(path=caminho, escrita_adiada=0, journal=request.param == "journal", loja="")
+    yield caminho
+    negocio.fechar()
+
+
+def _outro_terminal(caminho, journal, pao):
+    negocio.configurar(path=caminho, escrita_adiada=0, journal=journal, loja="")
+    try:
+        negocio.salvar_ficha("dog2", [{"insumo_id": pao, "qtd": 2}], preco=15.0)
+    finally:
+        negocio.fechar()
+
+
+@pytest.mark.skipif(_fork is None, reason="precisa de fork")
+def test_ficha_criada_por_outro_terminal_e_recalculada(caminho):
+    pao, _ = negocio.salvar_insumo("pão", "un", 1.0)
+    negocio.salvar_ficha("dog1", [{"insumo_id": pao, "qtd": 1}], preco=10.0)
+    assert negocio.fichas_por_insumo().buscar(pao)  # índice construído neste terminal
+
+    p = _fork.Process(target=_outro_terminal, args=(caminho, negocio.JOURNAL, pao))
+    p.start()
+    p.join(30)
+    assert p.exitcode == 0
+
+    _, recalculadas = negocio.salvar_insumo("pão", "un", 5.0)
+    assert recalculadas == 2
+    assert negocio.fichas_table.get(nome_prod="dog2")["custo"] == 10.0
+    assert negocio.ajustar_preco("dog2", margem=50)[0] == 10.0
+
+
+def test_mudanca_de_preco_recalcula_so_as_fichas_afetadas(caminho):
+    pao, _ = negocio.salvar_insumo("pão", "un", 1.0)
+    queijo, _ = negocio.salvar_insumo("queijo", "kg", 40.0)
+    negocio.salvar_ficha("dog1", [{"insumo_id": pao, "qtd": 1}, {"insumo_id": queijo, "qtd": 0.5}], preco=30.0)
+    negocio.salvar_ficha("dog2", [{"insumo_id": pao, "qtd": 2}], preco=15.0)
+    historico = len(negocio.hist_custos_table)
+
+    assert negocio.salvar_insumo("queijo", "kg", 50.0) == (queijo, 1)
+    assert negocio.fichas_table.get(nome_prod="dog1")["custo"] == 26.0
+    assert negocio.fichas_table.get(nome_prod="dog2")["custo"] == 2.0
+    novas = negocio.hist_custos_table.all()[historico:]
+    assert [(h["nome_prod"], h["custo_anterior"], h["custo"]) for h in novas] == [("dog1", 21.0, 26.0)]
+    assert novas[0]["motivo"].startswith("queijo:")
+
+    assert negocio.salvar_insumo("queijo", "kg", 50.0) == (queijo, 0)  # mesmo preço: nada a fazer
+    negocio.salvar_ficha("dog1", [{"insumo_id": pao, "qtd": 1}], preco=30.0)  # tirou o queijo
+    assert negocio.salvar_insumo("queijo", "kg", 60.0) == (queijo, 0)
+    assert negocio.salvar_insumo("pão", "un", 1.5) == (pao, 2)
+    assert [negocio.fichas_table.get(nome_prod=n)["custo"] for n in ("dog1", "dog2")] == [1.5, 3.0]
+
+
+@pytest.mark.parametrize("usar_numpy", [True, False])
+def test_custo_em_lote_igual_ao_custo_da_ficha(caminho, usar_numpy):
+    rnd = random.Random(6)
+    ids = [negocio.salvar_insumo(f"insumo {i}", "kg", round(rnd.uniform(0.1, 80), 2))[0] for i in range(12)]
+    for n in range(40):
+        escolhidos = rnd.sample(ids, rnd.randint(1, 6))
+        itens = [{"insumo_id": iid, "qtd": round(rnd.uniform(0.01, 3), 3)} for iid in escolhidos]
+        if n % 7 == 0:  # ficha antiga, com o custo copiado no ingrediente
+            itens.append({"nome": "sal", "unidade": "kg", "qtd": 0.01, "custo_unit": 2.5})
+        negocio.salvar_ficha(f"prod {n}", itens, preco=20.0)
+    negocio.insumos_table.remove(doc_ids=[ids[0]])  # insumo apagado: custo zero nos dois
+
+    fichas = negocio.fichas_table.all()
+    insumos = {i.doc_id: i["custo_unit"] for i in negocio.insumos_table.all()}
+    matriz = MatrizCustos(fichas, insumos, usar_numpy=usar_numpy)
+    assert matriz.usar_numpy == (usar_numpy and custos.carregar_numpy() is not None)
+    assert matriz.custos() == [negocio.custo_da_ficha(f) for f in fichas]
+
+    alteracoes = {ids[1]: 99.9, ids[5]: 0.35}
+    simulados = matriz.custos(matriz.vetor_precos(alteracoes))
+    for iid, custo in alteracoes.items():
+        negocio.insumos_table.update({"custo_unit": custo}, doc_ids=[iid])
+    assert simulados == [negocio.custo_da_ficha(f) for f in fichas]
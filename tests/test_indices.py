@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from dogflow import indices, negocio
+from dogflow.journal import BancoJournal
+from dogflow.storage import BancoTinyDB
+
+DIAS = ["2024-05-0%d" % d for d in range(1, 5)]
+MODELOS = ["Abertura", "Fechamento", "Limpeza"]
+
+
+def _abrir(tipo, caminho):
+    return BancoTinyDB(caminho) if tipo == "json" else BancoJournal(caminho)
+
+
+def _varredura(tabela, campos):
+    return [d.doc_id for d in sorted(tabela.all(), key=lambda d: d.doc_id)
+            if all(d.get(k) == v for k, v in campos.items())]
+
+
+def _conferir(tabela):
+    for dia in DIAS:
+        for campos in [{"data": dia}] + [{"data": dia, "template": m} for m in MODELOS]:
+            esperado = _varredura(tabela, campos)
+            assert [d.doc_id for d in tabela.search(**campos)] == esperado, campos
+            achado = tabela.get(**campos)
+            assert (achado.doc_id if achado else None) == (esperado[0] if esperado else None), campos
+
+
+@pytest.mark.parametrize("tipo", ["json", "journal"])
+def test_buscas_pelo_indice_batem_com_a_varredura(tipo, tmp_path):
+    caminho = str(tmp_path / "buffet_db.json")
+    banco, outro = _abrir(tipo, caminho), _abrir(tipo, caminho)
+    sorteio = random.Random(2024)
+    try:
+        for passo in range(300):
+            # Às vezes quem grava é outro terminal: os índices deste são reconstruídos.
+            tabela = (outro if sorteio.random() < 0.2 else banco).table("checklists")
+            ids = [d.doc_id for d in tabela.all()]
+            op = sorteio.random()
+            if op < 0.5 or not ids:
+                tabela.insert({"data": sorteio.choice(DIAS), "template": sorteio.choice(MODELOS), "feitos": 0})
+            elif op < 0.75:
+                campo, valores = sorteio.choice([("template", MODELOS), ("data", DIAS)])
+                tabela.update({campo: sorteio.choice(valores)}, doc_ids=[sorteio.choice(ids)])
+            elif op < 0.97:
+                tabela.remove(doc_ids=[sorteio.choice(ids)])
+            else:
+                tabela.truncate()
+            if passo % 10 == 0:
+                _conferir(banco.table("checklists"))
+        _conferir(banco.table("checklists"))
+        _conferir(outro.table("checklists"))
+    finally:
+        banco.close()
+        outro.close()
+
+
+def _nomes(achados):
+    return [i["nome"] for i in achados]
+
+
+def test_busca_de_insumos_sem_acento_e_sem_caixa(banco):
+    for nome in ["Pão de forma", "Pão", "Maçã verde", "Salsicha", "Açúcar", "Queijo PRATO", "pãozinho"]:
+        negocio.salvar_insumo(nome, "un", 1.0)
+
+    assert indices.dobrar("  Pão   FRANCÊS ") == "pao frances"
+    assert _nomes(negocio.sugerir_insumos("Pa\u0303o", limite=1)) == ["Pão"]  # acento decomposto (NFD)
+    assert _nomes(negocio.sugerir_insumos("PAO")) == ["Pão", "Pão de forma", "pãozinho"]  # nome igual primeiro
+    assert _nomes(negocio.sugerir_insumos("pão", limite=2)) == ["Pão", "Pão de forma"]
+    assert _nomes(negocio.sugerir_insumos("maca")) == ["Maçã verde"]
+    assert _nomes(negocio.sugerir_insumos("acucar")) == ["Açúcar"]
+    assert _nomes(negocio.sugerir_insumos("prato que")) == ["Queijo PRATO"]  # prefixo de cada palavra
+    assert _nomes(negocio.sugerir_insumos("VERDE")) == ["Maçã verde"]
+    assert _nomes(negocio.sugerir_insumos("slasicha")) == ["Salsicha"]  # aproximada, por trigramas
+    assert negocio.sugerir_insumos("xyz") == []
+
+    negocio.salvar_insumo("Farinha de Trigo", "kg", 4.5)  # o índice acompanha os cadastros
+    assert _nomes(negocio.sugerir_insumos("trigo")) == ["Farinha de Trigo"]
@@ -0,0 +1,151 @@
+import os
+
+import pytest
+
+from dogflow import journal, lojas
+from dogflow.copias import RepositorioCopias
+from dogflow.journal import BancoJournal, caminho_journal
+from dogflow.storage import abrir_banco
+
+
+def _abandonar(banco):
+    """Solta os arquivos sem compactar, como um processo que caiu."""
+    banco._fh.close()
+    banco.trava.close()
+
+
+def _docs(banco, nome="itens"):
+    return {d.doc_id: dict(d) for d in banco.table(nome).all()}
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    return str(tmp_path / "buffet_db.json")
+
+
+@pytest.fixture
+def com_journal(caminho):
+    """Banco com três mutações só no journal; devolve os documentos esperados."""
+    banco = BancoJournal(caminho)
+    itens = banco.table("itens")
+    itens.insert({"nome": "a", "n": 1})
+    itens.insert({"nome": "b", "n": 2})
+    itens.update({"n": 3}, doc_ids=[1])
+    esperado = _docs(banco)
+    _abandonar(banco)
+    return esperado
+
+
+@pytest.mark.parametrize("cauda", [b'{"s": 4, "ops": [["i", "itens", 9, {"nome"', b"lixo\n", b'{"s": 4}\x00\n'])
+def test_reabre_com_ultima_linha_incompleta_ou_invalida(caminho, com_journal, cauda):
+    with open(caminho_journal(caminho), "ab") as fh:
+        tamanho = fh.tell()
+        fh.write(cauda)
+
+    banco = BancoJournal(caminho)
+    assert _docs(banco) == com_journal
+    assert os.path.getsize(caminho_journal(caminho)) == tamanho  # a cauda foi cortada
+
+    banco.table("itens").insert({"nome": "c", "n": 4})
+    _abandonar(banco)
+    banco = BancoJournal(caminho)
+    assert _docs(banco) == {**com_journal, 3: {"nome": "c", "n": 4}}
+    banco.close()
+
+
+def test_queda_entre_rename_do_snapshot_e_corte_do_journal(caminho, com_journal, monkeypatch):
+    with open(caminho_journal(caminho), "rb") as fh:
+        antigo = fh.read()
+    banco = BancoJournal(caminho)
+    banco.compactar()
+    _abandonar(banco)
+    # O snapshot novo foi renomeado, mas o journal não chegou a ser zerado.
+    with open(caminho_journal(caminho), "wb") as fh:
+        fh.write(antigo)
+
+    aplicadas = []
+    original = journal._aplicar
+
+    def contar(docs, op, doc_id, payload):
+        aplicadas.append((op, doc_id))
+        original(docs, op, doc_id, payload)
+
+    monkeypatch.setattr(journal, "_aplicar", contar)
+    banco = BancoJournal(caminho)
+    assert _docs(banco) == com_journal
+    assert aplicadas == []  # tudo já estava no snapshot
+
+    banco.table("itens").update({"n": 5}, doc_ids=[2])
+    _abandonar(banco)
+    banco = BancoJournal(caminho)
+    assert _docs(banco) == {1: com_journal[1], 2: {"nome": "b", "n": 5}}
+    assert aplicadas == [("u", 2)]
+    banco.close()
+
+
+def test_reabrir_depois_de_compactar_mantem_documentos_e_ids(caminho):
+    banco = BancoJournal(caminho)
+    itens, outros = banco.table("itens"), banco.table("outros")
+    for n in range(1, 6):
+        itens.insert({"nome": f"i{n}", "n": n})
+    itens.remove(doc_ids=[2, 4])
+    outros.insert({"x": 1})
+    esperado = _docs(banco)
+    banco.close()
+    assert os.path.getsize(caminho_journal(caminho)) == 0
+
+    banco = BancoJournal(caminho)
+    assert _docs(banco) == esperado
+    assert sorted(esperado) == [1, 3, 5]
+    banco.compactar()  # "outros" nunca foi lida: vai do snapshot anterior sem decodificar
+    banco.close()
+
+    banco = BancoJournal(caminho)
+    assert _docs(banco) == esperado
+    assert _docs(banco, "outros") == {1: {"x": 1}}
+    assert banco.table("itens").insert({"nome": "novo"}) == 6
+    assert banco.table("itens").get(nome="i3").doc_id == 3
+    banco.close()
+
+
+def _conteudo(*caminhos):
+    lidos = []
+    for c in caminhos:
+        with open(c, "rb") as fh:
+            lidos.append(fh.read())
+    return lidos
+
+
+def test_somente_leitura_nao_corta_nem_compacta(caminho, com_journal):
+    with open(caminho_journal(caminho), "ab") as fh:
+        fh.write(b'{"s": 4, "ops": [')  # outro terminal no meio de uma gravação
+    antes = _conteudo(caminho_journal(caminho))
+
+    banco = abrir_banco(caminho, somente_leitura=True)
+    assert isinstance(banco, BancoJournal)
+    with banco.transacao():
+        assert _docs(banco) == com_journal
+    with pytest.raises(PermissionError):
+        banco.table("itens").insert({"nome": "x"})
+    banco.close()
+    assert _conteudo(caminho_journal(caminho)) == antes
+    assert not os.path.exists(caminho)  # o snapshot nunca foi gravado
+
+
+def test_resumo_da_loja_e_copia_nao_regravam_o_banco(tmp_path):
+    catalogo = str(tmp_path / "buffet_db.json")
+    loja = lojas.caminho_loja(catalogo, "centro")
+    os.makedirs(os.path.dirname(loja))
+    banco = BancoJournal(catalogo)
+    banco.table("insumos").insert({"nome": "Pão", "unidade": "un", "custo_unit": 1.0})
+    _abandonar(banco)
+    banco = BancoJournal(loja)
+    banco.table("resumos").insert({"data": "2024-05-10", "template": "Abertura", "done": 1, "total": 2, "pct": 50})
+    _abandonar(banco)
+    antes = _conteudo(caminho_journal(catalogo), caminho_journal(loja))
+
+    assert lojas.resumir_loja("centro", loja)[0]["done"] == 1
+    manifesto = RepositorioCopias(catalogo).criar()
+    assert manifesto
+    assert _conteudo(caminho_journal(catalogo), caminho_journal(loja)) == antes
+    assert not os.path.exists(catalogo) and not os.path.exists(loja)
@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+from dogflow.servico import ErroHTTP, _ler_pedido
+
+
+def _ler(bruto: bytes):
+    async def ler():
+        reader = asyncio.StreamReader()
+        reader.feed_data(bruto)
+        reader.feed_eof()
+        return await _ler_pedido(reader)
+
+    return asyncio.run(ler())
+
+
+def test_pedido_com_corpo():
+    pedido = _ler(b"POST /api/checklists HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}")
+    assert pedido[0] == "POST" and pedido[3] == b"{}"
+
+
+@pytest.mark.parametrize("valor", [b"abc", b"-1", b"1.5"])
+def test_content_length_invalido(valor):
+    bruto = b"POST /api/checklists HTTP/1.1\r\nContent-Length: " + valor + b"\r\n\r\n{}"
+    with pytest.raises(ErroHTTP) as erro:
+        _ler(bruto)
+    assert erro.value.status == 400
+    assert str(erro.value) == "Content-Length inválido."
@@ -0,0 +1,170 @@
+import gzip
+import os
+import subprocess
+import sys
+
+import pytest
+
+from dogflow import storage
+from dogflow.arquivo import caminho_arquivo
+from dogflow.journal import BancoJournal, caminho_journal
+from dogflow.storage import BancoSQLite, abrir_banco, gravar_tabelas, migrar_json_para_sqlite
+
+MESES = ["checklists-2024-01.jsonl.gz", "checklists-2024-02.jsonl.gz"]
+
+
+def _mes(pasta, mes, linhas):
+    os.makedirs(pasta, exist_ok=True)
+    with gzip.open(os.path.join(pasta, f"checklists-{mes}.jsonl.gz"), "wt", encoding="utf-8") as fh:
+        fh.write(linhas)
+
+
+@pytest.fixture
+def origem(tmp_path):
+    caminho = str(tmp_path / "buffet_db.json")
+    with open(caminho, "wb") as fh:
+        gravar_tabelas(fh, [("insumos", {"3": {"nome": "Pão", "unidade": "un", "custo_unit": 1.0}})])
+    _mes(caminho_arquivo(caminho), "2024-01", '{"data": "2024-01-05"}\n')
+    _mes(caminho_arquivo(caminho), "2024-02", '{"data": "2024-02-05"}\n')
+    return caminho
+
+
+def test_migracao_leva_o_arquivo_mensal(origem, tmp_path):
+    destino = str(tmp_path / "buffet_db.sqlite3")
+    assert migrar_json_para_sqlite(origem, destino) == {"insumos": 1, "arquivo": 2}
+    assert sorted(os.listdir(caminho_arquivo(destino))) == MESES
+    with gzip.open(os.path.join(caminho_arquivo(destino), "checklists-2024-02.jsonl.gz"), "rt") as fh:
+        assert fh.read() == '{"data": "2024-02-05"}\n'
+    banco = BancoSQLite(destino)
+    try:
+        assert banco.table("insumos").get(doc_id=3)["nome"] == "Pão"
+    finally:
+        banco.close()
+
+
+def test_migracao_recusa_arquivo_existente_no_destino(origem, tmp_path):
+    destino = str(tmp_path / "buffet_db.sqlite3")
+    _mes(caminho_arquivo(destino), "2023-12", '{"data": "2023-12-01"}\n')
+    with pytest.raises(ValueError, match="arquivo de checklists"):
+        migrar_json_para_sqlite(origem, destino)
+    assert not os.path.exists(destino)
+
+    assert migrar_json_para_sqlite(origem, destino, sobrescrever=True)["arquivo"] == 2
+    assert sorted(os.listdir(caminho_arquivo(destino))) == MESES
+
+
+def _tabelas_sqlite(caminho):
+    banco = BancoSQLite(caminho)
+    try:
+        return {nome: {d.doc_id: dict(d) for d in banco.table(nome).all()} for nome in banco.tabelas()}
+    finally:
+        banco.close()
+
+
+def test_migracao_inclui_o_journal_pendente(tmp_path):
+    origem, destino = str(tmp_path / "buffet_db.json"), str(tmp_path / "buffet_db.sqlite3")
+    banco = BancoJournal(origem)
+    banco.table("insumos").insert({"nome": "Pão", "unidade": "un", "custo_unit": 1.0})
+    banco.close()  # compacta: o snapshot ganha a tabela interna do journal
+    banco = BancoJournal(origem)
+    banco.table("insumos").insert({"nome": "Queijo", "unidade": "kg", "custo_unit": 40.0})
+    banco.table("insumos").update({"custo_unit": 1.5}, doc_ids=[1])
+    banco._fh.close()  # sem compactar: as duas mudanças ficam só no journal
+    banco.trava.close()
+    with open(caminho_journal(origem), "rb") as fh:
+        journal = fh.read()
+
+    assert migrar_json_para_sqlite(origem, destino) == {"insumos": 2, "arquivo": 0}
+    assert _tabelas_sqlite(destino) == {
+        "insumos": {
+            1: {"nome": "Pão", "unidade": "un", "custo_unit": 1.5},
+            2: {"nome": "Queijo", "unidade": "kg", "custo_unit": 40.0},
+        }
+    }
+    with open(caminho_journal(origem), "rb") as fh:
+        assert fh.read() == journal  # a origem não foi compactada
+
+
+def test_migracao_de_banco_nunca_compactado(tmp_path):
+    origem, destino = str(tmp_path / "buffet_db.json"), str(tmp_path / "buffet_db.sqlite3")
+    banco = BancoJournal(origem)
+    banco.table("fichas").insert({"nome_prod": "Dog", "ingredientes": [], "preco": 10.0})
+    banco._fh.close()
+    banco.trava.close()
+    assert not os.path.exists(origem)
+
+    assert migrar_json_para_sqlite(origem, destino)["fichas"] == 1
+    assert _tabelas_sqlite(destino)["fichas"][1]["nome_prod"] == "Dog"
+
+
+def test_write_behind_no_sqlite_nao_segura_a_trava(tmp_path):
+    caminho = str(tmp_path / "buffet_db.sqlite3")
+    a, b = abrir_banco(caminho, escrita_adiada=30), abrir_banco(caminho)
+    try:
+        a.table("insumos").insert({"nome": "Pão"})
+        b.table("insumos").insert({"nome": "Queijo"})  # antes: "database is locked" depois de 5 s
+        assert sorted(d["nome"] for d in a.table("insumos").all()) == ["Pão", "Queijo"]
+    finally:
+        a.close()
+        b.close()
+
+
+def test_sqlite_travado_por_outro_terminal_da_timeout(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "ESPERA_TRAVA", 0.1)
+    caminho = str(tmp_path / "buffet_db.sqlite3")
+    a, b = BancoSQLite(caminho), BancoSQLite(caminho)
+    try:
+        b.table("insumos")
+        with a.transacao():
+            a.table("insumos").insert({"nome": "Pão"})
+            with pytest.raises(TimeoutError):
+                b.table("insumos").insert({"nome": "Queijo"})
+        assert [d["nome"] for d in b.table("insumos").all()] == ["Pão"]
+    finally:
+        a.close()
+        b.close()
+
+
+@pytest.mark.parametrize("nome, journal", [("b.json", False), ("b.json", True), ("b.sqlite3", False)])
+def test_fechar_com_write_behind_nao_descarrega_de_novo_na_saida(tmp_path, nome, journal):
+    script = (
+        "import sys; from dogflow.storage import abrir_banco\n"
+        "b = abrir_banco(sys.argv[1], escrita_adiada=30, journal=sys.argv[2] == '1')\n"
+        "b.table('insumos').insert({'nome': 'Pão'})\n"
+        "b.close()\n"
+    )
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    r = subprocess.run(
+        [sys.executable, "-c", script, str(tmp_path / nome), "1" if journal else "0"],
+        cwd=raiz, capture_output=True, text=True, timeout=60,
+    )
+    assert r.returncode == 0 and r.stderr == ""
+
+
+@pytest.mark.parametrize("nome, journal", [("b.json", False), ("b.json", True), ("b.sqlite3", False)])
+def test_transacao_com_erro_nao_grava_nada(tmp_path, nome, journal):
+    caminho = str(tmp_path / nome)
+    banco = abrir_banco(caminho, journal=journal)
+    insumos = banco.table("insumos")
+    with banco.transacao():
+        insumos.insert({"nome": "Pão", "custo_unit": 1.0})
+        insumos.insert({"nome": "Queijo", "custo_unit": 40.0})
+    antes = {d.doc_id: dict(d) for d in insumos.all()}
+
+    with pytest.raises(RuntimeError):
+        with banco.transacao():
+            insumos.update({"custo_unit": 2.0}, doc_ids=[1])
+            insumos.remove(doc_ids=[2])
+            with banco.transacao():  # aninhada: desfeita junto
+                insumos.insert({"nome": "Tomate", "custo_unit": 8.0})
+                raise RuntimeError("falha no meio")
+
+    assert {d.doc_id: dict(d) for d in insumos.all()} == antes
+    assert insumos.get(nome="Queijo").doc_id == 2  # índices também voltaram
+    assert insumos.get(nome="Tomate") is None
+    assert insumos.insert({"nome": "Alface", "custo_unit": 3.0}) == 3
+    banco.close()
+
+    banco = abrir_banco(caminho, journal=journal)
+    assert sorted(d["nome"] for d in banco.table("insumos").all()) == ["Alface", "Pão", "Queijo"]
+    banco.close()
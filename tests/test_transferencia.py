@@ -0,0 +1,49 @@
+import json
+
+from dogflow import negocio
+
+
+def _escrever(tmp_path, nome, texto):
+    caminho = tmp_path / nome
+    caminho.write_text(texto, encoding="utf-8")
+    return str(caminho)
+
+
+def test_json_com_registros_que_nao_sao_objetos(banco, tmp_path):
+    regs = [1, {"nome": "Farinha", "unidade": "kg", "custo_unit": "4,50"}, "texto", None]
+    caminho = _escrever(tmp_path, "insumos.json", json.dumps(regs))
+    inseridos, atualizados, rejeitados = negocio.importar_arquivo("insumos", caminho)
+    assert (inseridos, atualizados) == (1, 0)
+    assert [(n, motivo) for n, motivo, _ in rejeitados] == [
+        (1, "registro não é um objeto"),
+        (3, "registro não é um objeto"),
+        (4, "registro não é um objeto"),
+    ]
+
+
+def test_jsonl_com_linha_que_nao_e_objeto(banco, tmp_path):
+    linhas = ['{"nome": "Queijo", "itens": ["Fatiar"]}', "[1, 2]", "42"]
+    caminho = _escrever(tmp_path, "templates.jsonl", "\n".join(linhas) + "\n")
+    inseridos, _, rejeitados = negocio.importar_arquivo("templates", caminho)
+    assert inseridos == 1
+    assert [(n, motivo, reg) for n, motivo, reg in rejeitados] == [
+        (2, "registro não é um objeto", [1, 2]),
+        (3, "registro não é um objeto", 42),
+    ]
+
+
+def test_fichas_e_vendas_recusam_nao_objetos(banco, tmp_path):
+    negocio.importar_arquivo("insumos", _escrever(tmp_path, "i.json", '[{"nome": "Pão", "custo_unit": 1}]'))
+    fichas = [["x"], {"nome_prod": "Lanche", "preco": 10, "ingredientes": [{"insumo": "Pão", "qtd": 1}]},
+              {"nome_prod": "Torrada", "ingredientes": ["Pão"]}]
+    inseridos, _, rejeitados = negocio.importar_arquivo("fichas", _escrever(tmp_path, "f.json", json.dumps(fichas)))
+    assert inseridos == 1
+    assert [(n, motivo) for n, motivo, _ in rejeitados] == [
+        (1, "registro não é um objeto"),
+        (3, "ingrediente não é um objeto"),
+    ]
+
+    vendas = ["Lanche", {"data": "2024-05-01", "produto": "Lanche", "qtd": 2}]
+    importadas, _, rejeitados = negocio.importar_arquivo("vendas", _escrever(tmp_path, "v.json", json.dumps(vendas)))
+    assert importadas == 1
+    assert [(n, motivo) for n, motivo, _ in rejeitados] == [(1, "registro não é um objeto")]
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from dogflow import negocio
+
+
+def _importar(tmp_path, nome, vendas):
+    caminho = tmp_path / nome
+    caminho.write_text(json.dumps(vendas), encoding="utf-8")
+    return negocio.importar_arquivo("vendas", str(caminho))
+
+
+@pytest.fixture
+def cardapio(banco):
+    ids = {nome: negocio.salvar_insumo(nome, un, custo)[0]
+           for nome, un, custo in [("pão", "un", 1.0), ("salsicha", "un", 2.0), ("queijo", "kg", 40.0)]}
+    negocio.salvar_ficha("Dog", [{"insumo_id": ids["pão"], "qtd": 1}, {"insumo_id": ids["salsicha"], "qtd": 1}],
+                         preco=12.0)
+    negocio.salvar_ficha("Dog queijo", [{"insumo_id": ids["pão"], "qtd": 1}, {"insumo_id": ids["salsicha"], "qtd": 2},
+                                        {"insumo_id": ids["queijo"], "qtd": 0.05}], preco=18.0)
+    return ids
+
+
+def test_consumo_e_estoque_esperado_de_uma_importacao(cardapio, tmp_path):
+    vendas = [
+        {"data": "2024-05-01", "produto": "Dog", "qtd": 3, "valor": 36},
+        {"data": "2024-05-01", "produto": "Dog queijo", "qtd": 1},  # sem valor: preço da ficha
+        {"data": "2024-05-02", "produto": "Dog", "qtd": 2, "preco": 11},
+        {"data": "02/05/2024", "nome_prod": "Dog queijo", "qtd": 2, "valor": "35,00"},
+        {"data": "2024-05-02", "produto": "Pizza", "qtd": 1},
+    ]
+    importadas, agregados, rejeitados = _importar(tmp_path, "v.json", vendas)
+    assert (importadas, agregados) == (4, 4)
+    assert [motivo for _, motivo, _ in rejeitados] == ["produto 'Pizza' sem ficha técnica"]
+
+    pao, salsicha, queijo = (str(cardapio[n]) for n in ("pão", "salsicha", "queijo"))
+    dia = negocio.vendas_table.get(data="2024-05-01")
+    assert dia["insumos"] == {pao: {"qtd": 4.0, "custo": 4.0}, salsicha: {"qtd": 5.0, "custo": 10.0},
+                              queijo: {"qtd": 0.05, "custo": 2.0}}
+    assert dia["produtos"]["Dog queijo"] == {"qtd": 1.0, "receita": 18.0, "custo": 7.0}
+    linhas = {r["produto"]: r for r in negocio.vendas_por_produto()}
+    assert (linhas["Dog"]["qtd"], linhas["Dog"]["receita"], linhas["Dog"]["custo"]) == (5.0, 58.0, 15.0)
+    assert negocio.total_de_vendas(negocio.vendas_por_dia())["receita"] == 111.0
+
+    with pytest.raises(ValueError, match="já foram importadas"):
+        _importar(tmp_path, "de-novo.json", vendas)
+
+    negocio.registrar_contagem("pão", 50, "2024-05-01")
+    negocio.registrar_contagem("queijo", 1.0, "2024-04-30")
+    estoque = {r["insumo"]: r for r in negocio.estoque_esperado("2024-05-02")}
+    assert (estoque["pão"]["consumo"], estoque["pão"]["esperado"]) == (4.0, 46.0)  # só depois da contagem
+    assert (estoque["queijo"]["consumo"], estoque["queijo"]["esperado"]) == (0.15, 0.85)
+    assert (estoque["salsicha"]["consumo"], estoque["salsicha"]["esperado"]) == (11.0, None)
+    assert negocio.estoque_esperado("2024-05-01")[0]["esperado"] == 50.0
+
+    negocio.salvar_insumo("pão", "un", 1.5)  # reajuste não muda o custo de dias já importados
+    assert _importar(tmp_path, "mais.json", [{"data": "2024-05-02", "produto": "Dog", "qtd": 1}])[:2] == (1, 1)
+    dia = negocio.vendas_table.get(data="2024-05-02")
+    assert dia["insumos"][pao] == {"qtd": 5.0, "custo": 5.5}
+    assert dia["produtos"]["Dog"] == {"qtd": 3.0, "receita": 34.0, "custo": 9.5}